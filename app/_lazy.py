@@ -0,0 +1,28 @@
+"""Lazy package re-exports (PEP 562 module __getattr__)."""
+
+from importlib import import_module
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable, Callable]:
+    """Build __getattr__ and __dir__ for a package re-exporting exports lazily.
+
+    exports maps each public name to the module defining it (relative to
+    package, or absolute). The module is imported on first access and the
+    value cached in the package namespace, so later lookups are plain
+    attribute reads and "import package" itself stays cheap.
+    """
+    namespace = import_module(package).__dict__
+
+    def __getattr__(name: str):
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(module, package), name)
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
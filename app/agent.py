@@ -1,27 +1,126 @@
 """Integrated agent that combines all components."""
 
+import os
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from .schemas import AnswerResponse
-from .workflow import create_workflow, AgentState
-from .prompts import OpenAIChatLLM
-from .logging import SimpleLogger
+from typing import Callable, Dict, Optional
+from uuid import uuid4
+from .schemas import AnswerResponse, validate_response
+from .workflow import create_workflow, AgentState, REPORT_MAX_CONCURRENCY
+from .prompts import OpenAIChatLLM, PromptRegistry, default_prompt_registry
+from .logging import SimpleLogger, TurnProfiler
+from .services import (
+    IntentClassifier,
+    LoadShedder,
+    LocalIntentModel,
+    ModelRouter,
+    OutputBudgets,
+    default_load_shedder,
+)
+from .memory import MemoryStore
+from .retrieval import DocumentIndex, DocumentStream
+
+# Messages carried between turns (three per turn); older turns are recalled
+# from the memory store by relevance instead
+MESSAGE_WINDOW = 30
+
+# Completed turns kept for idempotent retries
+IDEMPOTENCY_CACHE_SIZE = 256
 
 
 class IntegratedAgent:
     """Simple integrated agent combining all components."""
 
-    def __init__(self):
-        # Use OpenAI GPT - requires OPENAI_API_KEY environment variable
-        self.llm = OpenAIChatLLM()
-        self.workflow = create_workflow()
-        self.logger = SimpleLogger()
+    def __init__(
+        self,
+        llm=None,
+        log_dir: str = "logs",
+        confidence_thresholds: Optional[Dict[str, float]] = None,
+        memory_store: Optional[MemoryStore] = None,
+        conversation_id: Optional[str] = None,
+        retriever: Optional[DocumentIndex] = None,
+        profiler: Optional[TurnProfiler] = None,
+        load_shedder: Optional[LoadShedder] = None,
+        max_concurrency: int = REPORT_MAX_CONCURRENCY,
+        model_router: Optional[ModelRouter] = None,
+        prompt_registry: Optional[PromptRegistry] = None,
+        output_budgets: Optional[OutputBudgets] = None,
+    ):
+        # Use OpenAI GPT by default - requires OPENAI_API_KEY environment variable
+        self.llm = llm or OpenAIChatLLM()
+        # Shared by default so all conversations react to upstream health
+        self.load_shedder = load_shedder or default_load_shedder
+        if load_shedder is None:
+            default_load_shedder.register()
+        # Per-call model choice, configured by AGENT_MODEL_TIERS; off by default
+        self.model_router = model_router or ModelRouter.from_env()
+        self.classifier = IntentClassifier(
+            llm=self.llm,
+            local_model=LocalIntentModel.from_env(),
+            load_shedder=self.load_shedder,
+            model_router=self.model_router,
+            # Per-role output limits, from AGENT_OUTPUT_BUDGETS by default
+            output_budgets=output_budgets,
+        )
+        # Hot-reloaded prompt templates, from AGENT_PROMPT_DIR by default
+        self.prompt_registry = prompt_registry or default_prompt_registry()
+        self.workflow = create_workflow(thresholds=confidence_thresholds)
+        # Bounds parallel node tasks per turn, e.g. report sections in flight
+        self.run_config = {"max_concurrency": max_concurrency}
+        self.logger = SimpleLogger(log_dir=log_dir)
+        # Off unless AGENT_PROFILE_RATE is set or a turn asks for it
+        self.profiler = profiler or TurnProfiler(log_dir=log_dir)
+        # AGENT_MEMORY_DB overrides the default store in the log directory
+        self.memory_store = memory_store or MemoryStore.shared(
+            os.getenv("AGENT_MEMORY_DB") or os.path.join(log_dir, "memory.db")
+        )
+        self.conversation_id = conversation_id or uuid4().hex
+        # Knowledge base for grounded QA, opened from AGENT_INDEX_DIR by default
+        self.retriever = retriever or DocumentIndex.from_env()
         self.memory = []
         self.conversation_messages = []  # Store messages across interactions
+        # Turns read and replace the conversation state, so they run one at a time
+        self._turn_lock = threading.Lock()
+        self._replies: "OrderedDict[str, AnswerResponse]" = OrderedDict()
+
+    def process_input(
+        self,
+        user_input: str,
+        on_step: Optional[Callable[[str], None]] = None,
+        profile: Optional[bool] = None,
+        on_section: Optional[Callable[[dict], None]] = None,
+        document: Optional[DocumentStream] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> AnswerResponse:
+        """Process user input through the LangGraph workflow.
+
+        If on_step is given, the workflow is streamed and on_step is called
+        with each node name as it finishes; on_section likewise receives each
+        report section ({"index", "title", "text", "ok"}) as soon as it is
+        written. profile=True/False forces or disables profiling of this
+        turn; by default the profiler samples. If a document is given, the
+        turn summarizes it as instructed by user_input (see summarize).
+
+        Concurrent calls are serialized. A call repeating the idempotency_key
+        of a completed turn returns that turn's response without running
+        again; failed turns are not remembered.
+        """
+        with self._turn_lock:
+            if idempotency_key is not None and idempotency_key in self._replies:
+                self._replies.move_to_end(idempotency_key)
+                return self._replies[idempotency_key]
+            response = self._run_turn(user_input, on_step, profile, on_section, document)
+            if idempotency_key is not None and response.sources != ["error_handler"]:
+                self._replies[idempotency_key] = response
+                if len(self._replies) > IDEMPOTENCY_CACHE_SIZE:
+                    self._replies.popitem(last=False)
+            return response
 
-    def process_input(self, user_input: str) -> AnswerResponse:
-        """Process user input through the LangGraph workflow."""
-        # Start session
-        self.logger.start_session(user_input)
+    def _run_turn(self, user_input, on_step, profile, on_section, document) -> AnswerResponse:
+        # One prompt snapshot per turn, even if templates reload meanwhile
+        prompts = self.prompt_registry.snapshot()
+        session_id = self.logger.start_session(user_input, prompt_versions=prompts.versions)
 
         try:
             # Create initial state with existing memory and messages
@@ -32,11 +131,27 @@ class IntegratedAgent:
                 memory=self.memory.copy(),
                 current_step="start",
                 messages=self.conversation_messages.copy(),  # Use existing messages
-                logger=self.logger
+                logger=self.logger,
+                classifier=self.classifier,
+                memory_store=self.memory_store,
+                conversation_id=self.conversation_id,
+                retriever=self.retriever,
+                load_shedder=self.load_shedder,
+                model_router=self.model_router,
+                prompts=prompts,
+                document=document,
             )
 
             # Run the LangGraph workflow
-            final_state = self.workflow.invoke(initial_state)
+            with self.profiler.profile(session_id, force=profile) as artifacts:
+                if on_step is None and on_section is None:
+                    final_state = self.workflow.invoke(initial_state, config=self.run_config)
+                else:
+                    final_state = self._stream_workflow(initial_state, on_step, on_section)
+            if artifacts:
+                self.logger.log_tool_call(
+                    "profiler", {"mode": self.profiler.mode}, ", ".join(artifacts)
+                )
 
             # Extract response and update memory
             if final_state["response"]:
@@ -52,12 +167,13 @@ class IntegratedAgent:
 
             # Update memory and store messages for next conversation
             self.memory = final_state["memory"]
-            self.conversation_messages = final_state.get("messages", [])
+            self.conversation_messages = final_state.get("messages", [])[-MESSAGE_WINDOW:]
 
             # Log the session
             self.logger.end_session(response.answer)
 
-            return response
+            # Nodes may skip validation on the fast path; validate at the boundary
+            return validate_response(response)
 
         except Exception as e:
             error_response = AnswerResponse(
@@ -71,6 +187,35 @@ class IntegratedAgent:
             self.logger.end_session(error_response.answer)
             return error_response
 
+    def summarize(
+        self, source, instruction: str = "Summarize this document.", **kwargs
+    ) -> AnswerResponse:
+        """Summarize a large document from a path, mmap or iterator of text.
+
+        The document is streamed in chunks and never held whole; the session
+        log and response record only the instruction, plus the content's
+        sha256 and byte length.
+        """
+        document = source if isinstance(source, DocumentStream) else DocumentStream(source)
+        return self.process_input(instruction, document=document, **kwargs)
+
+    def _stream_workflow(self, initial_state, on_step=None, on_section=None):
+        """Run the workflow, reporting each completed node and report section."""
+        final_state = initial_state
+        for mode, chunk in self.workflow.stream(
+            initial_state, config=self.run_config, stream_mode=["updates", "values"]
+        ):
+            if mode == "updates":
+                for node_name, update in chunk.items():
+                    if on_step is not None:
+                        on_step(node_name)
+                    if on_section is not None and node_name == "write_section":
+                        for section in update["report_sections"]:
+                            on_section(section)
+            else:
+                final_state = chunk
+        return final_state
+
     def get_memory(self) -> list:
-        """Get current conversation memory."""
-        return self.memory
+        """Get current conversation memory, including turns older than the window."""
+        return self.memory_store.entries(self.conversation_id)
@@ -1,3 +1,23 @@
-from .simple_logger import SimpleLogger
+"""Session logging and turn profiling.
 
-__all__ = ["SimpleLogger"]
+Names are imported on first use, so ``python -m app.logging.profiler``
+does not load the pydantic schemas (nor compaction's numpy).
+"""
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "SimpleLogger": ".simple_logger",
+    "TurnProfiler": ".profiler",
+    "LogCompactor": ".compaction",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .simple_logger import SimpleLogger
+    from .profiler import TurnProfiler
+    from .compaction import LogCompactor
@@ -0,0 +1,471 @@
+"""Compaction and retention of SimpleLogger session files.
+
+Session files older than min_age_days are merged into one compressed,
+columnar archive per day (archive/sessions-YYYY-MM-DD.npz) and deleted.
+Text columns are stored as a UTF-8 blob plus offsets, so one session is
+decoded by slicing a single row (each column is still decompressed whole). archive/summary.db (SQLite) holds the
+session index (session id -> day, row) and per-day rollups: session and
+error counts, latency percentiles and tool usage. Archives older than
+retention_days are deleted; their rollups are kept. Profiler artifacts
+(profiles/) older than retention_days are deleted as well.
+
+Run it once from the CLI (``python -m app.logging.compaction``) or in
+process with LogCompactor.start() (the HTTP service does this when
+AGENT_LOG_COMPACT_INTERVAL is set).
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .profiler import PROFILE_DIR
+
+ARCHIVE_DIR = "archive"
+SUMMARY_DB = "summary.db"
+
+TEXT_COLUMNS = ("session_id", "user_query", "response", "tool_calls", "prompt_versions")
+_TEXT_DEFAULTS = {"tool_calls": "[]", "prompt_versions": "{}"}
+ERROR_PREFIX = "Error processing request"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    day TEXT NOT NULL,
+    row INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT PRIMARY KEY,
+    sessions INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    latency_p50_ms REAL,
+    latency_p90_ms REAL,
+    latency_p99_ms REAL,
+    latency_max_ms REAL,
+    archived INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_tools (
+    day TEXT NOT NULL,
+    tool_name TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    PRIMARY KEY (day, tool_name)
+);
+"""
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def _pack_text(values: List[str]) -> Dict[str, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return {"data": np.frombuffer(b"".join(encoded), dtype=np.uint8), "offsets": offsets}
+
+
+def _unpack_text(data: np.ndarray, offsets: np.ndarray, row: int) -> str:
+    return data[offsets[row]:offsets[row + 1]].tobytes().decode("utf-8")
+
+
+def _read_text_column(npz, name: str, rows) -> List[str]:
+    if f"{name}.data" not in npz:
+        # Archives written before the column existed
+        return [_TEXT_DEFAULTS.get(name, "") for _ in rows]
+    data, offsets = npz[f"{name}.data"], npz[f"{name}.offsets"]
+    return [_unpack_text(data, offsets, row) for row in rows]
+
+
+def _as_session(text: Dict[str, str], started: np.datetime64, ended: np.datetime64) -> dict:
+    """One archived row in the shape of the original session file."""
+    return {
+        "session_id": text["session_id"],
+        "user_query": text["user_query"],
+        "response": text["response"] or None,
+        "tool_calls": json.loads(text["tool_calls"]),
+        "prompt_versions": json.loads(text["prompt_versions"]),
+        "started_at": None if np.isnat(started) else str(started),
+        "ended_at": None if np.isnat(ended) else str(ended),
+    }
+
+
+class DayArchive:
+    """Columns of one day's sessions, as stored in its .npz file."""
+
+    def __init__(self, columns: Dict[str, Any]):
+        self.columns = columns
+
+    @classmethod
+    def from_sessions(cls, sessions: List[dict]) -> "DayArchive":
+        columns: Dict[str, Any] = {
+            "session_id": [s["session_id"] for s in sessions],
+            "user_query": [s.get("user_query") or "" for s in sessions],
+            "response": [s.get("response") or "" for s in sessions],
+            "tool_calls": [json.dumps(s.get("tool_calls", []), default=str) for s in sessions],
+            "prompt_versions": [json.dumps(s.get("prompt_versions", {})) for s in sessions],
+        }
+        started = [_parse_time(s.get("started_at")) for s in sessions]
+        ended = [_parse_time(s.get("ended_at")) for s in sessions]
+        columns["started_at"] = np.array(
+            [t or "NaT" for t in started], dtype="datetime64[us]"
+        )
+        columns["ended_at"] = np.array([t or "NaT" for t in ended], dtype="datetime64[us]")
+        columns["latency_ms"] = np.array(
+            [
+                (e - s).total_seconds() * 1000 if s and e else np.nan
+                for s, e in zip(started, ended)
+            ],
+            dtype=np.float64,
+        )
+        return cls(columns)
+
+    @classmethod
+    def load(cls, path: Path) -> "DayArchive":
+        with np.load(path) as npz:
+            rows = len(npz["latency_ms"])
+            columns: Dict[str, Any] = {
+                name: _read_text_column(npz, name, range(rows)) for name in TEXT_COLUMNS
+            }
+            for name in ("started_at", "ended_at", "latency_ms"):
+                columns[name] = npz[name]
+        return cls(columns)
+
+    def __len__(self) -> int:
+        return len(self.columns["session_id"])
+
+    def merge(self, other: "DayArchive") -> "DayArchive":
+        """Rows of self followed by rows of other not already present."""
+        seen = set(self.columns["session_id"])
+        keep = [i for i, sid in enumerate(other.columns["session_id"]) if sid not in seen]
+        columns: Dict[str, Any] = {}
+        for name, values in self.columns.items():
+            theirs = other.columns[name]
+            if name in TEXT_COLUMNS:
+                columns[name] = list(values) + [theirs[i] for i in keep]
+            else:
+                columns[name] = np.concatenate([values, theirs[keep]])
+        return DayArchive(columns)
+
+    def save(self, path: Path):
+        """Write atomically, so readers never see a partial archive."""
+        arrays = {}
+        for name in TEXT_COLUMNS:
+            for part, array in _pack_text(self.columns[name]).items():
+                arrays[f"{name}.{part}"] = array
+        for name in ("started_at", "ended_at", "latency_ms"):
+            arrays[name] = np.asarray(self.columns[name])
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def session(self, row: int) -> dict:
+        return _as_session(
+            {name: self.columns[name][row] for name in TEXT_COLUMNS},
+            self.columns["started_at"][row],
+            self.columns["ended_at"][row],
+        )
+
+    def rollup(self) -> dict:
+        """Session and error counts, latency percentiles and tool usage."""
+        latency = self.columns["latency_ms"]
+        latency = latency[~np.isnan(latency)]
+        p50, p90, p99 = (
+            np.percentile(latency, [50, 90, 99]).tolist() if len(latency) else (None,) * 3
+        )
+        tools: Dict[str, int] = {}
+        for calls in self.columns["tool_calls"]:
+            for call in json.loads(calls):
+                name = call.get("tool_name")
+                tools[name] = tools.get(name, 0) + 1
+        return {
+            "sessions": len(self),
+            "errors": sum(r.startswith(ERROR_PREFIX) for r in self.columns["response"]),
+            "latency_p50_ms": p50,
+            "latency_p90_ms": p90,
+            "latency_p99_ms": p99,
+            "latency_max_ms": float(latency.max()) if len(latency) else None,
+            "tools": tools,
+        }
+
+
+class LogCompactor:
+    """Merge old session files into daily archives and expire old archives.
+
+    min_age_days keeps recent days as plain files (the default, 1, only
+    compacts days before today); retention_days deletes archives older
+    than that many days (None keeps them forever). interval is the period
+    of the background thread started by start().
+    """
+
+    def __init__(
+        self,
+        log_dir: str = "logs",
+        min_age_days: int = 1,
+        retention_days: Optional[int] = None,
+        interval: float = 3600.0,
+    ):
+        self.log_dir = Path(log_dir)
+        self.interval = interval
+        self.archive_dir = self.log_dir / ARCHIVE_DIR
+        self.min_age_days = min_age_days
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, log_dir: str = "logs") -> Optional["LogCompactor"]:
+        """Build a compactor if AGENT_LOG_COMPACT_INTERVAL (seconds) is set.
+
+        AGENT_LOG_RETENTION_DAYS sets retention_days.
+        """
+        interval = os.getenv("AGENT_LOG_COMPACT_INTERVAL")
+        if not interval:
+            return None
+        retention = os.getenv("AGENT_LOG_RETENTION_DAYS")
+        return cls(
+            log_dir,
+            retention_days=int(retention) if retention else None,
+            interval=float(interval),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.archive_dir / SUMMARY_DB, timeout=30)
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _archive_path(self, day: str) -> Path:
+        return self.archive_dir / f"sessions-{day}.npz"
+
+    def compact(self, today: Optional[date] = None) -> dict:
+        """Archive eligible session files, then apply retention.
+
+        Returns counts of compacted sessions and files, days written, days
+        expired and profiler artifacts expired. Files are deleted only after
+        their archive and index rows are committed; a rerun after a crash
+        skips sessions already archived. Files modified since the cutoff are
+        not read: a session file is last written when the session ends, so a
+        session that ran past midnight is compacted on a later pass.
+        """
+        today = today or date.today()
+        cutoff = today - timedelta(days=self.min_age_days - 1)
+        with self._lock:
+            by_day: Dict[str, List[dict]] = {}
+            files: Dict[str, List[Path]] = {}
+            for path in sorted(self.log_dir.glob("session_*.json")):
+                try:
+                    modified = date.fromtimestamp(path.stat().st_mtime)
+                    # Sessions end after they start, so skip parsing recent files
+                    if modified >= cutoff:
+                        continue
+                    with open(path) as f:
+                        session = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    continue
+                started = _parse_time(session.get("started_at"))
+                day = started.date() if started else modified
+                if day >= cutoff or "session_id" not in session:
+                    continue
+                by_day.setdefault(day.isoformat(), []).append(session)
+                files.setdefault(day.isoformat(), []).append(path)
+
+            conn = self._connect()
+            try:
+                for day, sessions in sorted(by_day.items()):
+                    self._write_day(conn, day, DayArchive.from_sessions(sessions))
+                    for path in files[day]:
+                        path.unlink(missing_ok=True)
+                expired = self._expire(conn, today)
+            finally:
+                conn.close()
+            expired_profiles = self._expire_profiles(today)
+        return {
+            "sessions": sum(len(s) for s in by_day.values()),
+            "days": sorted(by_day),
+            "expired_days": expired,
+            "expired_profiles": expired_profiles,
+        }
+
+    def _write_day(self, conn: sqlite3.Connection, day: str, new: DayArchive):
+        path = self._archive_path(day)
+        archive = DayArchive.load(path).merge(new) if path.exists() else new
+        archive.save(path)
+        rollup = archive.rollup()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sessions (session_id, day, row) VALUES (?, ?, ?)",
+                [(sid, day, row) for row, sid in enumerate(archive.columns["session_id"])],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO daily VALUES (?, ?, ?, ?, ?, ?, ?, 1)",
+                (
+                    day,
+                    rollup["sessions"],
+                    rollup["errors"],
+                    rollup["latency_p50_ms"],
+                    rollup["latency_p90_ms"],
+                    rollup["latency_p99_ms"],
+                    rollup["latency_max_ms"],
+                ),
+            )
+            conn.execute("DELETE FROM daily_tools WHERE day = ?", (day,))
+            conn.executemany(
+                "INSERT INTO daily_tools (day, tool_name, calls) VALUES (?, ?, ?)",
+                [(day, name, calls) for name, calls in rollup["tools"].items()],
+            )
+
+    def _expire(self, conn: sqlite3.Connection, today: date) -> List[str]:
+        if self.retention_days is None:
+            return []
+        oldest = (today - timedelta(days=self.retention_days)).isoformat()
+        days = [
+            row[0]
+            for row in conn.execute(
+                "SELECT day FROM daily WHERE archived = 1 AND day < ? ORDER BY day", (oldest,)
+            )
+        ]
+        for day in days:
+            self._archive_path(day).unlink(missing_ok=True)
+            with conn:
+                conn.execute("DELETE FROM sessions WHERE day = ?", (day,))
+                conn.execute("UPDATE daily SET archived = 0 WHERE day = ?", (day,))
+        return days
+
+    def _expire_profiles(self, today: date) -> int:
+        if self.retention_days is None:
+            return 0
+        oldest = today - timedelta(days=self.retention_days)
+        expired = 0
+        for path in (self.log_dir / PROFILE_DIR).glob("*"):
+            try:
+                if date.fromtimestamp(path.stat().st_mtime) < oldest:
+                    path.unlink()
+                    expired += 1
+            except OSError:
+                continue
+        return expired
+
+    def lookup(self, session_id: str) -> Optional[dict]:
+        """A session by id, from its file or its archive; None if unknown or expired."""
+        path = self.log_dir / f"session_{session_id}.json"
+        if path.exists():
+            with open(path) as f:
+                return json.load(f)
+        if not (self.archive_dir / SUMMARY_DB).exists():
+            return None
+        conn = self._connect()
+        try:
+            found = conn.execute(
+                "SELECT day, row FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if found is None:
+            return None
+        day, row = found
+        # np.load decompresses each text column whole; only this row is decoded
+        with np.load(self._archive_path(day)) as npz:
+            return _as_session(
+                {name: _read_text_column(npz, name, [row])[0] for name in TEXT_COLUMNS},
+                npz["started_at"][row],
+                npz["ended_at"][row],
+            )
+
+    def archived_sessions(self) -> Iterator[dict]:
+        """Every archived session, oldest day first."""
+        for path in sorted(self.archive_dir.glob("sessions-*.npz")):
+            if path.name.endswith(".tmp.npz"):
+                continue
+            archive = DayArchive.load(path)
+            for row in range(len(archive)):
+                yield archive.session(row)
+
+    def rollups(self) -> List[dict]:
+        """Per-day rollups, including days whose archives have expired."""
+        if not (self.archive_dir / SUMMARY_DB).exists():
+            return []
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            days = [dict(row) for row in conn.execute("SELECT * FROM daily ORDER BY day")]
+            for day in days:
+                day["tools"] = dict(
+                    conn.execute(
+                        "SELECT tool_name, calls FROM daily_tools WHERE day = ?"
+                        " ORDER BY calls DESC, tool_name",
+                        (day["day"],),
+                    ).fetchall()
+                )
+        finally:
+            conn.close()
+        return days
+
+    def start(self, interval: Optional[float] = None) -> threading.Thread:
+        """Compact every interval seconds in a daemon thread until stop()."""
+        interval = self.interval if interval is None else interval
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.compact()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="log-compactor", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop the background thread after any compaction in progress."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Compact old session logs and print per-day rollups."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--logs", default="logs", help="Session log directory")
+    parser.add_argument(
+        "--min-age-days", type=int, default=1, help="Leave sessions newer than this as files"
+    )
+    parser.add_argument(
+        "--retention-days", type=int, default=None, help="Delete archives older than this"
+    )
+    parser.add_argument("--show", metavar="SESSION_ID", help="Print one session and exit")
+    args = parser.parse_args(argv)
+
+    compactor = LogCompactor(args.logs, args.min_age_days, args.retention_days)
+    if args.show:
+        session = compactor.lookup(args.show)
+        print(json.dumps(session, indent=2) if session else f"No session {args.show}")
+        return
+
+    result = compactor.compact()
+    print(
+        f"Compacted {result['sessions']} sessions into {len(result['days'])} days;"
+        f" expired {len(result['expired_days'])} days"
+        f" and {result['expired_profiles']} profiles"
+    )
+    for day in compactor.rollups():
+        p50, p99 = day["latency_p50_ms"], day["latency_p99_ms"]
+        latency = f"p50 {p50:.0f} ms p99 {p99:.0f} ms" if p50 is not None else "no latency"
+        top_tools = ", ".join(f"{name} {calls}" for name, calls in list(day["tools"].items())[:3])
+        status = "" if day["archived"] else "  (expired)"
+        print(
+            f"{day['day']}  {day['sessions']:6d} sessions {day['errors']:4d} errors"
+            f"  {latency}  {top_tools}{status}"
+        )
+
+
+if __name__ == "__main__":
+    main()
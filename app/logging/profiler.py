@@ -0,0 +1,192 @@
+"""Opt-in per-turn cProfile and tracemalloc capture."""
+
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import random
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional
+
+PROFILE_MODES = ("cpu", "memory", "both")
+# Kept apart from the session_*.json files that log readers glob
+PROFILE_DIR = "profiles"
+
+# tracemalloc is process-wide, so only one turn is memory-profiled at a time
+_memory_lock = threading.Lock()
+# cProfile allows one active profiler per process on Python 3.12+, and
+# overlapping turns would attribute each other's calls, so one at a time
+_cpu_lock = threading.Lock()
+# CPU profiles only see the thread that ran the turn
+CPU_SCOPE_NOTE = (
+    "CPU profiles cover the turn's own thread only; work in worker threads "
+    "(write_section, run_subtask) is not included."
+)
+
+
+class TurnProfiler:
+    """Profile sampled turns and save artifacts named after their sessions.
+
+    A sampled turn writes <session id>.prof (cProfile, loadable with pstats)
+    and/or <session id>.mem.json (top allocation sites and peak traced
+    memory) into log_dir/profiles. sample_rate defaults to
+    AGENT_PROFILE_RATE (0, off) and mode to AGENT_PROFILE_MODE ("cpu").
+
+    The CPU profile covers only the thread that runs the turn: report
+    sections (write_section) and compound sub-tasks (run_subtask) run in
+    worker threads and are not in it. Memory profiles trace all threads.
+    Turns that overlap one already being profiled are not profiled.
+    """
+
+    def __init__(
+        self,
+        log_dir: str = "logs",
+        sample_rate: Optional[float] = None,
+        mode: Optional[str] = None,
+        top_allocations: int = 25,
+    ):
+        self.log_dir = Path(log_dir)
+        self.profile_dir = self.log_dir / PROFILE_DIR
+        self.sample_rate = (
+            float(os.getenv("AGENT_PROFILE_RATE", "0")) if sample_rate is None else sample_rate
+        )
+        self.mode = mode or os.getenv("AGENT_PROFILE_MODE", "cpu")
+        if self.mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {self.mode}")
+        self.top_allocations = top_allocations
+
+    def should_profile(self, force: Optional[bool] = None) -> bool:
+        """Decide whether to profile a turn; force overrides sampling."""
+        if force is not None:
+            return force
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @contextmanager
+    def profile(self, session_id: str, force: Optional[bool] = None):
+        """Profile the with-block if sampled; yields the list of artifact paths."""
+        artifacts: List[str] = []
+        if not self.should_profile(force):
+            yield artifacts
+            return
+
+        profiler = (
+            cProfile.Profile()
+            if self.mode in ("cpu", "both") and _cpu_lock.acquire(blocking=False)
+            else None
+        )
+        # Skip memory capture when another turn (or the host app) is tracing
+        trace_memory = (
+            self.mode in ("memory", "both")
+            and not tracemalloc.is_tracing()
+            and _memory_lock.acquire(blocking=False)
+        )
+        if trace_memory:
+            tracemalloc.start()
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:
+                # The host app is already profiling
+                _cpu_lock.release()
+                profiler = None
+        try:
+            yield artifacts
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _cpu_lock.release()
+            # Snapshot before dumping the CPU profile so its allocations
+            # are not attributed to the turn
+            if trace_memory:
+                try:
+                    snapshot = tracemalloc.take_snapshot()
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+                    _memory_lock.release()
+                path = self.profile_dir / f"{session_id}.mem.json"
+                self._save_memory(path, snapshot, peak)
+                artifacts.append(str(path))
+            if profiler is not None:
+                path = self.profile_dir / f"{session_id}.prof"
+                profiler.dump_stats(str(path))
+                artifacts.append(str(path))
+
+    def _save_memory(self, path: Path, snapshot, peak: int):
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+        ])
+        stats = snapshot.statistics("lineno")[: self.top_allocations]
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "peak_bytes": peak,
+                    "top": [
+                        {
+                            "location": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+                            "size_bytes": s.size,
+                            "count": s.count,
+                        }
+                        for s in stats
+                    ],
+                },
+                f,
+            )
+
+
+def aggregate_cpu(log_dir: str, sort: str = "cumulative", top: int = 20) -> Optional[pstats.Stats]:
+    """Merge all CPU profiles under log_dir and print the hottest functions."""
+    files = sorted(str(p) for p in (Path(log_dir) / PROFILE_DIR).glob("*.prof"))
+    if not files:
+        return None
+    print(CPU_SCOPE_NOTE)
+    stats = pstats.Stats(*files)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+    return stats
+
+
+def aggregate_memory(log_dir: str, top: int = 20) -> List[tuple]:
+    """Sum allocation sites across the memory profiles under log_dir, largest first."""
+    totals = {}
+    peaks = []
+    for path in sorted((Path(log_dir) / PROFILE_DIR).glob("*.mem.json")):
+        with open(path) as f:
+            data = json.load(f)
+        peaks.append(data["peak_bytes"])
+        for entry in data["top"]:
+            size, count, sessions = totals.get(entry["location"], (0, 0, 0))
+            totals[entry["location"]] = (
+                size + entry["size_bytes"], count + entry["count"], sessions + 1
+            )
+    ranked = sorted(totals.items(), key=lambda item: -item[1][0])[:top]
+    if peaks:
+        print(f"{len(peaks)} sessions, max peak {max(peaks) / 1024:.1f} KiB")
+        for location, (size, count, sessions) in ranked:
+            print(f"{size / 1024:10.1f} KiB {count:8d} blocks {sessions:5d} sessions  {location}")
+    return ranked
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Aggregate profiles of sampled sessions."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--logs", default="logs", help="Session log directory")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument(
+        "--sort", default="cumulative", help="pstats sort key, e.g. cumulative or tottime"
+    )
+    args = parser.parse_args(argv)
+
+    if aggregate_cpu(args.logs, args.sort, args.top) is None:
+        print(f"No CPU profiles in {args.logs}")
+    if not aggregate_memory(args.logs, args.top):
+        print(f"No memory profiles in {args.logs}")
+
+
+if __name__ == "__main__":
+    main()
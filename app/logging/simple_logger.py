@@ -1,24 +1,41 @@
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Union
 from uuid import uuid4
 
 from ..schemas.logging import SessionLog, ToolCall
+from ..schemas.records import FAST_PATH, SessionRecord, ToolCallRecord
+
+# Compact encoder for fast-path session files (no pretty-printing)
+_COMPACT_ENCODER = json.JSONEncoder(separators=(",", ":"), default=str)
 
 
 class SimpleLogger:
     """Simple logger for capturing tool calls and user sessions."""
 
-    def __init__(self, log_dir: str = "logs"):
+    def __init__(self, log_dir: str = "logs", fast_path: Optional[bool] = None):
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
-        self.current_session: Optional[SessionLog] = None
+        self.fast_path = FAST_PATH if fast_path is None else fast_path
+        self.current_session: Optional[Union[SessionLog, SessionRecord]] = None
+
+    def start_session(
+        self, user_query: str, prompt_versions: Optional[Dict[str, str]] = None
+    ) -> str:
+        """Start a new session and return session ID.
 
-    def start_session(self, user_query: str) -> str:
-        """Start a new session and return session ID."""
+        prompt_versions tags the session with the prompt templates it used.
+        """
         session_id = str(uuid4())[:8]
-        self.current_session = SessionLog(session_id=session_id, user_query=user_query)
+        if self.fast_path:
+            self.current_session = SessionRecord(session_id, user_query, prompt_versions)
+        else:
+            self.current_session = SessionLog(
+                session_id=session_id,
+                user_query=user_query,
+                prompt_versions=prompt_versions or {},
+            )
         return session_id
 
     def log_tool_call(self, tool_name: str, parameters: dict, result: str = None):
@@ -26,7 +43,12 @@ class SimpleLogger:
         if not self.current_session:
             return
 
-        tool_call = ToolCall(tool_name=tool_name, parameters=parameters, result=result)
+        if self.fast_path:
+            tool_call = ToolCallRecord(tool_name, parameters, result)
+        else:
+            tool_call = ToolCall(
+                tool_name=tool_name, parameters=parameters, result=result
+            )
         self.current_session.tool_calls.append(tool_call)
 
     def end_session(self, response: str = None):
@@ -39,7 +61,11 @@ class SimpleLogger:
 
         # Save session to file
         session_file = self.log_dir / f"session_{self.current_session.session_id}.json"
-        with open(session_file, "w") as f:
-            json.dump(self.current_session.model_dump(), f, indent=2, default=str)
+        if self.fast_path:
+            with open(session_file, "w") as f:
+                f.write(_COMPACT_ENCODER.encode(self.current_session.to_dict()))
+        else:
+            with open(session_file, "w") as f:
+                json.dump(self.current_session.model_dump(), f, indent=2, default=str)
 
         self.current_session = None
@@ -0,0 +1,5 @@
+"""Long-term conversation memory for the report-building agent."""
+
+from .store import MemoryStore
+
+__all__ = ["MemoryStore"]
@@ -0,0 +1,155 @@
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List
+
+_WORD = re.compile(r"\w+")
+
+# Function words that would otherwise dominate BM25 scores for short turns
+STOPWORDS = frozenset(
+    "a an and are as at be but by can did do does for from had has have how i if in "
+    "is it me my of on or our so that the their them they this to was we were what "
+    "when where which who why will with you your about tell remind please".split()
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    user_input TEXT NOT NULL,
+    response TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    messages_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_conversation ON turns (conversation_id, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(
+    user_input, response, content='turns', content_rowid='id'
+);
+"""
+
+
+def _match_query(text: str) -> str:
+    """Build an FTS5 OR query from the words of free text."""
+    words = dict.fromkeys(
+        w for w in (w.lower() for w in _WORD.findall(text)) if w not in STOPWORDS
+    )
+    return " OR ".join(f'"{w}"' for w in words)
+
+
+_shared_stores: Dict[str, "MemoryStore"] = {}
+_shared_lock = threading.Lock()
+
+
+class MemoryStore:
+    """Long-term conversation memory in SQLite with a BM25 (FTS5) index.
+
+    Turns live on disk instead of in per-conversation Python lists, so an
+    agent only keeps a bounded window in RAM and retrieves older turns by
+    relevance when it needs them.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    @classmethod
+    def shared(cls, path: str) -> "MemoryStore":
+        """Return one process-wide store per path.
+
+        Conversations are keyed by id, so agents can share a connection
+        instead of each opening (and migrating) the database.
+        """
+        with _shared_lock:
+            store = _shared_stores.get(path)
+            if store is None:
+                store = _shared_stores[path] = cls(path)
+            return store
+
+    def add(self, conversation_id: str, entry: Dict[str, Any]) -> int:
+        """Store a memory entry as written by update_memory; returns its id."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO turns (conversation_id, user_input, response, timestamp, messages_count)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (
+                    conversation_id,
+                    entry["user_input"],
+                    entry["response"],
+                    entry["timestamp"],
+                    entry["messages_count"],
+                ),
+            )
+            self._conn.execute(
+                "INSERT INTO turns_fts (rowid, user_input, response) VALUES (?, ?, ?)",
+                (cursor.lastrowid, entry["user_input"], entry["response"]),
+            )
+            return cursor.lastrowid
+
+    def search(
+        self, conversation_id: str, query: str, k: int = 3, skip_recent: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Return up to k turns most relevant to query, best first.
+
+        The skip_recent newest turns are excluded since callers already
+        have them in their recent context.
+        """
+        match = _match_query(query)
+        if not match or k <= 0:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT t.user_input, t.response, t.timestamp, t.messages_count"
+                " FROM turns_fts f JOIN turns t ON t.id = f.rowid"
+                " WHERE turns_fts MATCH ? AND t.conversation_id = ?"
+                " AND t.id NOT IN ("
+                "   SELECT id FROM turns WHERE conversation_id = ? ORDER BY id DESC LIMIT ?"
+                " )"
+                " ORDER BY bm25(turns_fts) LIMIT ?",
+                (match, conversation_id, conversation_id, skip_recent, k),
+            ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def recent(self, conversation_id: str, n: int) -> List[Dict[str, Any]]:
+        """Return the n newest turns, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_input, response, timestamp, messages_count FROM turns"
+                " WHERE conversation_id = ? ORDER BY id DESC LIMIT ?",
+                (conversation_id, n),
+            ).fetchall()
+        return [self._entry(row) for row in reversed(rows)]
+
+    def entries(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Return every stored turn of a conversation, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_input, response, timestamp, messages_count FROM turns"
+                " WHERE conversation_id = ? ORDER BY id",
+                (conversation_id,),
+            ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def count(self, conversation_id: str) -> int:
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM turns WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+        return count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _entry(row) -> Dict[str, Any]:
+        user_input, response, timestamp, messages_count = row
+        return {
+            "user_input": user_input,
+            "response": response,
+            "timestamp": timestamp,
+            "messages_count": messages_count,
+        }
@@ -0,0 +1,6 @@
+"""In-process metrics with text exposition output."""
+
+from .registry import REGISTRY, Counter, Histogram, MetricsRegistry
+from .instrument import timed_node
+
+__all__ = ["REGISTRY", "Counter", "Histogram", "MetricsRegistry", "timed_node"]
@@ -0,0 +1,25 @@
+from functools import wraps
+
+from .registry import REGISTRY
+
+NODE_LATENCY = REGISTRY.histogram(
+    "agent_node_latency_seconds", "Workflow node latency in seconds.", ["node"]
+)
+NODE_ERRORS = REGISTRY.counter(
+    "agent_node_errors_total", "Workflow node exceptions.", ["node"]
+)
+
+
+def timed_node(node):
+    """Record latency and exceptions of a workflow node function."""
+
+    @wraps(node)
+    def wrapper(state):
+        with NODE_LATENCY.time(node=node.__name__):
+            try:
+                return node(state)
+            except Exception:
+                NODE_ERRORS.inc(node=node.__name__)
+                raise
+
+    return wrapper
@@ -0,0 +1,235 @@
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _ShardHolder:
+    """Thread-local owner of a shard, dropped when its thread exits."""
+
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self):
+        self.shard = {}
+
+
+class _ThreadShards:
+    """Per-thread dicts so writers never share state or take a lock.
+
+    Each thread only mutates its own shard; readers merge copies of all
+    shards at scrape time. When a thread exits its shard is folded into a
+    base shard with merge(base, shard), so short-lived threads do not
+    leave one shard each behind.
+    """
+
+    def __init__(self, merge: Callable[[dict, dict], None]):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._merge = merge
+        self._base: dict = {}
+        self._shards: List[dict] = [self._base]
+
+    def shard(self) -> dict:
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            holder = self._local.holder = _ShardHolder()
+            with self._lock:
+                self._shards.append(holder.shard)
+            weakref.finalize(holder, self._retire, holder.shard)
+        return holder.shard
+
+    def _retire(self, shard: dict):
+        with self._lock:
+            self._merge(self._base, shard)
+            # By identity: equal dicts from other threads must stay
+            self._shards = [s for s in self._shards if s is not shard]
+
+    def snapshots(self) -> List[dict]:
+        # Copied under the lock so a shard being retired is counted once
+        with self._lock:
+            return [dict(shard) for shard in self._shards]
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._shards = _ThreadShards(self._merge)
+
+    @staticmethod
+    def _merge(base: dict, shard: dict):
+        for key, value in shard.items():
+            base[key] = base.get(key, 0.0) + value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        shard = self._shards.shard()
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        """Return the current value per label set."""
+        totals: Dict[Tuple[str, ...], float] = {}
+        for shard in self._shards.snapshots():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self.values().get(key, 0.0)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value:g}"
+            for key, value in sorted(self.values().items())
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._shards = _ThreadShards(self._merge)
+
+    @staticmethod
+    def _merge(base: dict, shard: dict):
+        # New lists, since readers may be copying the old ones
+        for key, state in shard.items():
+            merged = base.get(key)
+            base[key] = list(state) if merged is None else [a + b for a, b in zip(merged, state)]
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        shard = self._shards.shard()
+        state = shard.get(key)
+        if state is None:
+            # Bucket counts (last is +Inf), then sum
+            state = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def values(self) -> Dict[Tuple[str, ...], List[float]]:
+        """Return per-bucket counts plus sum per label set."""
+        totals: Dict[Tuple[str, ...], List[float]] = {}
+        for shard in self._shards.snapshots():
+            for key, state in shard.items():
+                state = list(state)
+                merged = totals.setdefault(key, [0] * len(state))
+                for i, value in enumerate(state):
+                    merged[i] += value
+        return totals
+
+    def count(self, **labels) -> int:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        state = self.values().get(key)
+        return int(sum(state[:-1])) if state else 0
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, state in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative:g}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {state[-1]:g}")
+            lines.append(f"{self.name}_count{labels} {cumulative:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process registry rendering metrics in text exposition format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def _get_or_create(self, cls, name, help, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[str]]):
+        """Add a callable returning ready-made exposition lines (e.g. gauges)."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in sorted(metrics, key=lambda m: m.name):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collector in collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
@@ -1,23 +1,48 @@
-from langchain_core.prompts import ChatPromptTemplate
-from .templates import (
-    PromptTemplate,
-    intent_classification_prompt,
-    get_chat_prompt_template,
-    QA_SYSTEM_PROMPT,
-    SUMMARIZATION_SYSTEM_PROMPT,
-    CALCULATION_SYSTEM_PROMPT,
-    DEFAULT_SYSTEM_PROMPT,
-)
-from .llm_gpt import OpenAIChatLLM
+"""Prompt templates and LLM clients.
 
-__all__ = [
-    "PromptTemplate",
-    "ChatPromptTemplate",
-    "intent_classification_prompt",
-    "get_chat_prompt_template",
-    "QA_SYSTEM_PROMPT",
-    "SUMMARIZATION_SYSTEM_PROMPT",
-    "CALCULATION_SYSTEM_PROMPT",
-    "DEFAULT_SYSTEM_PROMPT",
-    "OpenAIChatLLM",
-]
+Names are imported on first use, so importing the package does not load
+langchain_core or the openai SDK.
+"""
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "PromptTemplate": ".templates",
+    "ChatPromptTemplate": "langchain_core.prompts",
+    "intent_classification_prompt": ".templates",
+    "get_chat_prompt_template": ".templates",
+    "QA_SYSTEM_PROMPT": ".templates",
+    "SUMMARIZATION_SYSTEM_PROMPT": ".templates",
+    "CALCULATION_SYSTEM_PROMPT": ".templates",
+    "DEFAULT_SYSTEM_PROMPT": ".templates",
+    "PromptRegistry": ".registry",
+    "PromptSet": ".registry",
+    "default_prompt_registry": ".registry",
+    "OpenAIChatLLM": ".llm_gpt",
+    "SingleFlight": ".single_flight",
+    "FakeChatLLM": ".fake_llm",
+    "CassetteLLM": ".cassette",
+    "CassetteMiss": ".cassette",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import ChatPromptTemplate
+    from .templates import (
+        PromptTemplate,
+        intent_classification_prompt,
+        get_chat_prompt_template,
+        QA_SYSTEM_PROMPT,
+        SUMMARIZATION_SYSTEM_PROMPT,
+        CALCULATION_SYSTEM_PROMPT,
+        DEFAULT_SYSTEM_PROMPT,
+    )
+    from .registry import PromptRegistry, PromptSet, default_prompt_registry
+    from .llm_gpt import OpenAIChatLLM
+    from .single_flight import SingleFlight
+    from .fake_llm import FakeChatLLM
+    from .cassette import CassetteLLM, CassetteMiss
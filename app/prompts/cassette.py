@@ -0,0 +1,152 @@
+"""Record and replay LLM responses for offline, reproducible load runs."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+from .llm_gpt import generate_messages, request_key
+
+GENERATE_TEMPERATURE = 0.2
+CHAT_TEMPERATURE = 0.4
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+class CassetteLLM:
+    """Record/replay wrapper with the OpenAIChatLLM interface.
+
+    In "record" mode every call goes to the wrapped llm and one compact JSON
+    line {"k": request key, "r": response, "l": latency seconds} is appended
+    to path. In "replay" mode responses are served from path without network
+    access, sleeping for the recorded latency times latency_scale (0 to
+    disable). Requests recorded more than once replay their recordings in
+    turn, so repeated prompts keep their original latency distribution.
+
+    Request keys include the model name and the output budget's max_tokens,
+    so replay with the model and budgets that were recorded (OPENAI_MODEL and
+    the default output budgets by default). Recorded responses already had
+    their stop conditions applied.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        llm=None,
+        latency_scale: float = 1.0,
+        model: str | None = None,
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode == "record" and llm is None:
+            raise ValueError("Record mode needs an llm to record from")
+        self.path = path
+        self.mode = mode
+        self.llm = llm
+        self.latency_scale = latency_scale
+        self.model = model or getattr(llm, "model", None) or os.getenv(
+            "OPENAI_MODEL", "gpt-4o-mini"
+        )
+        self._lock = threading.Lock()
+        self._tapes: Dict[str, itertools.cycle] = {}
+        self.hits = 0
+        self.misses = 0
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        recordings: Dict[str, List[tuple]] = {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                recordings.setdefault(record["k"], []).append((record["r"], record["l"]))
+        self._tapes = {key: itertools.cycle(tape) for key, tape in recordings.items()}
+
+    def _append(self, key: str, response: str, latency: float):
+        line = json.dumps(
+            {"k": key, "r": response, "l": round(latency, 4)}, separators=(",", ":")
+        )
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _next(self, key: str):
+        with self._lock:
+            tape = self._tapes.get(key)
+            if tape is None:
+                self.misses += 1
+                raise CassetteMiss(f"No recorded response for request {key[:12]}")
+            self.hits += 1
+            return next(tape)
+
+    def _record(self, key: str, call) -> str:
+        started = time.perf_counter()
+        response = call()
+        self._append(key, response, time.perf_counter() - started)
+        return response
+
+    def _replay(self, key: str) -> str:
+        response, latency = self._next(key)
+        if self.latency_scale > 0:
+            time.sleep(latency * self.latency_scale)
+        return response
+
+    async def _areplay(self, key: str) -> str:
+        response, latency = self._next(key)
+        if self.latency_scale > 0:
+            await asyncio.sleep(latency * self.latency_scale)
+        return response
+
+    def _forward(self, method: str, request, model: str | None, budget):
+        # Only pass options through when set, so any wrapped llm works
+        kwargs = {"model": model} if model else {}
+        if budget is not None:
+            kwargs["budget"] = budget
+        return lambda: getattr(self.llm, method)(request, **kwargs)
+
+    def _generate_key(self, prompt_text: str, model: str | None, budget) -> str:
+        return request_key(
+            model or self.model,
+            generate_messages(prompt_text),
+            GENERATE_TEMPERATURE,
+            getattr(budget, "max_tokens", None),
+        )
+
+    def _chat_key(self, messages: List[Dict[str, Any]], model: str | None, budget) -> str:
+        return request_key(
+            model or self.model, messages, CHAT_TEMPERATURE, getattr(budget, "max_tokens", None)
+        )
+
+    def generate(self, prompt_text: str, model: str | None = None, budget=None) -> str:
+        key = self._generate_key(prompt_text, model, budget)
+        if self.mode == "record":
+            return self._record(key, self._forward("generate", prompt_text, model, budget))
+        return self._replay(key)
+
+    def chat(self, messages: List[Dict[str, Any]], model: str | None = None, budget=None) -> str:
+        key = self._chat_key(messages, model, budget)
+        if self.mode == "record":
+            return self._record(key, self._forward("chat", messages, model, budget))
+        return self._replay(key)
+
+    async def agenerate(self, prompt_text: str, model: str | None = None, budget=None) -> str:
+        if self.mode == "record":
+            return await asyncio.to_thread(self.generate, prompt_text, model, budget)
+        return await self._areplay(self._generate_key(prompt_text, model, budget))
+
+    async def achat(
+        self, messages: List[Dict[str, Any]], model: str | None = None, budget=None
+    ) -> str:
+        if self.mode == "record":
+            return await asyncio.to_thread(self.chat, messages, model, budget)
+        return await self._areplay(self._chat_key(messages, model, budget))
@@ -0,0 +1,108 @@
+"""Offline stand-in for OpenAIChatLLM used in local tests and load runs."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Union
+
+from ..services.context_builder import estimate_tokens, truncate_head
+
+_USER_INPUT = re.compile(r"USER INPUT:\s*(.*)")
+
+_REPORT_PLAN = re.compile(r"^Plan (\d+) section titles")
+
+_INTENT_KEYWORDS = [
+    ("REPORT", ("report",)),
+    ("SUMMARIZATION", ("summarize", "summary", "overview", "key points", "condense", "recap")),
+    ("CALCULATION", ("calculate", "compute", "solve", "add", "subtract", "multiply",
+                     "divide", "plus", "minus", "times", "%", "+", "*", "/")),
+]
+
+
+class FakeChatLLM:
+    """Deterministic LLM with the OpenAIChatLLM interface and no network.
+
+    Classification prompts get a keyword-based answer in the format the
+    IntentClassifier parses, report planning prompts get a numbered outline,
+    and other prompts get an echo answer. latency adds a delay per call to
+    mimic upstream response time: a fixed number of seconds, or a callable
+    returning one per call to draw from a distribution. An OutputBudget is
+    applied as the real client would: stop conditions are checked line by
+    line as if streaming, then the answer is cut at max_tokens.
+    """
+
+    def __init__(
+        self, latency: Union[float, Callable[[], float]] = 0.0, model: str = "fake-model"
+    ):
+        self.model = model
+        self.latency = latency
+        self.calls = 0
+        self.model_calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _classify(self, user_input: str) -> str:
+        text = user_input.lower()
+        intent = "QA"
+        for name, keywords in _INTENT_KEYWORDS:
+            if any(k in text for k in keywords) or (
+                name == "CALCULATION" and re.fullmatch(r"[\d\s+\-*/().]+", text.strip())
+            ):
+                intent = name
+                break
+        return (
+            f"Intent: {intent}\n"
+            "Confidence: 0.9\n"
+            "Reasoning: Keyword match by fake LLM\n"
+            "Keywords_Found: []"
+        )
+
+    def _respond(self, prompt_text: str, model: str | None = None) -> str:
+        with self._lock:
+            self.calls += 1
+            model = model or self.model
+            self.model_calls[model] = self.model_calls.get(model, 0) + 1
+        delay = self.latency() if callable(self.latency) else self.latency
+        if delay > 0:
+            time.sleep(delay)
+
+        match = _USER_INPUT.search(prompt_text)
+        if match:
+            return self._classify(match.group(1))
+        match = _REPORT_PLAN.match(prompt_text)
+        if match:
+            return "\n".join(f"{i}. Section {i}" for i in range(1, int(match.group(1)) + 1))
+        return f"Fake answer: {prompt_text.splitlines()[0][:200]}"
+
+    def _apply_budget(self, text: str, budget) -> str:
+        if budget is None:
+            return text
+        streamed = ""
+        for line in text.splitlines(keepends=True):
+            streamed += line
+            if line.endswith("\n"):
+                kept = budget.should_stop(streamed)
+                if kept is not None:
+                    budget.limited("stop_condition")
+                    return kept
+        if estimate_tokens(text) > budget.max_tokens:
+            budget.limited("max_tokens")
+            return truncate_head(text, budget.max_tokens)
+        return text
+
+    def generate(self, prompt_text: str, model: str | None = None, budget=None) -> str:
+        return self._apply_budget(self._respond(prompt_text, model), budget)
+
+    def chat(self, messages: List[Dict[str, Any]], model: str | None = None, budget=None) -> str:
+        prompt_text = messages[-1]["content"] if messages else ""
+        return self._apply_budget(self._respond(prompt_text, model), budget)
+
+    async def agenerate(self, prompt_text: str, model: str | None = None, budget=None) -> str:
+        return await asyncio.to_thread(self.generate, prompt_text, model, budget)
+
+    async def achat(
+        self, messages: List[Dict[str, Any]], model: str | None = None, budget=None
+    ) -> str:
+        return await asyncio.to_thread(self.chat, messages, model, budget)
@@ -1,39 +1,239 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import os
+import time
+from functools import lru_cache
 from typing import List, Dict, Any
 
-from openai import OpenAI
+from .single_flight import SingleFlight
+from ..metrics import REGISTRY
+
+LLM_LATENCY = REGISTRY.histogram(
+    "agent_llm_request_seconds", "Upstream LLM request latency in seconds.", ["model"]
+)
+LLM_TOKENS = REGISTRY.counter(
+    "agent_llm_tokens_total", "LLM tokens used by kind.", ["model", "kind"]
+)
+LLM_RETRIES = REGISTRY.counter(
+    "agent_llm_retries_total", "Retried LLM requests.", ["model", "error"]
+)
+LLM_ERRORS = REGISTRY.counter(
+    "agent_llm_errors_total", "LLM requests that failed after retries.", ["model", "error"]
+)
+
+
+@lru_cache(maxsize=None)
+def retryable_errors() -> tuple:
+    """Errors worth retrying: network failures, timeouts, rate limits and 5xx.
+
+    The openai SDK takes about half a second to import, so it is loaded on
+    the first request rather than with this module.
+    """
+    import openai
+
+    return (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+
+# Shared across instances so identical requests from different agents coalesce
+default_single_flight = SingleFlight()
+
+
+def _single_flight_metrics():
+    stats = default_single_flight.stats()
+    return [
+        "# HELP agent_llm_coalesced_total LLM requests served by an identical in-flight request.",
+        "# TYPE agent_llm_coalesced_total counter",
+        f"agent_llm_coalesced_total {stats['coalesced']}",
+        "# HELP agent_llm_in_flight Distinct LLM requests in flight.",
+        "# TYPE agent_llm_in_flight gauge",
+        f"agent_llm_in_flight {stats['in_flight']}",
+    ]
+
+
+REGISTRY.register_collector(_single_flight_metrics)
+
+CLASSIFIER_SYSTEM_MESSAGE = (
+    "You are an intent classification model. Return plain text with required fields."
+)
+
+
+def request_key(
+    model: str, messages: List[Dict[str, Any]], temperature: float, max_tokens: int | None = None
+) -> str:
+    """Hash a chat completion request so identical requests share a key."""
+    request = {"model": model, "messages": messages, "temperature": temperature}
+    if max_tokens is not None:
+        request["max_tokens"] = max_tokens
+    payload = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def generate_messages(prompt_text: str) -> List[Dict[str, Any]]:
+    """Chat messages sent for a single-prompt generate() call."""
+    return [
+        {"role": "system", "content": CLASSIFIER_SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt_text},
+    ]
 
 
 class OpenAIChatLLM:
     """OpenAI Chat wrapper."""
 
-    def __init__(self, model: str | None = None):
+    def __init__(
+        self,
+        model: str | None = None,
+        single_flight: SingleFlight | None = None,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+    ):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY env var not set.")
-        self.client = OpenAI(api_key=api_key)
+        self._api_key = api_key
+        self._client = None
         self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        self.single_flight = single_flight or default_single_flight
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    @property
+    def client(self):
+        """OpenAI client, created on the first request."""
+        if self._client is None:
+            from openai import OpenAI
+
+            # Retries are done here rather than in the SDK so they can be counted
+            self._client = OpenAI(api_key=self._api_key, max_retries=0)
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def _generate_messages(self, prompt_text: str) -> List[Dict[str, Any]]:
+        return generate_messages(prompt_text)
+
+    def _create(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: float,
+        model: str | None = None,
+        budget=None,
+    ) -> str:
+        model = model or self.model
+        options: Dict[str, Any] = {}
+        if budget is not None:
+            options["max_tokens"] = budget.max_tokens
+        # Streaming lets a stop condition end generation early
+        stream = budget is not None and budget.stop_when is not None
+        if stream:
+            options.update(stream=True, stream_options={"include_usage": True})
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                completion = self.client.chat.completions.create(
+                    model=model,
+                    temperature=temperature,
+                    messages=messages,
+                    **options,
+                )
+                if stream:
+                    return self._read_stream(completion, model, budget)
+                break
+            except retryable_errors() as e:
+                if attempt >= self.max_retries:
+                    LLM_ERRORS.inc(model=model, error=type(e).__name__)
+                    raise
+                LLM_RETRIES.inc(model=model, error=type(e).__name__)
+                time.sleep(self.retry_backoff * (2**attempt))
+                attempt += 1
+            except Exception as e:
+                LLM_ERRORS.inc(model=model, error=type(e).__name__)
+                raise
+            finally:
+                LLM_LATENCY.observe(time.perf_counter() - started, model=model)
 
-    def generate(self, prompt_text: str) -> str:
-        completion = self.client.chat.completions.create(
-            model=self.model,
-            temperature=0.2,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an intent classification model. Return plain text with required fields.",
-                },
-                {"role": "user", "content": prompt_text},
-            ],
+        self._record_usage(getattr(completion, "usage", None), model)
+        choice = completion.choices[0]
+        if budget is not None and choice.finish_reason == "length":
+            budget.limited("max_tokens")
+        return choice.message.content or ""
+
+    def _read_stream(self, stream, model: str, budget) -> str:
+        """Collect a streamed completion, closing it once budget says to stop."""
+        parts: List[str] = []
+        try:
+            for chunk in stream:
+                self._record_usage(getattr(chunk, "usage", None), model)
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                delta = choice.delta.content or ""
+                if delta:
+                    parts.append(delta)
+                    # Stop conditions look at whole lines, so only check on a newline
+                    if "\n" in delta:
+                        kept = budget.should_stop("".join(parts))
+                        if kept is not None:
+                            budget.limited("stop_condition")
+                            return kept
+                if choice.finish_reason == "length":
+                    budget.limited("max_tokens")
+        finally:
+            stream.close()
+        text = "".join(parts)
+        # The final line has no newline after it, so check it once more
+        kept = budget.should_stop(text + "\n")
+        return kept if kept is not None else text
+
+    @staticmethod
+    def _record_usage(usage, model: str):
+        if usage is not None:
+            LLM_TOKENS.inc(usage.prompt_tokens or 0, model=model, kind="prompt")
+            LLM_TOKENS.inc(usage.completion_tokens or 0, model=model, kind="completion")
+
+    def _complete(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: float,
+        model: str | None = None,
+        budget=None,
+    ) -> str:
+        model = model or self.model
+        key = request_key(model, messages, temperature, getattr(budget, "max_tokens", None))
+        return self.single_flight.do(
+            key, lambda: self._create(messages, temperature, model, budget)
         )
-        return completion.choices[0].message.content or ""
 
-    def chat(self, messages: List[Dict[str, Any]]) -> str:
-        completion = self.client.chat.completions.create(
-            model=self.model,
-            temperature=0.4,
-            messages=messages,
+    async def _acomplete(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: float,
+        model: str | None = None,
+        budget=None,
+    ) -> str:
+        model = model or self.model
+        key = request_key(model, messages, temperature, getattr(budget, "max_tokens", None))
+        return await self.single_flight.do_async(
+            key, lambda: asyncio.to_thread(self._create, messages, temperature, model, budget)
         )
-        return completion.choices[0].message.content or ""
+
+    # model overrides the instance's model for one call (see ModelRouter);
+    # budget is the role's OutputBudget (see app.services.output_budget)
+    def generate(self, prompt_text: str, model: str | None = None, budget=None) -> str:
+        return self._complete(self._generate_messages(prompt_text), 0.2, model, budget)
+
+    def chat(self, messages: List[Dict[str, Any]], model: str | None = None, budget=None) -> str:
+        return self._complete(messages, 0.4, model, budget)
+
+    async def agenerate(self, prompt_text: str, model: str | None = None, budget=None) -> str:
+        return await self._acomplete(self._generate_messages(prompt_text), 0.2, model, budget)
+
+    async def achat(
+        self, messages: List[Dict[str, Any]], model: str | None = None, budget=None
+    ) -> str:
+        return await self._acomplete(messages, 0.4, model, budget)
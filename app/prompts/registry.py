@@ -0,0 +1,246 @@
+"""Versioned prompt templates loaded from files, with hot reload.
+
+Each template is a file named <name>.v<N>.txt in the packaged library
+(app/prompts/library) or in an override directory (AGENT_PROMPT_DIR).
+The highest version of each name is served unless a version is pinned
+(AGENT_PROMPT_PINS="qa=1,report_plan=2"). Templates use str.format field
+syntax and are parsed once into literal text and fields, so formatting a
+prompt is a join instead of a re-parse of the whole template.
+
+A PromptRegistry serves immutable PromptSet snapshots and reloads them
+when a template file changes. A turn holds one snapshot from start to
+end, and its versions are tagged on the session log.
+"""
+
+import hashlib
+import os
+import re
+import string
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from ..metrics import REGISTRY
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import ChatPromptTemplate
+
+LIBRARY_DIR = Path(__file__).parent / "library"
+
+_FILE = re.compile(r"^(?P<name>[a-z0-9_]+)\.v(?P<version>\d+)\.txt$")
+_FIELD = re.compile(r"^[A-Za-z_]\w*$")
+
+RELOADS_TOTAL = REGISTRY.counter(
+    "agent_prompt_reloads_total", "Prompt library reloads by outcome.", ["status"]
+)
+
+# (literal, field, conversion, format_spec); field is None after the last literal
+Part = Tuple[str, Optional[str], Optional[str], str]
+
+
+def compile_template(template: str) -> List[Part]:
+    """Parse a str.format template once; only named fields are allowed."""
+    parts = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if field is not None and not _FIELD.match(field):
+            raise ValueError(f"Unsupported template field {{{field}}}; use a plain name")
+        parts.append((literal, field, conversion, spec or ""))
+    return parts
+
+
+def render(parts: List[Part], values: Dict[str, object]) -> str:
+    """Format compiled parts; equivalent to template.format(**values)."""
+    out = []
+    for literal, field, conversion, spec in parts:
+        out.append(literal)
+        if field is None:
+            continue
+        value = values[field]
+        if conversion:
+            value = {"r": repr, "s": str, "a": ascii}[conversion](value)
+        out.append(value if not spec and type(value) is str else format(value, spec))
+    return "".join(out)
+
+
+class CompiledPrompt:
+    """One template version, parsed once."""
+
+    __slots__ = ("name", "version", "tag", "template", "input_variables", "_parts")
+
+    def __init__(self, name: str, version: int, template: str):
+        self.name = name
+        self.version = version
+        self.template = template
+        self._parts = compile_template(template)
+        self.input_variables = list(dict.fromkeys(p[1] for p in self._parts if p[1]))
+        # The digest changes if a version is edited in place instead of bumped
+        digest = hashlib.sha256(template.encode("utf-8")).hexdigest()[:8]
+        self.tag = f"v{version}.{digest}"
+
+    def format(self, **kwargs) -> str:
+        return render(self._parts, kwargs)
+
+
+class PromptSet:
+    """An immutable snapshot of the prompt library."""
+
+    def __init__(self, prompts: Dict[str, CompiledPrompt]):
+        self.prompts = prompts
+        self.versions = {name: prompt.tag for name, prompt in sorted(prompts.items())}
+        self._chat: Dict[str, "ChatPromptTemplate"] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CompiledPrompt:
+        try:
+            return self.prompts[name]
+        except KeyError:
+            raise KeyError(f"No prompt template named {name!r}") from None
+
+    def format(self, name: str, **kwargs) -> str:
+        """Format the named template."""
+        return self.get(name).format(**kwargs)
+
+    def chat_prompt(self, intent_type: str) -> "ChatPromptTemplate":
+        """ChatPromptTemplate for an intent, built once per snapshot."""
+        chat = self._chat.get(intent_type)
+        if chat is not None:
+            return chat
+        from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+        name = f"system_{intent_type}"
+        system = self.get(name if name in self.prompts else "system_default").template
+        chat = ChatPromptTemplate.from_messages(
+            [
+                ("system", system),
+                MessagesPlaceholder(variable_name="conversation_history", optional=True),
+                ("human", "{user_input}"),
+            ]
+        )
+        with self._lock:
+            return self._chat.setdefault(intent_type, chat)
+
+
+def _scan(directories: List[Path]) -> Dict[Tuple[str, int], Path]:
+    """Template files by (name, version); later directories override earlier ones."""
+    found = {}
+    for directory in directories:
+        try:
+            paths = list(directory.iterdir())
+        except OSError:
+            # Missing, or removed while a deploy swaps it out
+            continue
+        for path in paths:
+            match = _FILE.match(path.name)
+            if match:
+                found[(match["name"], int(match["version"]))] = path
+    return found
+
+
+def _read_template(path: Path) -> str:
+    text = path.read_text(encoding="utf-8")
+    # Files end with a newline that is not part of the template
+    return text[:-1] if text.endswith("\n") else text
+
+
+class PromptRegistry:
+    """Serve prompt snapshots from the library, reloading changed files.
+
+    snapshot() checks file modification times at most every
+    check_interval seconds (None disables reloading) and swaps in a new
+    PromptSet when a template was added, removed or edited. A template
+    that fails to load keeps the previous snapshot in service.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        pins: Optional[Dict[str, int]] = None,
+        check_interval: Optional[float] = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.directories = [LIBRARY_DIR] + ([Path(directory)] if directory else [])
+        self.pins = dict(pins or {})
+        self.check_interval = check_interval
+        self.clock = clock
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._signature = self._stat()
+        self._snapshot = self._load()
+        self._checked = clock()
+
+    @classmethod
+    def from_env(cls) -> "PromptRegistry":
+        """Registry over AGENT_PROMPT_DIR and AGENT_PROMPT_PINS, if set."""
+        pins = {}
+        for pin in filter(None, os.getenv("AGENT_PROMPT_PINS", "").split(",")):
+            name, _, version = pin.partition("=")
+            pins[name.strip()] = int(version)
+        return cls(os.getenv("AGENT_PROMPT_DIR"), pins=pins)
+
+    def _stat(self) -> Tuple:
+        files = _scan(self.directories)
+        return tuple(
+            sorted((str(path), path.stat().st_mtime_ns, path.stat().st_size) for path in files.values())
+        )
+
+    def _load(self) -> PromptSet:
+        files = _scan(self.directories)
+        versions: Dict[str, List[int]] = {}
+        for name, version in files:
+            versions.setdefault(name, []).append(version)
+        for name, version in self.pins.items():
+            if (name, version) not in files:
+                raise ValueError(f"Pinned prompt {name} v{version} not found")
+        prompts = {}
+        for name, available in versions.items():
+            version = self.pins.get(name, max(available))
+            prompts[name] = CompiledPrompt(name, version, _read_template(files[(name, version)]))
+        return PromptSet(prompts)
+
+    def reload(self) -> bool:
+        """Reload if any template file changed; returns whether it did."""
+        with self._lock:
+            try:
+                # Files can be renamed or deleted between listing and stat
+                signature = self._stat()
+                if signature == self._signature:
+                    return False
+                snapshot = self._load()
+            except (OSError, ValueError) as e:
+                RELOADS_TOTAL.inc(status="error")
+                self.last_error = str(e)
+                return False
+            self._signature = signature
+            self._snapshot = snapshot
+            self.last_error = None
+        RELOADS_TOTAL.inc(status="ok")
+        return True
+
+    def snapshot(self) -> PromptSet:
+        """The current prompts; hold one snapshot for a whole turn."""
+        if self.check_interval is not None:
+            now = self.clock()
+            if now - self._checked >= self.check_interval:
+                self._checked = now
+                self.reload()
+        return self._snapshot
+
+
+_default_registry: Optional[PromptRegistry] = None
+_default_lock = threading.Lock()
+
+
+def default_prompt_registry() -> PromptRegistry:
+    """The process-wide registry, configured from the environment."""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = PromptRegistry.from_env()
+        return _default_registry
+
+
+def prompts_for(state) -> PromptSet:
+    """The turn's prompt snapshot, or the default registry's current one."""
+    prompts = state.get("prompts") if state is not None else None
+    return prompts if prompts is not None else default_prompt_registry().snapshot()
@@ -0,0 +1,102 @@
+"""Coalesce concurrent identical calls into a single upstream call."""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    """An in-flight call shared by its leader and waiters."""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Single-flight group for threaded and asyncio callers.
+
+    The first caller for a key runs the function; callers arriving with the
+    same key while it is in flight wait for and share its result or error.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+        self._executions = 0
+        self._coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn once per key across concurrent threads."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._executions += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn once per key across concurrent tasks on the same loop."""
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+
+        with self._lock:
+            future = self._async_calls.get(loop_key)
+            if future is not None:
+                self._coalesced += 1
+                leader = False
+            else:
+                future = self._async_calls[loop_key] = loop.create_future()
+                self._executions += 1
+                leader = True
+
+        if not leader:
+            # Shield so a cancelled waiter does not cancel the shared call
+            return await asyncio.shield(future)
+
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an error nobody else awaited is not reported
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._async_calls[loop_key]
+
+    def stats(self) -> Dict[str, int]:
+        """Return coalescing metrics."""
+        with self._lock:
+            return {
+                "executions": self._executions,
+                "coalesced": self._coalesced,
+                "calls": self._executions + self._coalesced,
+                "in_flight": len(self._calls) + len(self._async_calls),
+            }
@@ -1,4 +1,8 @@
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+"""Prompt templates, loaded from the packaged library (see registry)."""
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from .registry import PromptRegistry, compile_template, default_prompt_registry, render
 
 
 class PromptTemplate:
@@ -7,73 +11,33 @@ class PromptTemplate:
     def __init__(self, input_variables: list, template: str):
         self.input_variables = input_variables
         self.template = template
+        self._parts = compile_template(template)
 
     def format(self, **kwargs) -> str:
         """Format the template with provided variables."""
-        return self.template.format(**kwargs)
+        return render(self._parts, kwargs)
+
 
+# Packaged versions, for code that uses the module constants directly
+_LIBRARY = PromptRegistry(check_interval=None).snapshot()
 
 # Intent Classification Prompt
 intent_classification_prompt = PromptTemplate(
     input_variables=["user_input", "conversation_history"],
-    template="""You are an expert intent classifier. Analyze the user input and classify it into one of three categories.
-
-INTENT CATEGORIES:
-
-1. CALCULATION - Mathematical operations and computations
-   Examples: "calculate 2+3", "solve 5*7-3""
-   Keywords: calculate, compute, solve, math, add, subtract, multiply, divide
-
-2. SUMMARIZATION - Requests to summarize or condense information  
-   Examples: "summarize this text", "give me a brief overview", "what are the key points", "condense this information"
-   Keywords: summarize, summary, brief, overview, key points, condense, main ideas, highlights
-
-3. QA - Questions seeking information, explanations, or general assistance
-   Examples: "what is the capital of France", "how does photosynthesis work", "explain machine learning", "help me understand"
-   Keywords: what, how, why, where, when, who, explain, define, tell me, help, understand
-
-USER INPUT: {user_input}
-CONVERSATION: {conversation_history}
-
-Format:
-Intent: [CALCULATION|SUMMARIZATION|QA]
-Confidence: [0.0-1.0] 
-Reasoning: [Brief explanation]
-Keywords_Found: [Key terms found]
-""",
+    template=_LIBRARY.get("intent_classification").template,
 )
 
 
 # System Prompts
-QA_SYSTEM_PROMPT = (
-    "You are a helpful question-answering assistant. Answer questions clearly."
-)
+QA_SYSTEM_PROMPT = _LIBRARY.get("system_qa").template
 
-SUMMARIZATION_SYSTEM_PROMPT = (
-    "You are a summarization assistant. Create concise summaries."
-)
+SUMMARIZATION_SYSTEM_PROMPT = _LIBRARY.get("system_summarization").template
 
-CALCULATION_SYSTEM_PROMPT = (
-    "You are a mathematical calculation assistant. Solve problems step-by-step."
-)
+CALCULATION_SYSTEM_PROMPT = _LIBRARY.get("system_calculation").template
 
-DEFAULT_SYSTEM_PROMPT = "You are a helpful AI assistant."
+DEFAULT_SYSTEM_PROMPT = _LIBRARY.get("system_default").template
 
 
 def get_chat_prompt_template(intent_type: str) -> ChatPromptTemplate:
-    """Get ChatPromptTemplate based on intent type."""
-    prompts = {
-        "qa": QA_SYSTEM_PROMPT,
-        "summarization": SUMMARIZATION_SYSTEM_PROMPT,
-        "calculation": CALCULATION_SYSTEM_PROMPT,
-    }
-
-    system_prompt = prompts.get(intent_type, DEFAULT_SYSTEM_PROMPT)
-
-    return ChatPromptTemplate.from_messages(
-        [
-            ("system", system_prompt),
-            MessagesPlaceholder(variable_name="conversation_history", optional=True),
-            ("human", "{user_input}"),
-        ]
-    )
+    """Get ChatPromptTemplate based on intent type (cached until prompts reload)."""
+    return default_prompt_registry().snapshot().chat_prompt(intent_type)
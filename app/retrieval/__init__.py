@@ -0,0 +1,23 @@
+"""Local document retrieval for grounding QA answers.
+
+Names are imported on first use, so streaming ingestion does not load numpy.
+"""
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "chunk_text": ".chunking",
+    "DocumentIndex": ".index",
+    "SearchHit": ".index",
+    "DocumentStream": ".stream",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .chunking import chunk_text
+    from .index import DocumentIndex, SearchHit
+    from .stream import DocumentStream
@@ -0,0 +1,30 @@
+import re
+from typing import List
+
+_WORD_SPAN = re.compile(r"\S+")
+
+
+def chunk_text(text: str, max_words: int = 200, overlap: int = 40) -> List[str]:
+    """Split text into windows of max_words words overlapping by overlap words.
+
+    Windows prefer to end at a paragraph break in their last quarter so
+    chunks follow the document's structure where possible.
+    """
+    if overlap >= max_words:
+        raise ValueError("overlap must be smaller than max_words")
+    spans = [m.span() for m in _WORD_SPAN.finditer(text)]
+    chunks = []
+    start = 0
+    while start < len(spans):
+        end = min(start + max_words, len(spans))
+        if end < len(spans):
+            # Look for a blank line between words in the window's last quarter
+            for i in range(end - 1, start + max_words * 3 // 4, -1):
+                if "\n\n" in text[spans[i - 1][1]:spans[i][0]]:
+                    end = i
+                    break
+        chunks.append(text[spans[start][0]:spans[end - 1][1]])
+        if end == len(spans):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
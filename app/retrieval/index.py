@@ -0,0 +1,415 @@
+"""BM25 document index stored as memory-mapped NumPy segments."""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import zlib
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..memory.store import STOPWORDS
+from .chunking import chunk_text
+
+_TERM_PATTERN = re.compile(r"[a-z0-9]+")
+
+MANIFEST_FILE = "manifest.json"
+DOCUMENT_SUFFIXES = (".txt", ".md")
+
+# Embedder for optional dense retrieval: texts -> (n, dim) float array
+Embedder = Callable[[Sequence[str]], np.ndarray]
+
+
+def _terms(text: str) -> List[str]:
+    return [t for t in _TERM_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _bucket(term: str, n_buckets: int) -> int:
+    return zlib.crc32(term.encode("utf-8")) % n_buckets
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+@dataclass
+class SearchHit:
+    """A retrieved chunk and where it came from."""
+
+    text: str
+    source: str
+    score: float
+
+
+class _Segment:
+    """One immutable batch of indexed chunks.
+
+    Postings are in CSR form over hashed term buckets: the chunks containing
+    bucket b are chunks[ptr[b]:ptr[b + 1]] with term frequencies tf[...].
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.name = path.name
+        with open(path / "meta.json") as f:
+            meta = json.load(f)
+        self.n_chunks = meta["n_chunks"]
+        self.files = meta["files"]  # [path, first_chunk, end_chunk]
+        self._file_starts = [first for _, first, _ in self.files]
+        self.ptr = np.load(path / "postings_ptr.npy", mmap_mode="r")
+        self.chunks = np.load(path / "postings_chunk.npy", mmap_mode="r")
+        self.tf = np.load(path / "postings_tf.npy", mmap_mode="r")
+        self.doc_len = np.load(path / "doc_len.npy", mmap_mode="r")
+        self.offsets = np.load(path / "offsets.npy", mmap_mode="r")
+        # np.memmap cannot map an empty file
+        if (path / "texts.bin").stat().st_size:
+            self.texts = np.memmap(path / "texts.bin", dtype=np.uint8, mode="r")
+        else:
+            self.texts = np.zeros(0, dtype=np.uint8)
+        vectors = path / "vectors.npy"
+        self.vectors = np.load(vectors, mmap_mode="r") if vectors.exists() else None
+        self.live = np.zeros(self.n_chunks, dtype=bool)
+
+    def text(self, i: int) -> str:
+        return bytes(self.texts[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def source(self, i: int) -> str:
+        path, first, _ = self.files[bisect_right(self._file_starts, i) - 1]
+        return f"{path}#{i - first}"
+
+    def postings(self, bucket: int) -> Tuple[np.ndarray, np.ndarray]:
+        lo, hi = int(self.ptr[bucket]), int(self.ptr[bucket + 1])
+        return self.chunks[lo:hi], self.tf[lo:hi]
+
+
+def _write_segment(
+    path: Path,
+    files: List[Tuple[str, List[str]]],
+    n_buckets: int,
+    vectors: Optional[np.ndarray] = None,
+) -> None:
+    """Write (file path, chunk texts) pairs as a segment directory."""
+    path.mkdir(parents=True)
+    offsets = [0]
+    doc_len = []
+    file_ranges = []
+    buckets, chunk_ids, tfs = [], [], []
+    # Vocabularies are small relative to token counts; hash each term once
+    bucket_of: Dict[str, int] = {}
+
+    with open(path / "texts.bin", "wb") as texts:
+        chunk_id = 0
+        for file_path, chunks in files:
+            file_ranges.append([file_path, chunk_id, chunk_id + len(chunks)])
+            for chunk in chunks:
+                data = chunk.encode("utf-8")
+                texts.write(data)
+                offsets.append(offsets[-1] + len(data))
+
+                terms = _terms(chunk)
+                doc_len.append(len(terms))
+                counts = Counter(
+                    bucket_of[t] if t in bucket_of
+                    else bucket_of.setdefault(t, _bucket(t, n_buckets))
+                    for t in terms
+                )
+                buckets.extend(counts.keys())
+                tfs.extend(counts.values())
+                chunk_ids.extend([chunk_id] * len(counts))
+                chunk_id += 1
+
+    buckets = np.asarray(buckets, dtype=np.int64)
+    order = np.argsort(buckets, kind="stable")
+    ptr = np.zeros(n_buckets + 1, dtype=np.int64)
+    np.cumsum(np.bincount(buckets, minlength=n_buckets), out=ptr[1:])
+
+    np.save(path / "postings_ptr.npy", ptr)
+    np.save(path / "postings_chunk.npy", np.asarray(chunk_ids, dtype=np.int32)[order])
+    np.save(path / "postings_tf.npy", np.asarray(tfs, dtype=np.float32)[order])
+    np.save(path / "doc_len.npy", np.asarray(doc_len, dtype=np.float32))
+    np.save(path / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+    if vectors is not None:
+        np.save(path / "vectors.npy", _normalize(vectors))
+    with open(path / "meta.json", "w") as f:
+        json.dump({"n_chunks": len(doc_len), "files": file_ranges}, f)
+
+
+def _sha1(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DocumentIndex:
+    """Incrementally updated BM25 index with optional dense vectors.
+
+    Each update writes the added or changed files as a new immutable
+    segment; superseded chunks are masked out until compact() rewrites the
+    live chunks into one segment. All arrays are memory-mapped, so opening
+    an index costs milliseconds regardless of its size.
+    """
+
+    def __init__(
+        self,
+        index_dir: str,
+        embed: Optional[Embedder] = None,
+        n_buckets: int = 2**20,
+        chunk_words: int = 200,
+        chunk_overlap: int = 40,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.index_dir = Path(index_dir)
+        self.embed = embed
+        self.k1 = k1
+        self.b = b
+        manifest_path = self.index_dir / MANIFEST_FILE
+        if manifest_path.exists():
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {
+                "n_buckets": n_buckets,
+                "chunk_words": chunk_words,
+                "chunk_overlap": chunk_overlap,
+                "next_segment": 0,
+                "segments": [],
+                "files": {},
+            }
+        self._open_segments()
+
+    @classmethod
+    def from_env(cls, embed: Optional[Embedder] = None) -> Optional["DocumentIndex"]:
+        """Open the index in AGENT_INDEX_DIR if it is set and built."""
+        index_dir = os.getenv("AGENT_INDEX_DIR")
+        if not index_dir or not Path(index_dir, MANIFEST_FILE).exists():
+            return None
+        return cls(index_dir, embed=embed)
+
+    def _open_segments(self):
+        self.segments = [_Segment(self.index_dir / name) for name in self.manifest["segments"]]
+        by_name = {seg.name: seg for seg in self.segments}
+        for entry in self.manifest["files"].values():
+            by_name[entry["segment"]].live[entry["start"]:entry["end"]] = True
+
+        # Live chunk count and average length for BM25
+        self.n_chunks = int(sum(seg.live.sum() for seg in self.segments))
+        total_len = sum(float(seg.doc_len[seg.live].sum()) for seg in self.segments)
+        self._avgdl = total_len / self.n_chunks if self.n_chunks else 1.0
+
+    def _save_manifest(self):
+        tmp = self.index_dir / (MANIFEST_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, self.index_dir / MANIFEST_FILE)
+
+    def _new_segment(self, files: List[Tuple[str, List[str]]], vectors=None) -> str:
+        name = f"seg-{self.manifest['next_segment']:06d}"
+        self.manifest["next_segment"] += 1
+        _write_segment(self.index_dir / name, files, self.manifest["n_buckets"], vectors)
+        self.manifest["segments"].append(name)
+        return name
+
+    def _drop_dead_segments(self):
+        used = {entry["segment"] for entry in self.manifest["files"].values()}
+        for name in [s for s in self.manifest["segments"] if s not in used]:
+            self.manifest["segments"].remove(name)
+            shutil.rmtree(self.index_dir / name, ignore_errors=True)
+
+    def _embed(self, texts: List[str]) -> Optional[np.ndarray]:
+        if self.embed is None or not texts:
+            return None
+        return np.asarray(self.embed(texts), dtype=np.float32)
+
+    def update(self, docs_dir: str) -> Dict[str, int]:
+        """Index new and changed documents under docs_dir, drop removed ones.
+
+        Unchanged files (same size and mtime, or same content hash) are not
+        re-read or re-chunked.
+        """
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        root = Path(docs_dir)
+        files = self.manifest["files"]
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "chunks": 0}
+
+        seen = set()
+        pending: List[Tuple[str, List[str], dict]] = []
+        for path in sorted(p for p in root.rglob("*") if p.suffix in DOCUMENT_SUFFIXES):
+            rel = path.relative_to(root).as_posix()
+            seen.add(rel)
+            stat = path.stat()
+            entry = files.get(rel)
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                stats["unchanged"] += 1
+                continue
+            sha1 = _sha1(path)
+            if entry and entry["sha1"] == sha1:
+                entry["mtime"] = stat.st_mtime
+                stats["unchanged"] += 1
+                continue
+
+            chunks = chunk_text(
+                path.read_text(encoding="utf-8", errors="replace"),
+                self.manifest["chunk_words"],
+                self.manifest["chunk_overlap"],
+            )
+            meta = {"sha1": sha1, "size": stat.st_size, "mtime": stat.st_mtime}
+            pending.append((rel, chunks, meta))
+            stats["updated" if entry else "added"] += 1
+
+        for rel in [rel for rel in files if rel not in seen]:
+            del files[rel]
+            stats["removed"] += 1
+
+        if pending:
+            texts = [chunk for _, chunks, _ in pending for chunk in chunks]
+            name = self._new_segment(
+                [(rel, chunks) for rel, chunks, _ in pending], self._embed(texts)
+            )
+            start = 0
+            for rel, chunks, meta in pending:
+                files[rel] = {**meta, "segment": name, "start": start, "end": start + len(chunks)}
+                start += len(chunks)
+            stats["chunks"] = len(texts)
+
+        self._drop_dead_segments()
+        self._save_manifest()
+        self._open_segments()
+        return stats
+
+    def compact(self) -> None:
+        """Rewrite all live chunks into a single segment."""
+        files, vectors = [], []
+        for rel, entry in sorted(self.manifest["files"].items()):
+            seg = next(s for s in self.segments if s.name == entry["segment"])
+            ids = range(entry["start"], entry["end"])
+            files.append((rel, [seg.text(i) for i in ids]))
+            if seg.vectors is not None:
+                vectors.append(np.asarray(seg.vectors[entry["start"]:entry["end"]]))
+
+        has_vectors = files and len(vectors) == len(files)
+        name = self._new_segment(files, np.concatenate(vectors) if has_vectors else None)
+        start = 0
+        for rel, chunks in files:
+            entry = self.manifest["files"][rel]
+            entry.update(segment=name, start=start, end=start + len(chunks))
+            start += len(chunks)
+        self._drop_dead_segments()
+        self._save_manifest()
+        self._open_segments()
+
+    def _bm25(self, query: str, limit: int) -> List[Tuple[float, _Segment, int]]:
+        n_buckets = self.manifest["n_buckets"]
+        buckets = sorted({_bucket(t, n_buckets) for t in _terms(query)})
+        n = self.n_chunks
+        if not buckets or not n:
+            return []
+
+        # Document frequency across segments (superseded chunks included
+        # until the next compaction)
+        df = {
+            b: sum(int(seg.ptr[b + 1] - seg.ptr[b]) for seg in self.segments)
+            for b in buckets
+        }
+
+        results = []
+        for seg in self.segments:
+            ids, scores = [], []
+            for b in buckets:
+                chunk_ids, tf = seg.postings(b)
+                if not len(chunk_ids):
+                    continue
+                idf = np.log(1.0 + (n - df[b] + 0.5) / (df[b] + 0.5))
+                dl = seg.doc_len[chunk_ids]
+                norm = self.k1 * (1.0 - self.b + self.b * dl / self._avgdl)
+                ids.append(chunk_ids)
+                scores.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+            if not ids:
+                continue
+
+            unique, inverse = np.unique(np.concatenate(ids), return_inverse=True)
+            totals = np.bincount(inverse, weights=np.concatenate(scores))
+            keep = seg.live[unique]
+            unique, totals = unique[keep], totals[keep]
+            if len(unique) > limit:
+                top = np.argpartition(-totals, limit)[:limit]
+                unique, totals = unique[top], totals[top]
+            results.extend((float(s), seg, int(i)) for s, i in zip(totals, unique))
+
+        results.sort(key=lambda r: -r[0])
+        return results[:limit]
+
+    def _dense(self, query: str, limit: int, block: int = 65536):
+        query_vector = _normalize(self._embed([query]))[0]
+        results = []
+        for seg in self.segments:
+            if seg.vectors is None:
+                continue
+            for start in range(0, seg.n_chunks, block):
+                sims = np.asarray(seg.vectors[start:start + block]) @ query_vector
+                sims[~seg.live[start:start + block]] = -np.inf
+                top = np.argpartition(-sims, min(limit, len(sims) - 1))[:limit]
+                results.extend(
+                    (float(sims[i]), seg, start + int(i)) for i in top if np.isfinite(sims[i])
+                )
+        results.sort(key=lambda r: -r[0])
+        return results[:limit]
+
+    def search(self, query: str, k: int = 5) -> List[SearchHit]:
+        """Return the top-k chunks for query, best first.
+
+        With an embedder, BM25 and dense results are merged by reciprocal
+        rank fusion; otherwise scores are BM25.
+        """
+        if self.embed is None or not any(s.vectors is not None for s in self.segments):
+            return [
+                SearchHit(seg.text(i), seg.source(i), score)
+                for score, seg, i in self._bm25(query, k)
+            ]
+
+        fused: Dict[Tuple[str, int], float] = {}
+        segments = {}
+        for ranked in (self._bm25(query, k * 4), self._dense(query, k * 4)):
+            for rank, (_, seg, i) in enumerate(ranked):
+                key = (seg.name, i)
+                segments[key] = seg
+                fused[key] = fused.get(key, 0.0) + 1.0 / (60 + rank)
+        best = sorted(fused.items(), key=lambda item: -item[1])[:k]
+        return [
+            SearchHit(segments[key].text(key[1]), segments[key].source(key[1]), score)
+            for key, score in best
+        ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Build or update a document index for qa_agent."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--docs", default="docs", help="Directory of .txt/.md documents")
+    parser.add_argument("--index", default="index", help="Index output directory")
+    parser.add_argument("--compact", action="store_true", help="Merge segments after updating")
+    args = parser.parse_args(argv)
+
+    index = DocumentIndex(args.index)
+    stats = index.update(args.docs)
+    if args.compact:
+        index.compact()
+    print(
+        f"Added {stats['added']}, updated {stats['updated']}, removed {stats['removed']}, "
+        f"unchanged {stats['unchanged']} files ({stats['chunks']} new chunks)"
+    )
+    print(f"Index has {index.n_chunks} chunks in {len(index.segments)} segments at {args.index}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Single-pass, constant-memory reading of large documents."""
+
+import codecs
+import hashlib
+import mmap
+import os
+import re
+from typing import Iterable, Iterator, Union
+
+_WORD_SPAN = re.compile(r"\S+")
+
+DocumentSource = Union[str, "os.PathLike[str]", mmap.mmap, Iterable[Union[str, bytes]]]
+
+
+class DocumentStream:
+    """Read a document once, in blocks, without holding it in memory.
+
+    source is a file path, an open mmap, or an iterator of str/bytes pieces
+    (a plain str is taken as a path; wrap in-memory text in a list). While
+    it is read, the stream hashes the raw bytes, so sha256 and nbytes
+    identify the content in logs once iteration has finished.
+    """
+
+    def __init__(self, source: DocumentSource, block_size: int = 1 << 16, encoding: str = "utf-8"):
+        self.source = source
+        self.block_size = block_size
+        self.encoding = encoding
+        self.nbytes = 0
+        self._hash = hashlib.sha256()
+        self._consumed = False
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    @property
+    def name(self) -> str:
+        """Short description of the source for prompts and logs."""
+        if isinstance(self.source, (str, os.PathLike)):
+            return os.path.basename(os.fspath(self.source))
+        return "mmap" if isinstance(self.source, mmap.mmap) else "stream"
+
+    def _raw_blocks(self) -> Iterator[Union[str, bytes]]:
+        if isinstance(self.source, (str, os.PathLike)):
+            with open(self.source, "rb") as f:
+                while block := f.read(self.block_size):
+                    yield block
+        elif isinstance(self.source, mmap.mmap):
+            for start in range(0, len(self.source), self.block_size):
+                yield self.source[start:start + self.block_size]
+        else:
+            yield from self.source
+
+    def blocks(self) -> Iterator[str]:
+        """Yield decoded text blocks; a stream can only be read once."""
+        if self._consumed:
+            raise RuntimeError("DocumentStream has already been read")
+        self._consumed = True
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        for block in self._raw_blocks():
+            if isinstance(block, str):
+                block = block.encode(self.encoding)
+            self._hash.update(block)
+            self.nbytes += len(block)
+            text = decoder.decode(block)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def chunks(self, max_words: int = 1000) -> Iterator[str]:
+        """Yield chunks of up to max_words words, whatever the block boundaries."""
+        words = []
+        carry = ""
+        for text in self.blocks():
+            text = carry + text
+            # The last word may continue in the next block
+            carry = ""
+            if text and not text[-1].isspace():
+                cut = max(text.rfind(" "), text.rfind("\n"), text.rfind("\t"))
+                # Unless a single "word" outgrows a block, which is split instead
+                if cut >= 0 or len(text) < self.block_size:
+                    text, carry = text[:cut + 1], text[cut + 1:]
+            for match in _WORD_SPAN.finditer(text):
+                words.append(match.group())
+                if len(words) == max_words:
+                    yield " ".join(words)
+                    words = []
+        if carry:
+            words.append(carry)
+        if words:
+            yield " ".join(words)
@@ -3,5 +3,22 @@
 from .answer_response import AnswerResponse
 from .user_intent import UserIntent
 from .logging import ToolCall, SessionLog
+from .records import (
+    ToolCallRecord,
+    SessionRecord,
+    build_answer,
+    build_intent,
+    validate_response,
+)
 
-__all__ = ["AnswerResponse", "UserIntent", "ToolCall", "SessionLog"]
+__all__ = [
+    "AnswerResponse",
+    "UserIntent",
+    "ToolCall",
+    "SessionLog",
+    "ToolCallRecord",
+    "SessionRecord",
+    "build_answer",
+    "build_intent",
+    "validate_response",
+]
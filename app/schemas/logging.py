@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -19,5 +19,6 @@ class SessionLog(BaseModel):
     user_query: str
     response: Optional[str] = None
     tool_calls: List[ToolCall] = Field(default_factory=list)
+    prompt_versions: Dict[str, str] = Field(default_factory=dict)
     started_at: datetime = Field(default_factory=datetime.now)
     ended_at: Optional[datetime] = None
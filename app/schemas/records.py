@@ -0,0 +1,113 @@
+"""Lightweight records and constructors for the per-turn fast path.
+
+With AGENT_FAST_PATH=1, data built from trusted internal values skips
+Pydantic validation: session logs use __slots__ records and schema models are
+created with model_construct. Validation then happens only at API
+boundaries via validate_response.
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .answer_response import AnswerResponse
+from .user_intent import UserIntent
+
+FAST_PATH = os.getenv("AGENT_FAST_PATH", "0") == "1"
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+class ToolCallRecord:
+    """Unvalidated equivalent of ToolCall."""
+
+    __slots__ = ("tool_name", "parameters", "result", "timestamp")
+
+    def __init__(
+        self,
+        tool_name: str,
+        parameters: dict,
+        result: Optional[str] = None,
+        timestamp: Optional[datetime] = None,
+    ):
+        self.tool_name = tool_name
+        self.parameters = parameters
+        self.result = result
+        self.timestamp = timestamp or datetime.now()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tool_name": self.tool_name,
+            "parameters": self.parameters,
+            "result": self.result,
+            "timestamp": _isoformat(self.timestamp),
+        }
+
+
+class SessionRecord:
+    """Unvalidated equivalent of SessionLog."""
+
+    __slots__ = (
+        "session_id",
+        "user_query",
+        "response",
+        "tool_calls",
+        "prompt_versions",
+        "started_at",
+        "ended_at",
+    )
+
+    def __init__(
+        self, session_id: str, user_query: str, prompt_versions: Optional[Dict[str, str]] = None
+    ):
+        self.session_id = session_id
+        self.user_query = user_query
+        self.response: Optional[str] = None
+        self.tool_calls: List[ToolCallRecord] = []
+        self.prompt_versions = prompt_versions or {}
+        self.started_at = datetime.now()
+        self.ended_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "user_query": self.user_query,
+            "response": self.response,
+            "tool_calls": [call.to_dict() for call in self.tool_calls],
+            "prompt_versions": self.prompt_versions,
+            "started_at": _isoformat(self.started_at),
+            "ended_at": _isoformat(self.ended_at),
+        }
+
+
+def _use_fast_path(fast: Optional[bool]) -> bool:
+    return FAST_PATH if fast is None else fast
+
+
+def build_answer(fast: Optional[bool] = None, **fields) -> AnswerResponse:
+    """Create an AnswerResponse, skipping validation on the fast path."""
+    if _use_fast_path(fast):
+        # model_construct inspects default_factory signatures on every call,
+        # so fill factory defaults here instead
+        fields.setdefault("timestamp", datetime.now())
+        return AnswerResponse.model_construct(**fields)
+    return AnswerResponse(**fields)
+
+
+def build_intent(fast: Optional[bool] = None, **fields) -> UserIntent:
+    """Create a UserIntent, skipping validation on the fast path."""
+    if _use_fast_path(fast):
+        fields.setdefault("keywords_found", [])
+        return UserIntent.model_construct(**fields)
+    return UserIntent(**fields)
+
+
+def validate_response(
+    response: AnswerResponse, fast: Optional[bool] = None
+) -> AnswerResponse:
+    """Validate a response built on the fast path before it leaves the agent."""
+    if not _use_fast_path(fast):
+        return response
+    return AnswerResponse.model_validate(dict(response))
@@ -5,7 +5,7 @@ from typing import Literal, Optional
 class UserIntent(BaseModel):
     """Schema for capturing user intent classification with enhanced structured output."""
 
-    intent_type: Literal["qa", "summarization", "calculation"]
+    intent_type: Literal["qa", "summarization", "calculation", "report"]
     confidence: float = Field(
         ge=0.0, le=1.0, description="Confidence score between 0 and 1"
     )
@@ -16,3 +16,7 @@ class UserIntent(BaseModel):
     context_influence: Optional[str] = Field(
         None, description="How conversation context affected classification"
     )
+    parse_quality: Optional[Literal["full", "partial", "fallback"]] = Field(
+        None,
+        description="How completely the LLM response was parsed; None if not parsed",
+    )
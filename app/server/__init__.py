@@ -0,0 +1,25 @@
+"""HTTP serving layer for the report-building agent.
+
+Names are imported on first use; ``create_app`` pulls in the agent stack.
+"""
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "AdmissionController": ".admission",
+    "Rejected": ".admission",
+    "ConversationScheduler": ".scheduler",
+    "AgentService": ".service",
+    "HTTPError": ".service",
+    "create_app": ".service",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .admission import AdmissionController, Rejected
+    from .scheduler import ConversationScheduler
+    from .service import AgentService, HTTPError, create_app
@@ -0,0 +1,84 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+
+class Rejected(Exception):
+    """Raised when a request is not admitted; carries the HTTP status to return."""
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+
+
+class AdmissionController:
+    """Bounded admission: a fixed number of running turns plus a bounded wait queue.
+
+    Requests beyond the queue are rejected with 429, requests that wait longer
+    than queue_timeout or arrive while draining are rejected with 503.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_queue: int = 32,
+        queue_timeout: Optional[float] = 10.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self.draining = False
+        self.rejected = {429: 0, 503: 0}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._idle: Optional[asyncio.Event] = None
+
+    def _ensure_loop_state(self):
+        # Created lazily so they bind to the server's running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._idle = asyncio.Event()
+            self._idle.set()
+
+    def _reject(self, status: int, reason: str):
+        self.rejected[status] += 1
+        raise Rejected(status, reason)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a worker slot for the duration of one turn."""
+        self._ensure_loop_state()
+        if self.draining:
+            self._reject(503, "Server is draining")
+        if self.in_flight + self.queued >= self.max_concurrency + self.max_queue:
+            self._reject(429, "Too many requests queued")
+
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._reject(503, "Timed out waiting for a worker")
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            if self.in_flight == 0:
+                self._idle.set()
+
+    async def drain(self, timeout: Optional[float] = 30.0) -> bool:
+        """Stop admitting new turns and wait for in-flight ones to finish."""
+        self._ensure_loop_state()
+        self.draining = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
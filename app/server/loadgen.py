@@ -0,0 +1,494 @@
+"""Load generation against the agent or its HTTP service.
+
+Drives IntegratedAgent (in a worker pool), AgentService (in process, over
+ASGI) or a running server (--url) with an intent mix, against FakeChatLLM
+with a latency distribution unless a URL is given. Arrivals are open-loop
+(Poisson at each of --rates per second, arriving regardless of how the
+target keeps up) or closed-loop (each of --concurrency clients sends its
+next turn when the last one returns). Each level runs for --duration
+seconds and yields one point of the throughput/latency curve:
+
+    python -m app.server.loadgen --target agent --mode open --rates 2,5,10,20
+    python -m app.server.loadgen --target service --mode closed --concurrency 1,4,16
+    python -m app.server.loadgen --url http://127.0.0.1:8000 --rates 5,10 --out run1
+
+Queueing delay is the wait before a turn starts running: for a worker
+slot (agent), or as reported by the service's queued_ms. RSS is sampled
+from this process, so with --url it is the harness's, not the server's.
+--out PREFIX writes PREFIX_summary.csv, PREFIX_timeline.csv and
+PREFIX.json.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_MIX = "qa=0.5,calculation=0.3,summarization=0.15,report=0.05"
+DEFAULT_LATENCY = "lognormal:0.2,0.5"
+
+# Turns sent for each intent; one is drawn at random per request
+INPUTS = {
+    "calculation": ["15 * 23", "calculate 120 / 8", "add 45 and 17", "(12 + 8) * 3"],
+    "qa": [
+        "What is the capital of France?",
+        "How does photosynthesis work?",
+        "Explain machine learning",
+        "Why is the sky blue?",
+    ],
+    "summarization": ["Summarize our conversation so far", "Give me a brief overview"],
+    "report": ["Write a 3-section report on Q3 sales", "Build a report about churn"],
+    "compound": ["calculate 12 * 4 and then summarize our conversation"],
+}
+
+
+@dataclass
+class Sample:
+    """One request: times are seconds since the run started."""
+
+    step: int
+    intent: str
+    arrival: float
+    end: float
+    queued: float
+    status: str
+
+    @property
+    def latency(self) -> float:
+        return self.end - self.arrival
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse "qa=0.5,calculation=0.5" into normalized intent weights."""
+    weights = {}
+    for part in filter(None, spec.split(",")):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in INPUTS:
+            raise ValueError(f"Unknown intent {name!r}; choose from {', '.join(INPUTS)}")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Intent mix needs a positive weight")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def parse_latency(spec: str, rng: random.Random) -> Callable[[], float]:
+    """Latency sampler in seconds from "fixed:S", "uniform:A,B", "exp:MEAN"
+    or "lognormal:MEDIAN,SIGMA"."""
+    kind, _, args = spec.partition(":")
+    params = [float(x) for x in args.split(",") if x]
+    if kind == "fixed" and len(params) == 1:
+        return lambda: params[0]
+    if kind == "uniform" and len(params) == 2:
+        return lambda: rng.uniform(*params)
+    if kind == "exp" and len(params) == 1:
+        return lambda: rng.expovariate(1 / params[0]) if params[0] > 0 else 0.0
+    if kind == "lognormal" and len(params) == 2:
+        return lambda: rng.lognormvariate(math.log(params[0]), params[1])
+    raise ValueError(f"Bad latency distribution {spec!r}")
+
+
+def rss_kind() -> str:
+    """What rss_mb() measures here: "current" RSS, or the process's "peak"."""
+    return "current" if os.path.exists("/proc/self/statm") else "peak"
+
+
+def rss_mb() -> float:
+    """Resident set size of this process in MiB (see rss_kind)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        # Where /proc is unavailable only the peak is known; ru_maxrss is
+        # in bytes on macOS and in KiB elsewhere
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+class Workload:
+    """Draws (intent, text, conversation id) for each request."""
+
+    def __init__(self, mix: Dict[str, float], conversations: int, rng: random.Random):
+        self.intents = list(mix)
+        self.weights = list(mix.values())
+        self.conversations = conversations
+        self.rng = rng
+
+    def next(self) -> Tuple[str, str, str]:
+        intent = self.rng.choices(self.intents, self.weights)[0]
+        conversation = f"load-{self.rng.randrange(self.conversations)}"
+        return intent, self.rng.choice(INPUTS[intent]), conversation
+
+
+class AgentTarget:
+    """IntegratedAgent per conversation, run in a fixed worker pool."""
+
+    def __init__(self, llm, workers: int, log_dir: str):
+        from ..agent import IntegratedAgent
+        from ..services import LoadShedder
+
+        shedder = LoadShedder()
+        self.make_agent = lambda: IntegratedAgent(llm=llm, log_dir=log_dir, load_shedder=shedder)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load")
+        self.agents = {}
+        self._lock = threading.Lock()
+
+    def _agent(self, conversation_id: str):
+        with self._lock:
+            agent = self.agents.get(conversation_id)
+            if agent is None:
+                agent = self.agents[conversation_id] = self.make_agent()
+            return agent
+
+    async def send(self, conversation_id: str, text: str) -> Tuple[str, float]:
+        arrived = time.perf_counter()
+
+        def run():
+            queued = time.perf_counter() - arrived
+            response = self._agent(conversation_id).process_input(text)
+            return ("error" if response.sources == ["error_handler"] else "ok"), queued
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, run)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def _turn_status(status: int, result: dict) -> Tuple[str, float]:
+    if status != 200:
+        return f"http_{status}", 0.0
+    queued = result.get("queued_ms", 0.0) / 1000
+    if result["response"]["sources"] == ["error_handler"]:
+        return "error", queued
+    return "ok", queued
+
+
+class ServiceTarget:
+    """AgentService called in process through its ASGI interface."""
+
+    def __init__(self, llm, workers: int, log_dir: str, max_queue: int):
+        from ..agent import IntegratedAgent
+        from ..metrics import MetricsRegistry
+        from .service import AgentService
+
+        # The service builds its own load shedder, fed by its queue depth
+        self.service = AgentService(
+            agent_factory=partial(IntegratedAgent, llm=llm, log_dir=log_dir),
+            max_concurrency=workers,
+            max_queue=max_queue,
+            queue_timeout=None,
+            registry=MetricsRegistry(),
+        )
+
+    async def send(self, conversation_id: str, text: str) -> Tuple[str, float]:
+        payload = json.dumps({"conversation_id": conversation_id, "input": text}).encode()
+        messages = [{"type": "http.request", "body": payload, "more_body": False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/v1/turns", "headers": []}
+        await self.service(scope, receive, send)
+        body = json.loads(b"".join(m.get("body", b"") for m in sent[1:]) or b"{}")
+        return _turn_status(sent[0]["status"], body)
+
+    def close(self):
+        self.service.executor.shutdown(wait=True)
+
+
+class HTTPTarget:
+    """A running service at url, one blocking connection per client thread."""
+
+    def __init__(self, url: str, workers: int, timeout: float = 60.0):
+        self.url = url.rstrip("/") + "/v1/turns"
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load-http")
+
+    def _post(self, conversation_id: str, text: str) -> Tuple[str, float]:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"conversation_id": conversation_id, "input": text}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return _turn_status(response.status, json.load(response))
+        except urllib.error.HTTPError as e:
+            return f"http_{e.code}", 0.0
+        except OSError:
+            return "connection_error", 0.0
+
+    async def send(self, conversation_id: str, text: str) -> Tuple[str, float]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._post, conversation_id, text)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class RSSSampler:
+    """Samples (seconds since t0, RSS MiB) every interval in a thread."""
+
+    def __init__(self, t0: float, interval: float = 0.5):
+        self.t0 = t0
+        self.interval = interval
+        self.samples: List[Tuple[float, float]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while True:
+            self.samples.append((time.perf_counter() - self.t0, rss_mb()))
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+async def _request(target, workload: Workload, step: int, t0: float, samples: List[Sample]):
+    intent, text, conversation_id = workload.next()
+    arrival = time.perf_counter() - t0
+    try:
+        status, queued = await target.send(conversation_id, text)
+    except Exception as e:
+        status, queued = f"exception_{type(e).__name__}", 0.0
+    samples.append(Sample(step, intent, arrival, time.perf_counter() - t0, queued, status))
+
+
+async def run_open_loop(target, workload, rate, duration, step, t0, samples, max_in_flight):
+    """Poisson arrivals at rate per second for duration, then drain."""
+    rng = workload.rng
+    tasks = set()
+    start = time.perf_counter()
+    next_arrival = start
+    while True:
+        next_arrival += rng.expovariate(rate)
+        if next_arrival - start >= duration:
+            break
+        await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+        if len(tasks) >= max_in_flight:
+            now = time.perf_counter() - t0
+            samples.append(Sample(step, "-", now, now, 0.0, "dropped"))
+            continue
+        task = asyncio.ensure_future(_request(target, workload, step, t0, samples))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def run_closed_loop(target, workload, clients, duration, step, t0, samples):
+    """clients each send a turn as soon as their previous one returns."""
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        while time.perf_counter() < deadline:
+            await _request(target, workload, step, t0, samples)
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def _ms(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value * 1000, 1)
+
+
+def summarize_step(step, mode, level, samples, rss, window):
+    """One point of the throughput/latency curve."""
+    ok = [s for s in samples if s.status == "ok"]
+    latencies = [s.latency for s in ok]
+    queued = [s.queued for s in ok]
+    start, end = window
+    return {
+        "step": step,
+        "mode": mode,
+        "offered": level,
+        "requests": len(samples),
+        "throughput_rps": round(len(ok) / (end - start), 3) if end > start else 0.0,
+        "latency_p50_ms": _ms(_percentile(latencies, 50)),
+        "latency_p90_ms": _ms(_percentile(latencies, 90)),
+        "latency_p99_ms": _ms(_percentile(latencies, 99)),
+        "queue_mean_ms": _ms(sum(queued) / len(queued)) if queued else None,
+        "queue_p99_ms": _ms(_percentile(queued, 99)),
+        "error_rate": round(1 - len(ok) / len(samples), 4) if samples else 0.0,
+        "rss_peak_mb": round(max((mb for t, mb in rss if start <= t <= end), default=0.0), 1),
+    }
+
+
+def build_timeline(samples: List[Sample], rss: List[Tuple[float, float]], bucket: float = 1.0):
+    """Per-bucket completions, errors, latency, in-flight requests and RSS."""
+    if not samples:
+        return []
+    horizon = max(s.end for s in samples)
+    rows = []
+    for i in range(int(horizon // bucket) + 1):
+        lo, hi = i * bucket, (i + 1) * bucket
+        done = [s for s in samples if lo <= s.end < hi]
+        ok = [s.latency for s in done if s.status == "ok"]
+        rows.append({
+            "t": round(lo, 3),
+            "step": max((s.step for s in samples if s.arrival < hi), default=0),
+            "completed": len(done),
+            "errors": sum(s.status != "ok" for s in done),
+            "latency_mean_ms": _ms(sum(ok) / len(ok)) if ok else None,
+            "in_flight": sum(s.arrival < hi and s.end >= hi for s in samples),
+            "rss_mb": round(max((mb for t, mb in rss if lo <= t < hi), default=0.0), 1),
+        })
+    return rows
+
+
+async def run_load(
+    target,
+    workload: Workload,
+    mode: str,
+    levels: List[float],
+    duration: float,
+    max_in_flight: int = 10000,
+) -> dict:
+    """Run each level for duration; returns summary, timeline and samples."""
+    samples: List[Sample] = []
+    summary = []
+    t0 = time.perf_counter()
+    with RSSSampler(t0) as sampler:
+        for step, level in enumerate(levels):
+            start = time.perf_counter() - t0
+            before = len(samples)
+            if mode == "open":
+                await run_open_loop(
+                    target, workload, level, duration, step, t0, samples, max_in_flight
+                )
+            else:
+                await run_closed_loop(target, workload, int(level), duration, step, t0, samples)
+            window = (start, time.perf_counter() - t0)
+            summary.append(
+                summarize_step(step, mode, level, samples[before:], sampler.samples, window)
+            )
+    return {
+        "summary": summary,
+        # "peak" means RSS columns hold the process's peak so far, not current RSS
+        "rss_kind": rss_kind(),
+        "timeline": build_timeline(samples, sampler.samples),
+        "samples": [{**asdict(s), "latency": s.latency} for s in samples],
+    }
+
+
+def write_outputs(result: dict, prefix: str):
+    """PREFIX_summary.csv, PREFIX_timeline.csv and everything in PREFIX.json."""
+    for name in ("summary", "timeline"):
+        rows = result[name]
+        if not rows:
+            continue
+        with open(f"{prefix}_{name}.csv", "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    with open(f"{prefix}.json", "w") as f:
+        json.dump(result, f, indent=2)
+
+
+def _print_summary(summary: List[dict], rss: str = "current"):
+    rss_label = "rss MiB" if rss == "current" else "maxrss MiB"
+    print(
+        f"{'offered':>8} {'reqs':>6} {'rps':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}"
+        f" {'queue ms':>9} {'errors':>7} {rss_label:>8}"
+    )
+
+    def cell(value, width):
+        return f"{'-' if value is None else value:>{width}}"
+
+    for row in summary:
+        print(
+            f"{row['offered']:>8} {row['requests']:>6} {row['throughput_rps']:>7}"
+            f" {cell(row['latency_p50_ms'], 8)} {cell(row['latency_p90_ms'], 8)}"
+            f" {cell(row['latency_p99_ms'], 8)} {cell(row['queue_mean_ms'], 9)}"
+            f" {row['error_rate']:>7.1%} {row['rss_peak_mb']:>8}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    """Run a load test and print the throughput/latency curve."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--target", choices=("agent", "service"), default="agent")
+    parser.add_argument("--url", help="Load a running server instead of an in-process target")
+    parser.add_argument("--mode", choices=("open", "closed"), default="open")
+    parser.add_argument("--rates", default="2,5,10", help="Open loop: arrivals per second")
+    parser.add_argument("--concurrency", default="1,4,16", help="Closed loop: clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Intent weights")
+    parser.add_argument(
+        "--latency", default=DEFAULT_LATENCY, help="Fake LLM latency per call, e.g. exp:0.2"
+    )
+    parser.add_argument("--workers", type=int, default=8, help="Worker threads in the target")
+    parser.add_argument("--max-queue", type=int, default=256, help="Service admission queue")
+    parser.add_argument("--conversations", type=int, default=50)
+    parser.add_argument("--max-in-flight", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write PREFIX_summary.csv, PREFIX_timeline.csv, PREFIX.json")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    workload = Workload(parse_mix(args.mix), args.conversations, rng)
+    spec = args.rates if args.mode == "open" else args.concurrency
+    levels = [float(x) for x in spec.split(",") if x]
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        if args.url:
+            target = HTTPTarget(args.url, workers=max(args.workers, int(max(levels))))
+        else:
+            from ..prompts import FakeChatLLM
+
+            # A separate generator, so latency draws do not shift the workload
+            llm = FakeChatLLM(latency=parse_latency(args.latency, random.Random(args.seed + 1)))
+            if args.target == "agent":
+                target = AgentTarget(llm, args.workers, log_dir)
+            else:
+                target = ServiceTarget(llm, args.workers, log_dir, args.max_queue)
+        try:
+            result = asyncio.run(
+                run_load(target, workload, args.mode, levels, args.duration, args.max_in_flight)
+            )
+        finally:
+            target.close()
+
+    result["config"] = {k: v for k, v in vars(args).items() if k != "out"}
+    _print_summary(result["summary"], result["rss_kind"])
+    if args.out:
+        write_outputs(result, args.out)
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from .admission import Rejected
+
+
+class ConversationScheduler:
+    """Serialize turns within a conversation; run conversations in parallel.
+
+    Each conversation gets an asyncio.Lock on first use, dropped again once
+    no turn holds or waits for it, so idle conversations cost nothing. At
+    most max_pending turns may wait per conversation (429 beyond that).
+
+    Turns sent with an idempotency key run at most once per conversation:
+    a duplicate that arrives while the first is running awaits its result,
+    and later retries get the cached result until the key is evicted
+    (least recently used beyond max_keys). Failed turns are not cached:
+    neither runs that raise nor results that cacheable rejects.
+    """
+
+    def __init__(self, max_pending: int = 8, max_keys: int = 10000):
+        self.max_pending = max_pending
+        self.max_keys = max_keys
+        self.replayed = 0
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._pending: Dict[str, int] = {}
+        self._results: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    @property
+    def active(self) -> int:
+        """Conversations with a running or waiting turn."""
+        return len(self._locks)
+
+    def is_active(self, conversation_id: str) -> bool:
+        """Whether the conversation has a running or waiting turn."""
+        return conversation_id in self._locks
+
+    @asynccontextmanager
+    async def turn(self, conversation_id: str):
+        """Hold the conversation's turn for the with-block."""
+        pending = self._pending.get(conversation_id, 0)
+        if pending >= self.max_pending:
+            raise Rejected(429, "Too many pending turns for this conversation")
+        lock = self._locks.setdefault(conversation_id, asyncio.Lock())
+        self._pending[conversation_id] = pending + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._pending[conversation_id] -= 1
+            if not self._pending[conversation_id]:
+                del self._pending[conversation_id]
+                del self._locks[conversation_id]
+
+    async def run_once(
+        self,
+        conversation_id: str,
+        idempotency_key: Optional[str],
+        run: Callable[[], Awaitable[dict]],
+        cacheable: Optional[Callable[[dict], bool]] = None,
+    ) -> Tuple[dict, bool]:
+        """Await run() unless the key already ran; returns (result, replayed).
+
+        cacheable returns False for results that report a failure, so a
+        retry with the same key runs again instead of replaying it.
+        """
+        if idempotency_key is None:
+            return await run(), False
+        key = (conversation_id, idempotency_key)
+        if key in self._results:
+            self._results.move_to_end(key)
+            self.replayed += 1
+            return self._results[key], True
+        if key in self._in_flight:
+            result = await asyncio.shield(self._in_flight[key])
+            self.replayed += 1
+            return result, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await run()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved: there may be no duplicate waiting on it
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+        future.set_result(result)
+        if cacheable is None or cacheable(result):
+            self._results[key] = result
+            if len(self._results) > self.max_keys:
+                self._results.popitem(last=False)
+        return result, False
@@ -0,0 +1,413 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional
+from uuid import uuid4
+
+from ..agent import IntegratedAgent
+from ..logging import LogCompactor
+from ..prompts import CassetteLLM, FakeChatLLM, OpenAIChatLLM
+from ..metrics import REGISTRY, MetricsRegistry
+from ..services import LoadShedder
+from .admission import AdmissionController, Rejected
+from .scheduler import ConversationScheduler
+
+
+class HTTPError(Exception):
+    """Error returned to the client as a JSON body."""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def _succeeded(result: dict) -> bool:
+    """Whether a turn result may be replayed for its idempotency key."""
+    # The agent reports failures as an answer from error_handler, not by raising
+    return result["response"]["sources"] != ["error_handler"]
+
+
+class AgentService:
+    """ASGI service exposing IntegratedAgent turns over HTTP.
+
+    Endpoints:
+        POST /v1/turns         {"input": str, "conversation_id": str?, "idempotency_key": str?}
+        POST /v1/turns/stream  same body, NDJSON events as workflow nodes finish
+        POST /v1/batches       {"turns": [<turn body>, ...]}
+        GET  /healthz
+        GET  /metrics          text exposition format
+
+    Workflow nodes are synchronous, so turns run in a worker pool sized to
+    max_concurrency; waiting connections only hold a coroutine. Turns of
+    one conversation run one at a time, in arrival order, while different
+    conversations run in parallel. A retried turn with the same idempotency
+    key (body field or Idempotency-Key header) returns the first turn's
+    result, marked "replayed", instead of running again.
+
+    agent_factory(conversation_id=..., load_shedder=...) builds a
+    conversation's agent. The least recently used idle agents beyond
+    max_conversations are dropped and rebuilt on their next turn, finding
+    their memory under the same id. Without a load_shedder, the service
+    builds its own, fed by its queue depth; a given one is used as is.
+    """
+
+    def __init__(
+        self,
+        agent_factory: Optional[Callable[..., IntegratedAgent]] = None,
+        max_concurrency: int = 8,
+        max_queue: int = 32,
+        queue_timeout: Optional[float] = 10.0,
+        max_conversations: int = 1000,
+        max_batch: int = 32,
+        drain_timeout: float = 30.0,
+        registry: Optional[MetricsRegistry] = None,
+        load_shedder: Optional[LoadShedder] = None,
+        max_pending_per_conversation: int = 8,
+        log_compactor: Optional[LogCompactor] = None,
+    ):
+        self.agent_factory = agent_factory or IntegratedAgent
+        self.admission = AdmissionController(max_concurrency, max_queue, queue_timeout)
+        self.scheduler = ConversationScheduler(max_pending=max_pending_per_conversation)
+        # Queued turns are an early signal of overload for the load shedder
+        self.load_shedder = load_shedder or LoadShedder(
+            queue_depth=lambda: self.admission.queued
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="agent-worker"
+        )
+        self.conversations: "OrderedDict[str, IntegratedAgent]" = OrderedDict()
+        self.max_conversations = max_conversations
+        self.max_batch = max_batch
+        self.drain_timeout = drain_timeout
+        # Background compaction of session logs, off unless configured
+        self.log_compactor = log_compactor or LogCompactor.from_env()
+        self.registry = registry or REGISTRY
+        self.load_shedder.register(self.registry)
+        self.http_requests = self.registry.counter(
+            "agent_http_requests_total", "HTTP requests by path and status.", ["path", "status"]
+        )
+        self.turn_latency = self.registry.histogram(
+            "agent_turn_seconds", "Turn latency in the worker pool in seconds."
+        )
+        self.queue_wait = self.registry.histogram(
+            "agent_turn_queue_seconds", "Wait for the conversation and a worker slot in seconds."
+        )
+        self.routes = {
+            ("POST", "/v1/turns"): self._handle_turn,
+            ("POST", "/v1/turns/stream"): self._handle_stream,
+            ("POST", "/v1/batches"): self._handle_batch,
+            ("GET", "/healthz"): self._handle_health,
+            ("GET", "/metrics"): self._handle_metrics,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.log_compactor is not None:
+                    self.log_compactor.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.drain()
+                if self.log_compactor is not None:
+                    self.log_compactor.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def drain(self) -> bool:
+        """Stop accepting turns and wait for in-flight ones to finish."""
+        drained = await self.admission.drain(self.drain_timeout)
+        self.executor.shutdown(wait=False)
+        return drained
+
+    async def _http(self, scope, receive, send):
+        method, path = scope["method"], scope["path"]
+        handler = self.routes.get((method, path))
+        status = 500
+        try:
+            if handler is None:
+                known_path = any(p == path for _, p in self.routes)
+                raise HTTPError(405 if known_path else 404, "Not found")
+            body = await self._read_body(receive) if method == "POST" else None
+            if body is not None:
+                for name, value in scope.get("headers", []):
+                    if name.lower() == b"idempotency-key":
+                        body.setdefault("idempotency_key", value.decode("latin-1"))
+            status = await handler(body, send)
+        except HTTPError as e:
+            status = e.status
+            await self._send_json(send, e.status, {"error": e.detail})
+        except Rejected as e:
+            status = e.status
+            await self._send_json(send, e.status, {"error": e.reason})
+        except Exception as e:
+            await self._send_json(send, 500, {"error": f"Internal error: {e}"})
+        finally:
+            self.http_requests.inc(path=path, status=status)
+
+    async def _read_body(self, receive) -> dict:
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        try:
+            body = json.loads(b"".join(chunks) or b"{}")
+        except json.JSONDecodeError:
+            raise HTTPError(400, "Body must be valid JSON")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return body
+
+    async def _send_json(self, send, status: int, payload):
+        body = json.dumps(payload).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    def _parse_turn(self, turn: dict):
+        user_input = turn.get("input")
+        conversation_id = turn.get("conversation_id") or str(uuid4())
+        idempotency_key = turn.get("idempotency_key")
+        if not isinstance(user_input, str):
+            raise HTTPError(400, "'input' must be a string")
+        if not isinstance(conversation_id, str):
+            raise HTTPError(400, "'conversation_id' must be a string")
+        if idempotency_key is not None and not isinstance(idempotency_key, str):
+            raise HTTPError(400, "'idempotency_key' must be a string")
+        return conversation_id, user_input, idempotency_key
+
+    def _get_agent(self, conversation_id: str) -> IntegratedAgent:
+        agent = self.conversations.get(conversation_id)
+        if agent is None:
+            agent = self.agent_factory(
+                conversation_id=conversation_id, load_shedder=self.load_shedder
+            )
+            self.conversations[conversation_id] = agent
+        else:
+            self.conversations.move_to_end(conversation_id)
+        self._evict_idle()
+        return agent
+
+    def _evict_idle(self):
+        """Drop least recently used agents beyond max_conversations.
+
+        Agents with a turn running or waiting are kept, so their in-memory
+        history is not split across two agents; the limit may be exceeded
+        until they are idle.
+        """
+        excess = len(self.conversations) - self.max_conversations
+        if excess <= 0:
+            return
+        idle = [c for c in self.conversations if not self.scheduler.is_active(c)]
+        for conversation_id in idle[:excess]:
+            del self.conversations[conversation_id]
+
+    async def run_turn(
+        self,
+        conversation_id: str,
+        user_input: str,
+        on_step=None,
+        on_section=None,
+        idempotency_key: Optional[str] = None,
+    ) -> dict:
+        """Run one turn in the worker pool, after earlier turns of its conversation.
+
+        The result's queued_ms is how long the turn waited before running.
+        """
+        arrived = time.perf_counter()
+
+        async def execute():
+            # Wait for the conversation before taking a worker slot, so a
+            # busy conversation never holds slots other conversations need
+            async with self.scheduler.turn(conversation_id), self.admission.slot():
+                queued = time.perf_counter() - arrived
+                self.queue_wait.observe(queued)
+                agent = self._get_agent(conversation_id)
+                loop = asyncio.get_running_loop()
+                with self.turn_latency.time():
+                    response = await loop.run_in_executor(
+                        self.executor,
+                        partial(agent.process_input, user_input, on_step, on_section=on_section),
+                    )
+            return {
+                "conversation_id": conversation_id,
+                "response": response.model_dump(mode="json"),
+                "queued_ms": round(queued * 1000, 3),
+            }
+
+        result, replayed = await self.scheduler.run_once(
+            conversation_id, idempotency_key, execute, cacheable=_succeeded
+        )
+        return {**result, "replayed": True} if replayed else result
+
+    async def _handle_turn(self, body, send) -> int:
+        conversation_id, user_input, idempotency_key = self._parse_turn(body)
+        result = await self.run_turn(
+            conversation_id, user_input, idempotency_key=idempotency_key
+        )
+        await self._send_json(send, 200, result)
+        return 200
+
+    async def _handle_batch(self, body, send) -> int:
+        turns = body.get("turns")
+        if not isinstance(turns, list) or not turns:
+            raise HTTPError(400, "'turns' must be a non-empty list")
+        if len(turns) > self.max_batch:
+            raise HTTPError(413, f"At most {self.max_batch} turns per batch")
+        parsed = [self._parse_turn(turn if isinstance(turn, dict) else {}) for turn in turns]
+
+        outcomes = await asyncio.gather(
+            *(self.run_turn(cid, text, idempotency_key=key) for cid, text, key in parsed),
+            return_exceptions=True,
+        )
+        results = []
+        for (conversation_id, _, _), outcome in zip(parsed, outcomes):
+            if isinstance(outcome, Rejected):
+                results.append(
+                    {"conversation_id": conversation_id, "status": outcome.status, "error": outcome.reason}
+                )
+            elif isinstance(outcome, BaseException):
+                results.append(
+                    {"conversation_id": conversation_id, "status": 500, "error": str(outcome)}
+                )
+            else:
+                results.append({"status": 200, **outcome})
+        await self._send_json(send, 200, {"results": results})
+        return 200
+
+    async def _handle_stream(self, body, send) -> int:
+        conversation_id, user_input, idempotency_key = self._parse_turn(body)
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def on_step(node_name):
+            loop.call_soon_threadsafe(
+                events.put_nowait, {"event": "step", "node": node_name}
+            )
+
+        def on_section(section):
+            loop.call_soon_threadsafe(events.put_nowait, {"event": "section", **section})
+
+        task = asyncio.ensure_future(
+            self.run_turn(conversation_id, user_input, on_step, on_section, idempotency_key)
+        )
+        task.add_done_callback(lambda _: events.put_nowait(None))
+
+        # Wait for the first event so admission failures still get a status code
+        first = await events.get()
+        if first is None and task.exception() is not None:
+            raise task.exception()
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/x-ndjson")],
+            }
+        )
+        event = first
+        while event is not None:
+            await self._send_event(send, event)
+            event = await events.get()
+
+        if task.exception() is not None:
+            final = {"event": "error", "error": str(task.exception())}
+        else:
+            final = {"event": "response", **task.result()}
+        await self._send_event(send, final)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+        return 200
+
+    async def _send_event(self, send, event: dict):
+        line = json.dumps(event).encode("utf-8") + b"\n"
+        await send({"type": "http.response.body", "body": line, "more_body": True})
+
+    async def _handle_health(self, body, send) -> int:
+        status = 503 if self.admission.draining else 200
+        await self._send_json(
+            send,
+            status,
+            {
+                "status": "draining" if self.admission.draining else "ok",
+                "in_flight": self.admission.in_flight,
+                "queued": self.admission.queued,
+                "conversations": len(self.conversations),
+                "active_conversations": self.scheduler.active,
+            },
+        )
+        return status
+
+    def render_metrics(self) -> str:
+        """Render registry metrics plus this service's gauges."""
+        lines = ["# TYPE agent_admission_rejected_total counter"]
+        for status, count in sorted(self.admission.rejected.items()):
+            lines.append(f'agent_admission_rejected_total{{status="{status}"}} {count}')
+        lines += [
+            "# TYPE agent_turns_in_flight gauge",
+            f"agent_turns_in_flight {self.admission.in_flight}",
+            "# TYPE agent_turns_queued gauge",
+            f"agent_turns_queued {self.admission.queued}",
+            "# TYPE agent_conversations gauge",
+            f"agent_conversations {len(self.conversations)}",
+            "# TYPE agent_conversations_active gauge",
+            f"agent_conversations_active {self.scheduler.active}",
+            "# TYPE agent_turns_replayed_total counter",
+            f"agent_turns_replayed_total {self.scheduler.replayed}",
+        ]
+        return self.registry.render() + "\n".join(lines) + "\n"
+
+    async def _handle_metrics(self, body, send) -> int:
+        payload = self.render_metrics().encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/plain; version=0.0.4")],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
+        return 200
+
+
+def create_app(**kwargs) -> AgentService:
+    """ASGI app factory, e.g. ``uvicorn --factory app.server:create_app``.
+
+    Set AGENT_FAKE_LLM=1 to serve against FakeChatLLM instead of OpenAI, or
+    AGENT_LLM_CASSETTE=<path> with AGENT_LLM_CASSETTE_MODE=record|replay (and
+    optionally AGENT_LLM_CASSETTE_SCALE) to record or replay LLM responses.
+    """
+    if "agent_factory" not in kwargs:
+        cassette = os.getenv("AGENT_LLM_CASSETTE")
+        if cassette:
+            mode = os.getenv("AGENT_LLM_CASSETTE_MODE", "replay")
+            llm = CassetteLLM(
+                cassette,
+                mode=mode,
+                llm=OpenAIChatLLM() if mode == "record" else None,
+                latency_scale=float(os.getenv("AGENT_LLM_CASSETTE_SCALE", "1.0")),
+            )
+            kwargs["agent_factory"] = partial(IntegratedAgent, llm=llm)
+        elif os.getenv("AGENT_FAKE_LLM") == "1":
+            kwargs["agent_factory"] = partial(IntegratedAgent, llm=FakeChatLLM())
+    return AgentService(**kwargs)
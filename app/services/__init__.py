@@ -1,3 +1,40 @@
-from .intent_classifier import IntentClassifier
+"""Classification, context and load management services.
 
-__all__ = ["IntentClassifier"]
+Names are imported on first use, so CLIs such as
+``python -m app.services.local_intent_model`` skip the LLM client stack.
+"""
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "IntentClassifier": ".intent_classifier",
+    "ContextBuilder": ".context_builder",
+    "ConversationContext": ".context_builder",
+    "count_tokens": ".context_builder",
+    "LocalIntentModel": ".local_intent_model",
+    "load_session_examples": ".local_intent_model",
+    "ParsedIntent": ".intent_parser",
+    "parse_classifier_output": ".intent_parser",
+    "LoadShedder": ".load_shedder",
+    "default_load_shedder": ".load_shedder",
+    "decompose": ".decomposer",
+    "ModelRouter": ".model_router",
+    "ModelTier": ".model_router",
+    "OutputBudget": ".output_budget",
+    "OutputBudgets": ".output_budget",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .intent_classifier import IntentClassifier
+    from .context_builder import ContextBuilder, ConversationContext, count_tokens
+    from .local_intent_model import LocalIntentModel, load_session_examples
+    from .intent_parser import ParsedIntent, parse_classifier_output
+    from .load_shedder import LoadShedder, default_load_shedder
+    from .decomposer import decompose
+    from .model_router import ModelRouter, ModelTier
+    from .output_budget import OutputBudget, OutputBudgets
@@ -0,0 +1,162 @@
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+# Word pieces of up to 6 characters or single punctuation marks. This is a
+# local approximation of BPE token counts that never needs a network call.
+_TOKEN_PATTERN = re.compile(r"\w{1,6}|[^\w\s]")
+
+# Token budgets for the conversation history passed to each LLM role
+DEFAULT_CONTEXT_BUDGETS = {
+    "classifier": 256,
+    "qa": 1536,
+    "recall": 384,
+    "documents": 1024,
+    "summary": 512,
+}
+DEFAULT_BUDGET = 512
+
+
+def estimate_tokens(text: str) -> int:
+    """Count tokens in text without caching, for one-off prompts."""
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+TOKEN_CACHE_SIZE = 4096
+# Keyed on (hash, length) rather than the text itself, so the cache does not
+# keep thousands of long messages alive
+_token_counts: "OrderedDict[Tuple[int, int], int]" = OrderedDict()
+_token_counts_lock = threading.Lock()
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text, cached per message content."""
+    key = (hash(text), len(text))
+    with _token_counts_lock:
+        tokens = _token_counts.get(key)
+        if tokens is not None:
+            _token_counts.move_to_end(key)
+            return tokens
+    tokens = estimate_tokens(text)
+    with _token_counts_lock:
+        _token_counts[key] = tokens
+        if len(_token_counts) > TOKEN_CACHE_SIZE:
+            _token_counts.popitem(last=False)
+    return tokens
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Truncate text to about max_tokens, keeping its head and tail."""
+    spans = [m.span() for m in _TOKEN_PATTERN.finditer(text)]
+    if len(spans) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    head = max(1, (max_tokens * 2) // 3)
+    tail = max_tokens - head
+    omitted = len(spans) - head - tail
+
+    truncated = text[: spans[head - 1][1]].rstrip()
+    truncated += f" ... [{omitted} tokens omitted] ..."
+    if tail:
+        truncated += " " + text[spans[-tail][0] :].lstrip()
+    return truncated
+
+
+def truncate_head(text: str, max_tokens: int) -> str:
+    """Keep about max_tokens of text's head, ending on a sentence if possible."""
+    spans = [m.span() for m in _TOKEN_PATTERN.finditer(text)]
+    if len(spans) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    head = text[: spans[max_tokens - 1][1]]
+    # Drop a trailing partial sentence unless that would lose most of the head
+    end = max(head.rfind(". "), head.rfind(".\n"), head.rfind("\n\n"))
+    if end >= len(head) // 2:
+        head = head[: end + 1]
+    return head.rstrip()
+
+
+@dataclass
+class ConversationContext:
+    """Conversation history rendered within a token budget."""
+
+    text: str
+    tokens_used: int
+    tokens_dropped: int
+    messages_included: int
+    messages_truncated: int
+    # Index in messages of the oldest message included, None if none were
+    oldest_included: Optional[int] = None
+
+
+class ContextBuilder:
+    """Build token-bounded conversation history for LLM prompts."""
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, int]] = None,
+        max_message_share: float = 0.5,
+    ):
+        self.budgets = {**DEFAULT_CONTEXT_BUDGETS, **(budgets or {})}
+        self.max_message_share = max_message_share
+
+    def budget_for(self, role: str) -> int:
+        """Get the token budget configured for an LLM role."""
+        return self.budgets.get(role, DEFAULT_BUDGET)
+
+    def build(self, messages: List[BaseMessage], role: str) -> ConversationContext:
+        """Fill the role's budget with the most recent user and assistant messages."""
+        budget = self.budget_for(role)
+        max_message_tokens = max(1, int(budget * self.max_message_share))
+
+        lines = []
+        tokens_used = 0
+        tokens_dropped = 0
+        truncated_count = 0
+        oldest_included = None
+
+        # Walk newest to oldest so the most recent turns are kept first
+        for index in range(len(messages) - 1, -1, -1):
+            msg = messages[index]
+            if isinstance(msg, HumanMessage):
+                speaker = "User"
+            elif isinstance(msg, AIMessage):
+                speaker = "Assistant"
+            else:
+                continue
+
+            content = msg.content if isinstance(msg.content, str) else str(msg.content)
+            tokens = count_tokens(content)
+            remaining = budget - tokens_used
+
+            if remaining <= 0:
+                tokens_dropped += tokens
+                continue
+
+            allowed = min(tokens, max_message_tokens, remaining)
+            if allowed < tokens:
+                content = truncate_to_tokens(content, allowed)
+                tokens_dropped += tokens - allowed
+                truncated_count += 1
+
+            lines.append(f"{speaker}: {content}\n")
+            tokens_used += allowed
+            oldest_included = index
+
+        lines.reverse()
+        return ConversationContext(
+            text="".join(lines),
+            tokens_used=tokens_used,
+            tokens_dropped=tokens_dropped,
+            messages_included=len(lines),
+            messages_truncated=truncated_count,
+            oldest_included=oldest_included,
+        )
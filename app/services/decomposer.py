@@ -0,0 +1,98 @@
+"""Rule-based splitting of compound requests into independent sub-tasks."""
+
+import re
+from typing import List, Tuple
+
+from .intent_classifier import heuristic_intent
+
+MAX_SUBTASKS = 4
+
+# Words that start a new request after "and" or a comma
+_TASK_START = (
+    r"(?:summari[sz]e|calculate|compute|solve|explain|describe|define|list|tell me|give me"
+    r"|what|how|why|who|when|where|which|add|subtract|multiply|divide)\b"
+)
+
+# Explicit sequencing always separates tasks
+_SEQUENCE = re.compile(r"\s*;\s*|,?\s+(?:and\s+)?then\s+", re.IGNORECASE)
+# "and" or a comma before a task word may just join two halves of one question
+_CONJUNCTION = re.compile(
+    rf",?\s+and(?:\s+also)?\s+(?={_TASK_START})|,\s+(?:also\s+)?(?={_TASK_START})",
+    re.IGNORECASE,
+)
+# "1. ... 2. ..." or "1) ... 2) ..."
+_LIST_ITEM = re.compile(r"(?:^|\s)(\d{1,2})[.)]\s+")
+
+# Shorter parts mean "and" joined words, not tasks ("how to add and subtract")
+_MIN_PART_WORDS = 2
+
+Span = Tuple[int, int]
+
+
+def _spans(text: str, separator: re.Pattern) -> List[Span]:
+    """(start, end) of each piece of text between separator matches."""
+    spans, start = [], 0
+    for match in separator.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(text)))
+    return spans
+
+
+def _list_items(text: str) -> List[Span]:
+    """Items of a numbered list starting at 1, or [] if text is not one."""
+    matches = list(_LIST_ITEM.finditer(text))
+    numbers = [int(m.group(1)) for m in matches]
+    if len(matches) < 2 or matches[0].start() != 0 or numbers != list(range(1, len(numbers) + 1)):
+        return []
+    ends = [m.start() for m in matches[1:]] + [len(text)]
+    return [(m.end(), end) for m, end in zip(matches, ends)]
+
+
+def _words(text: str, span: Span) -> int:
+    return len(text[span[0] : span[1]].split())
+
+
+def _split_conjunctions(text: str, span: Span) -> List[Span]:
+    """Split span at "and"/commas only where the halves have different intents.
+
+    "What is X and how does it work?" is one question; "compute 15*8 and
+    explain X" is two tasks, told apart by the rule-based intent of each half.
+    """
+    start, end = span
+    pieces = [(start + a, start + b) for a, b in _spans(text[start:end], _CONJUNCTION)]
+    merged = [pieces[0]]
+    for piece in pieces[1:]:
+        previous = merged[-1]
+        if (
+            _words(text, previous) >= _MIN_PART_WORDS
+            and _words(text, piece) >= _MIN_PART_WORDS
+            and heuristic_intent(text[previous[0] : previous[1]])[0]
+            != heuristic_intent(text[piece[0] : piece[1]])[0]
+        ):
+            merged.append(piece)
+        else:
+            merged[-1] = (previous[0], piece[1])
+    return merged
+
+
+def decompose(user_input: str, max_parts: int = MAX_SUBTASKS) -> List[str]:
+    """Split user_input into sub-requests; a simple request yields one part.
+
+    Numbered lists, semicolons and "then" always split. "And"/commas before
+    a task word such as "compute" or "explain" split only when the two
+    halves classify to different intents, so "How do I add and subtract
+    fractions" stays one request. Consecutive questions stay together since
+    follow-ups often refer back ("What is X? How does it work?"). Parts
+    beyond max_parts are kept together in the last one.
+    """
+    text = user_input.strip()
+    spans = _list_items(text) or _spans(text, _SEQUENCE)
+    spans = [piece for span in spans for piece in _split_conjunctions(text, span)]
+    parts = [text[start:end].strip(" ,.") for start, end in spans]
+    parts = [p for p in parts if p]
+    if len(parts) < 2 or any(len(p.split()) < _MIN_PART_WORDS for p in parts):
+        return [user_input]
+    if len(parts) > max_parts:
+        parts = parts[: max_parts - 1] + [" and ".join(parts[max_parts - 1:])]
+    return parts
@@ -1,65 +1,140 @@
-import re
-from ..schemas import UserIntent
-from ..prompts import intent_classification_prompt
+from typing import Tuple
+
+from ..schemas import UserIntent, build_intent
+from ..prompts import default_prompt_registry
 from ..prompts.llm_gpt import OpenAIChatLLM
+from ..metrics import REGISTRY
+from ..tools import is_calculable, normalize_expression
+from .intent_parser import INTENT_MAPPING, parse_classifier_output
+from .load_shedder import SHED_TOTAL, tracked
+from .output_budget import budget_options, default_output_budgets
+
+DEGRADED_REASONING = "Degraded-mode heuristic classification"
+_REPORT_WORDS = ("report",)
+_SUMMARY_WORDS = ("summarize", "summarise", "summary", "overview", "recap", "key points")
+
+INTENTS_TOTAL = REGISTRY.counter(
+    "agent_intent_total", "Classified intents by type and source.", ["intent", "source"]
+)
+PARSE_FALLBACKS_TOTAL = REGISTRY.counter(
+    "agent_intent_parse_fallback_total",
+    "Classifier responses where a field fell back to its default.",
+    ["field"],
+)
+PARSE_QUALITY_TOTAL = REGISTRY.counter(
+    "agent_intent_parse_quality_total",
+    "Classifier responses by parse quality (full, partial, fallback).",
+    ["quality"],
+)
+
+
+def heuristic_intent(user_input: str) -> Tuple[str, float]:
+    """Rule-based intent type and confidence for user_input, without an LLM."""
+    if is_calculable(normalize_expression(user_input)):
+        return "calculation", 0.9
+    if any(word in user_input.lower() for word in _REPORT_WORDS):
+        return "report", 0.7
+    if any(word in user_input.lower() for word in _SUMMARY_WORDS):
+        return "summarization", 0.7
+    return "qa", 0.5
 
 
 class IntentClassifier:
-    """OpenAI-powered intent classification."""
+    """OpenAI-powered intent classification with an optional local model."""
 
-    def __init__(self, llm=None):
+    def __init__(
+        self,
+        llm=None,
+        local_model=None,
+        local_threshold: float = 0.85,
+        load_shedder=None,
+        model_router=None,
+        output_budgets=None,
+    ):
         self.llm = llm or OpenAIChatLLM()
-        self.intent_mapping = {
-            "CALCULATION": "calculation",
-            "SUMMARIZATION": "summarization",
-            "QA": "qa",
-        }
+        self.local_model = local_model
+        self.local_threshold = local_threshold
+        self.load_shedder = load_shedder
+        self.model_router = model_router
+        self.output_budgets = output_budgets or default_output_budgets
+        self.intent_mapping = INTENT_MAPPING
 
     def classify_intent(
-        self, user_input: str, conversation_history: str = ""
+        self, user_input: str, conversation_history: str = "", logger=None, prompts=None
     ) -> UserIntent:
-        """Classify user intent using OpenAI."""
-        prompt_text = intent_classification_prompt.format(
+        """Classify user intent, trying the local model before OpenAI.
+
+        While the load shedder is degraded, classification stays local. With
+        a model router, unparseable or low-confidence answers are retried on
+        a stronger model; logger receives its routing decisions. prompts is
+        the turn's PromptSet (the default registry's current one if None).
+        """
+        shedding = self.load_shedder is not None and not self.load_shedder.allow_llm()
+        if self.local_model is not None:
+            local_intent = self.local_model.classify(user_input)
+            if local_intent.confidence >= self.local_threshold or shedding:
+                INTENTS_TOTAL.inc(intent=local_intent.intent_type, source="local")
+                if shedding:
+                    SHED_TOTAL.inc(path="classifier")
+                return local_intent
+        if shedding:
+            SHED_TOTAL.inc(path="classifier")
+            intent = self.classify_heuristic(user_input)
+            INTENTS_TOTAL.inc(intent=intent.intent_type, source="heuristic")
+            return intent
+
+        prompts = prompts or default_prompt_registry().snapshot()
+        prompt_text = prompts.format(
+            "intent_classification",
             user_input=user_input,
             conversation_history=conversation_history or "No previous conversation.",
         )
 
-        llm_response = self.llm.generate(prompt_text)
-        return self._parse_response(llm_response)
+        # The answer is four short fields, so stop as soon as the last one is done
+        budget = self.output_budgets.for_role("classifier")
+        options = budget_options(self.llm, budget)
+        with tracked(self.load_shedder):
+            if self.model_router is None:
+                llm_response = self.llm.generate(prompt_text, **options)
+            else:
+                llm_response = self.model_router.generate(
+                    self.llm,
+                    "classifier",
+                    prompt_text,
+                    validate=self._is_confident,
+                    logger=logger,
+                    budget=budget,
+                )
+        if not options:
+            llm_response = budget.bound(llm_response)
+        intent = self._parse_response(llm_response)
+        INTENTS_TOTAL.inc(intent=intent.intent_type, source="llm")
+        return intent
 
-    def _parse_response(self, response: str) -> UserIntent:
-        """Parse OpenAI response into UserIntent."""
-        # Extract intent
-        intent_match = re.search(r"Intent:\s*([A-Z]+)", response, re.IGNORECASE)
-        intent = self.intent_mapping.get(
-            intent_match.group(1).upper() if intent_match else "QA", "qa"
+    def classify_heuristic(self, user_input: str) -> UserIntent:
+        """Cheap rule-based classification used when no LLM call is allowed."""
+        intent_type, confidence = heuristic_intent(user_input)
+        return build_intent(
+            intent_type=intent_type, confidence=confidence, reasoning=DEGRADED_REASONING
         )
 
-        # Extract confidence
-        confidence_match = re.search(r"Confidence:\s*([0-9.]+)", response)
-        confidence = float(confidence_match.group(1)) if confidence_match else 0.6
-        confidence = max(0.0, min(1.0, confidence))
+    def _is_confident(self, response: str) -> bool:
+        parsed = parse_classifier_output(response)
+        if parsed.quality == "fallback":
+            return False
+        return parsed.confidence >= self.model_router.escalate_below
 
-        # Extract reasoning
-        reasoning_match = re.search(
-            r"Reasoning:\s*(.+?)(?=\n[A-Z]|$)", response, re.DOTALL
-        )
-        reasoning = (
-            reasoning_match.group(1).strip()
-            if reasoning_match
-            else "OpenAI classification"
-        )
+    def _parse_response(self, response: str) -> UserIntent:
+        """Parse OpenAI response into UserIntent in a single pass."""
+        parsed = parse_classifier_output(response)
+        for field_name in parsed.missing:
+            PARSE_FALLBACKS_TOTAL.inc(field=field_name)
+        PARSE_QUALITY_TOTAL.inc(quality=parsed.quality)
 
-        # Extract keywords
-        keywords_match = re.search(r"Keywords_Found:\s*\[([^\]]*)\]", response)
-        keywords_text = keywords_match.group(1) if keywords_match else ""
-        keywords_found = [
-            k.strip().strip("\"'") for k in keywords_text.split(",") if k.strip()
-        ]
-
-        return UserIntent(
-            intent_type=intent,
-            confidence=confidence,
-            reasoning=reasoning,
-            keywords_found=keywords_found,
+        return build_intent(
+            intent_type=parsed.intent_type,
+            confidence=parsed.confidence,
+            reasoning=parsed.reasoning,
+            keywords_found=parsed.keywords_found,
+            parse_quality=parsed.quality,
         )
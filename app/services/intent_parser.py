@@ -0,0 +1,163 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+INTENT_MAPPING = {
+    "CALCULATION": "calculation",
+    "SUMMARIZATION": "summarization",
+    "QA": "qa",
+    "REPORT": "report",
+}
+
+DEFAULT_INTENT = "qa"
+DEFAULT_CONFIDENCE = 0.6
+DEFAULT_REASONING = "OpenAI classification"
+
+# Normalized field names accepted for each UserIntent field
+_FIELD_ALIASES = {
+    "intent": "intent",
+    "intent_type": "intent",
+    "confidence": "confidence",
+    "reasoning": "reasoning",
+    "reason": "reasoning",
+    "keywords_found": "keywords",
+    "keywords": "keywords",
+}
+
+_NUMBER = re.compile(r"(\d+(?:\.\d+)?|\.\d+)\s*(%?)")
+
+
+@dataclass
+class ParsedIntent:
+    """Fields extracted from a classifier response, plus parse quality."""
+
+    intent_type: str = DEFAULT_INTENT
+    confidence: float = DEFAULT_CONFIDENCE
+    reasoning: str = DEFAULT_REASONING
+    keywords_found: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+
+    @property
+    def quality(self) -> str:
+        """full: all required fields, fallback: no usable intent, else partial."""
+        if "intent" in self.missing:
+            return "fallback"
+        return "partial" if self.missing else "full"
+
+
+def _normalize_key(key: str) -> Optional[str]:
+    key = key.strip().strip("*#-_`0123456789. ").lower().replace(" ", "_")
+    return _FIELD_ALIASES.get(key)
+
+
+def _parse_intent(value: str) -> Optional[str]:
+    word = value.strip().strip("[]*`\"' ").split(" ")[0].strip("[]*`\"'.,")
+    return INTENT_MAPPING.get(word.upper().replace("&", ""))
+
+
+def _parse_confidence(value: str) -> Optional[float]:
+    match = _NUMBER.search(value)
+    if match is None:
+        return None
+    confidence = float(match.group(1))
+    if match.group(2) or (1.0 < confidence <= 100.0):
+        confidence /= 100.0
+    return max(0.0, min(1.0, confidence))
+
+
+def _parse_keywords(value) -> List[str]:
+    if isinstance(value, list):
+        return [str(k).strip() for k in value if str(k).strip()]
+    value = value.strip()
+    if value.startswith("["):
+        value = value[1:].split("]", 1)[0]
+    return [k.strip().strip("\"'") for k in value.split(",") if k.strip().strip("\"'")]
+
+
+def _parse_json(text: str) -> Optional[ParsedIntent]:
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    fields = {}
+    for key, value in data.items():
+        name = _normalize_key(str(key))
+        if name:
+            fields[name] = value
+    return _build(
+        intent=_parse_intent(str(fields["intent"])) if "intent" in fields else None,
+        confidence=_parse_confidence(str(fields["confidence"])) if "confidence" in fields else None,
+        reasoning=str(fields["reasoning"]).strip() if "reasoning" in fields else None,
+        keywords=_parse_keywords(fields.get("keywords", [])),
+    )
+
+
+def _build(intent, confidence, reasoning, keywords) -> ParsedIntent:
+    parsed = ParsedIntent(keywords_found=keywords)
+    if intent is not None:
+        parsed.intent_type = intent
+    else:
+        parsed.missing.append("intent")
+    if confidence is not None:
+        parsed.confidence = confidence
+    else:
+        parsed.missing.append("confidence")
+    if reasoning:
+        parsed.reasoning = reasoning
+    else:
+        parsed.missing.append("reasoning")
+    return parsed
+
+
+def parse_classifier_output(text: str) -> ParsedIntent:
+    """Parse a classifier response in a single pass over its lines.
+
+    Accepts the "Field: value" format requested by the prompt (tolerating
+    markdown bullets/bold, case and spacing drift, percentages and multi-line
+    reasoning) as well as a JSON object with the same fields.
+    """
+    stripped = text.lstrip()
+    if stripped.startswith("{") or stripped.startswith("```"):
+        parsed = _parse_json(text)
+        if parsed is not None:
+            return parsed
+
+    intent = confidence = None
+    reasoning_lines: List[str] = []
+    keywords: List[str] = []
+    in_reasoning = False
+
+    for line in text.splitlines():
+        key, sep, value = line.partition(":")
+        name = _normalize_key(key) if sep else None
+
+        if name is None:
+            label = key.strip()
+            if sep and label[:1].isupper() and len(label.split()) <= 3:
+                # An unknown "Label:" line ends the reasoning block
+                in_reasoning = False
+            elif in_reasoning and line.strip():
+                # Continuation lines belong to a multi-line reasoning field
+                reasoning_lines.append(line.strip())
+            continue
+
+        value = value.strip().strip("*_`").strip()
+        in_reasoning = name == "reasoning"
+        if name == "intent" and intent is None:
+            intent = _parse_intent(value)
+        elif name == "confidence" and confidence is None:
+            confidence = _parse_confidence(value)
+        elif name == "reasoning" and not reasoning_lines:
+            reasoning_lines.append(value)
+        elif name == "keywords" and not keywords:
+            keywords = _parse_keywords(value)
+
+    reasoning = " ".join(part for part in reasoning_lines if part) or None
+    return _build(intent, confidence, reasoning, keywords)
@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Optional
+
+from ..metrics import REGISTRY
+
+SHED_TOTAL = REGISTRY.counter(
+    "agent_load_shed_total", "Turn steps served locally instead of by the LLM.", ["path"]
+)
+
+
+class LoadShedder:
+    """Adaptive switch between the LLM and local fallbacks.
+
+    Tracks an EWMA of LLM latency and error rate, plus the server's queue
+    depth. Crossing any *_high threshold enters degraded mode; it is left
+    only once every signal is back under its *_low threshold and at least
+    min_degraded_seconds have passed, so the mode does not flap. While
+    degraded, one probe call per probe_interval still reaches the LLM so
+    recovery can be observed.
+    """
+
+    def __init__(
+        self,
+        latency_high: float = 8.0,
+        latency_low: float = 3.0,
+        error_high: float = 0.3,
+        error_low: float = 0.1,
+        queue_high: int = 24,
+        queue_low: int = 4,
+        alpha: float = 0.2,
+        min_degraded_seconds: float = 15.0,
+        probe_interval: float = 2.0,
+        queue_depth: Optional[Callable[[], int]] = None,
+        max_cached_answers: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.latency_high = latency_high
+        self.latency_low = latency_low
+        self.error_high = error_high
+        self.error_low = error_low
+        self.queue_high = queue_high
+        self.queue_low = queue_low
+        self.alpha = alpha
+        self.min_degraded_seconds = min_degraded_seconds
+        self.probe_interval = probe_interval
+        self.queue_depth = queue_depth
+        self.max_cached_answers = max_cached_answers
+        self.clock = clock
+
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.degraded = False
+        self.reason = ""
+        self._degraded_since = 0.0
+        self._last_probe = 0.0
+        self._answers: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._registries: list = []
+
+    def _evaluate(self, now: float):
+        depth = self.queue_depth() if self.queue_depth else 0
+        latency = self.latency or 0.0
+        if not self.degraded:
+            if latency > self.latency_high:
+                self.reason = "latency"
+            elif self.error_rate > self.error_high:
+                self.reason = "errors"
+            elif depth > self.queue_high:
+                self.reason = "queue"
+            else:
+                return
+            self.degraded = True
+            self._degraded_since = self._last_probe = now
+        elif (
+            now - self._degraded_since >= self.min_degraded_seconds
+            and latency < self.latency_low
+            and self.error_rate < self.error_low
+            and depth <= self.queue_low
+        ):
+            self.degraded = False
+            self.reason = ""
+
+    def record(self, latency: float, ok: bool = True):
+        """Feed one LLM call outcome into the moving averages."""
+        with self._lock:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.alpha * (latency - self.latency)
+            self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+            self._evaluate(self.clock())
+
+    @contextmanager
+    def track(self):
+        """Time an LLM call in the with-block; exceptions count as errors."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(time.perf_counter() - started, ok=False)
+            raise
+        self.record(time.perf_counter() - started, ok=True)
+
+    def allow_llm(self) -> bool:
+        """Whether the next call should go to the LLM (always true unless degraded)."""
+        with self._lock:
+            now = self.clock()
+            self._evaluate(now)
+            if not self.degraded:
+                return True
+            if now - self._last_probe >= self.probe_interval:
+                self._last_probe = now
+                return True
+            return False
+
+    @staticmethod
+    def _answer_key(question: str, version: str = "") -> str:
+        return version + ":" + " ".join(question.lower().split()).rstrip("?!. ")
+
+    def remember_answer(self, question: str, answer: str, version: str = ""):
+        """Cache an LLM answer to serve again while degraded.
+
+        version (the QA prompt's tag) keeps answers from one prompt version
+        from being served for another.
+        """
+        key = self._answer_key(question, version)
+        with self._lock:
+            self._answers[key] = answer
+            self._answers.move_to_end(key)
+            if len(self._answers) > self.max_cached_answers:
+                self._answers.popitem(last=False)
+
+    def cached_answer(self, question: str, version: str = "") -> Optional[str]:
+        with self._lock:
+            return self._answers.get(self._answer_key(question, version))
+
+    def register(self, registry=REGISTRY):
+        """Expose this shedder's gauges on registry's metrics, once per registry."""
+        with self._lock:
+            if any(r is registry for r in self._registries):
+                return
+            self._registries.append(registry)
+        registry.register_collector(self.render_metrics)
+
+    def render_metrics(self):
+        """Gauge lines for the metrics endpoint."""
+        return [
+            "# HELP agent_load_shed_degraded Whether LLM calls are being shed (1) or not (0).",
+            "# TYPE agent_load_shed_degraded gauge",
+            f"agent_load_shed_degraded {int(self.degraded)}",
+            "# HELP agent_llm_latency_ewma_seconds Moving average of LLM call latency.",
+            "# TYPE agent_llm_latency_ewma_seconds gauge",
+            f"agent_llm_latency_ewma_seconds {self.latency or 0.0:g}",
+            "# HELP agent_llm_error_rate_ewma Moving average of the LLM error rate.",
+            "# TYPE agent_llm_error_rate_ewma gauge",
+            f"agent_llm_error_rate_ewma {self.error_rate:g}",
+        ]
+
+
+def tracked(shedder: Optional[LoadShedder]):
+    """shedder.track() if a shedder is configured, else a no-op context."""
+    return shedder.track() if shedder is not None else nullcontext()
+
+
+# Shared so every conversation reacts to the same upstream health; agents
+# register its gauges when they fall back to it
+default_load_shedder = LoadShedder()
@@ -0,0 +1,266 @@
+"""Local hashed n-gram intent model trained from logged sessions."""
+
+import argparse
+import json
+import math
+import os
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..logging.compaction import LogCompactor
+from ..schemas import UserIntent, build_intent
+
+# Map agent tool names to intents for sessions logged without a classifier entry
+TOOL_INTENTS = {
+    "qa": "qa",
+    "calculator": "calculation",
+    "summarization": "summarization",
+    "report_planner": "report",
+}
+
+_WORD_PATTERN = re.compile(r"[a-z]+|\d+|[^\w\s]")
+
+LOCAL_MODEL_REASONING = "Local model classification"
+
+WEIGHTS_FILE = "weights.npy"
+BIAS_FILE = "bias.npy"
+IDF_FILE = "idf.npy"
+META_FILE = "meta.json"
+
+
+def _logged_sessions(log_dir: str) -> Iterable[dict]:
+    """Compacted sessions, then those still in session files."""
+    yield from LogCompactor(log_dir).archived_sessions()
+    for session_file in sorted(Path(log_dir).glob("session_*.json")):
+        try:
+            with open(session_file) as f:
+                yield json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+
+
+def load_session_examples(log_dir: str = "logs") -> List[Tuple[str, str]]:
+    """Build (user_query, intent) examples from SimpleLogger sessions.
+
+    Sessions are read from session files and from compacted daily archives.
+    The label is the intent assigned by the LLM classifier. Sessions that
+    predate classifier logging fall back to the agent tool that handled them,
+    and sessions answered by the local model are skipped so it never trains
+    on its own predictions.
+    """
+    examples = []
+    for session in _logged_sessions(log_dir):
+        query = session.get("user_query") or ""
+        if not query.strip():
+            continue
+
+        label = None
+        for call in session.get("tool_calls", []):
+            name = call.get("tool_name")
+            if name == "decomposer":
+                # Compound requests have no single intent to learn from
+                break
+            if name == "intent_classifier":
+                if call.get("parameters", {}).get("source") == "llm":
+                    label = call.get("result")
+                break
+            if name in TOOL_INTENTS:
+                label = TOOL_INTENTS[name]
+                break
+
+        if label:
+            examples.append((query, label))
+    return examples
+
+
+def extract_features(text: str, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Hash word uni/bigrams and character trigrams into sparse features.
+
+    Returns (indices, counts) with signed counts to reduce collision bias.
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+
+    counts: Dict[int, float] = {}
+    for gram in grams:
+        h = zlib.crc32(gram.encode("utf-8"))
+        index = h % n_features
+        sign = 1.0 if (h >> 31) & 1 == 0 else -1.0
+        counts[index] = counts.get(index, 0.0) + sign
+
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    return indices, values
+
+
+def _tfidf(values: np.ndarray, idf_values: np.ndarray) -> np.ndarray:
+    """Apply sublinear tf, idf weighting and L2 normalization."""
+    weighted = np.sign(values) * (1.0 + np.log(np.abs(values) + 1e-9)) * idf_values
+    norm = float(np.sqrt(np.dot(weighted, weighted)))
+    return weighted / norm if norm > 0 else weighted
+
+
+class LocalIntentModel:
+    """Multinomial logistic regression over hashed TF-IDF n-grams."""
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        bias: np.ndarray,
+        idf: np.ndarray,
+        labels: List[str],
+    ):
+        self.weights = weights
+        self.bias = bias
+        self.idf = idf
+        self.labels = labels
+        self.n_features = weights.shape[0]
+
+    @classmethod
+    def train(
+        cls,
+        examples: Iterable[Tuple[str, str]],
+        n_features: int = 2**18,
+        epochs: int = 8,
+        learning_rate: float = 0.5,
+        l2: float = 1e-6,
+        seed: int = 0,
+    ) -> "LocalIntentModel":
+        """Train a model with plain SGD, no GPU or external ML library needed."""
+        examples = list(examples)
+        if not examples:
+            raise ValueError("No training examples found.")
+
+        labels = sorted({label for _, label in examples})
+        label_index = {label: i for i, label in enumerate(labels)}
+        features = [extract_features(text, n_features) for text, _ in examples]
+        targets = np.array([label_index[label] for _, label in examples])
+
+        # Document frequency per hashed feature
+        df = np.zeros(n_features, dtype=np.float32)
+        for indices, _ in features:
+            df[indices] += 1.0
+        idf = np.log((1.0 + len(examples)) / (1.0 + df)).astype(np.float32) + 1.0
+
+        rows = [(indices, _tfidf(values, idf[indices])) for indices, values in features]
+
+        weights = np.zeros((n_features, len(labels)), dtype=np.float32)
+        bias = np.zeros(len(labels), dtype=np.float32)
+        rng = np.random.default_rng(seed)
+
+        for epoch in range(epochs):
+            lr = learning_rate / (1.0 + epoch)
+            for i in rng.permutation(len(rows)):
+                indices, values = rows[i]
+                logits = values @ weights[indices] + bias
+                probs = np.exp(logits - logits.max())
+                probs /= probs.sum()
+                probs[targets[i]] -= 1.0
+
+                weights[indices] -= lr * (
+                    np.outer(values, probs) + l2 * weights[indices]
+                )
+                bias -= lr * probs
+
+        return cls(weights, bias, idf, labels)
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """Return intent probabilities for text."""
+        indices, values = extract_features(text, self.n_features)
+        values = _tfidf(values, self.idf[indices])
+        logits = values @ self.weights[indices] + self.bias
+        probs = np.exp(logits - logits.max())
+        probs /= probs.sum()
+        return {label: float(p) for label, p in zip(self.labels, probs)}
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Return the most likely intent and its probability."""
+        probs = self.predict_proba(text)
+        label = max(probs, key=probs.get)
+        return label, probs[label]
+
+    def evaluate(self, examples: Iterable[Tuple[str, str]]) -> float:
+        """Return accuracy on labeled examples."""
+        examples = list(examples)
+        if not examples:
+            return math.nan
+        correct = sum(self.predict(text)[0] == label for text, label in examples)
+        return correct / len(examples)
+
+    def save(self, model_dir: str) -> None:
+        """Save the model artifact to a directory."""
+        path = Path(model_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / WEIGHTS_FILE, self.weights)
+        np.save(path / BIAS_FILE, self.bias)
+        np.save(path / IDF_FILE, self.idf)
+        with open(path / META_FILE, "w") as f:
+            json.dump({"labels": self.labels, "n_features": self.n_features}, f)
+
+    @classmethod
+    def load(cls, model_dir: str) -> "LocalIntentModel":
+        """Load a saved model, memory-mapping the large arrays."""
+        path = Path(model_dir)
+        with open(path / META_FILE) as f:
+            meta = json.load(f)
+        return cls(
+            weights=np.load(path / WEIGHTS_FILE, mmap_mode="r"),
+            bias=np.load(path / BIAS_FILE),
+            idf=np.load(path / IDF_FILE, mmap_mode="r"),
+            labels=meta["labels"],
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["LocalIntentModel"]:
+        """Load the model from INTENT_MODEL_DIR if it is set."""
+        model_dir = os.getenv("INTENT_MODEL_DIR")
+        if not model_dir or not Path(model_dir, META_FILE).exists():
+            return None
+        return cls.load(model_dir)
+
+    def classify(self, user_input: str) -> UserIntent:
+        """Classify user input into a UserIntent."""
+        label, confidence = self.predict(user_input)
+        return build_intent(
+            intent_type=label,
+            confidence=confidence,
+            reasoning=LOCAL_MODEL_REASONING,
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Train a local intent model from session logs."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--logs", default="logs", help="Session log directory")
+    parser.add_argument("--out", default="models/intent", help="Model output directory")
+    parser.add_argument("--n-features", type=int, default=2**18)
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--holdout", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    examples = load_session_examples(args.logs)
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(examples))
+    n_holdout = int(len(examples) * args.holdout)
+    holdout = [examples[i] for i in order[:n_holdout]]
+    train = [examples[i] for i in order[n_holdout:]]
+
+    model = LocalIntentModel.train(train, n_features=args.n_features, epochs=args.epochs)
+    model.save(args.out)
+
+    print(f"Trained on {len(train)} sessions, labels: {model.labels}")
+    if holdout:
+        print(f"Holdout accuracy: {model.evaluate(holdout):.3f}")
+    print(f"Saved model to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
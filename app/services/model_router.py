@@ -0,0 +1,222 @@
+"""Per-call model selection across cost tiers, with escalation."""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence
+
+from ..metrics import REGISTRY
+from .context_builder import estimate_tokens
+from .output_budget import budget_options
+
+ROUTED_CALLS_TOTAL = REGISTRY.counter(
+    "agent_model_calls_total", "LLM calls by role and routed model.", ["role", "model"]
+)
+ESCALATIONS_TOTAL = REGISTRY.counter(
+    "agent_model_escalations_total", "Calls retried on a stronger model.", ["role", "reason"]
+)
+ESTIMATED_COST_TOTAL = REGISTRY.counter(
+    "agent_model_estimated_cost_total",
+    "Estimated LLM spend from local token counts, by model.",
+    ["model"],
+)
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    """One model choice; tiers are ordered from cheapest to strongest."""
+
+    name: str
+    model: str
+    cost_per_1k_tokens: float
+    max_input_tokens: int
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    role: str
+    tier: int
+    model: str
+    reason: str
+
+
+DEFAULT_TIERS = (
+    ModelTier("small", "gpt-4o-mini", 0.0003, 4000),
+    ModelTier("large", "gpt-4o", 0.005, 100000),
+)
+# Starting tier per LLM role; roles not listed start at the cheapest tier
+DEFAULT_ROLE_TIERS = {
+    "classifier": "small",
+    "qa": "small",
+    "summarization": "small",
+    "report": "large",
+}
+
+
+class ModelRouter:
+    """Pick a model per LLM call from its role, input and observed health.
+
+    A call starts at its role's tier, moves up to the first tier whose
+    max_input_tokens fits the prompt, and one further tier when the
+    classifier's confidence is below escalate_below. If that model's
+    observed latency (EWMA) is over latency_slo, the strongest cheaper
+    tier that still fits and is within the SLO is used instead; one call
+    per probe_interval still goes to the slow model so its average can
+    recover, as LoadShedder probes do. Output
+    that fails the caller's validation is retried one tier up. Each call
+    is logged with its estimated cost and the cost of the same tokens on
+    the baseline tier (the single model used without routing).
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[ModelTier] = DEFAULT_TIERS,
+        role_tiers: Optional[Dict[str, str]] = None,
+        escalate_below: float = 0.6,
+        latency_slo: float = 6.0,
+        baseline: Optional[str] = None,
+        alpha: float = 0.2,
+        probe_interval: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not tiers:
+            raise ValueError("ModelRouter needs at least one tier")
+        self.tiers = sorted(tiers, key=lambda t: t.cost_per_1k_tokens)
+        names = [t.name for t in self.tiers]
+        self.role_tiers = {
+            role: names.index(name)
+            for role, name in {**DEFAULT_ROLE_TIERS, **(role_tiers or {})}.items()
+            if name in names
+        }
+        self.escalate_below = escalate_below
+        self.latency_slo = latency_slo
+        self.baseline = self.tiers[names.index(baseline) if baseline else -1]
+        self.alpha = alpha
+        self.probe_interval = probe_interval
+        self.clock = clock
+        self.latency: Dict[str, float] = {}
+        # Last call routed to each model that is over the SLO
+        self._last_probe: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, path: str) -> "ModelRouter":
+        """Load tiers and settings from a JSON file (see README)."""
+        with open(path) as f:
+            config = json.load(f)
+        return cls(
+            tiers=[ModelTier(**tier) for tier in config["tiers"]],
+            role_tiers=config.get("roles"),
+            escalate_below=config.get("escalate_below", 0.6),
+            latency_slo=config.get("latency_slo", 6.0),
+            baseline=config.get("baseline"),
+            probe_interval=config.get("probe_interval", 5.0),
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["ModelRouter"]:
+        """Load the router from AGENT_MODEL_TIERS if it is set."""
+        path = os.getenv("AGENT_MODEL_TIERS")
+        return cls.from_config(path) if path else None
+
+    def choose(self, role: str, prompt: str, confidence: Optional[float] = None) -> RouteDecision:
+        """Choose the tier for one call."""
+        tokens = estimate_tokens(prompt)
+        top = len(self.tiers) - 1
+        floor = next(
+            (i for i, t in enumerate(self.tiers) if tokens <= t.max_input_tokens), top
+        )
+        tier = max(self.role_tiers.get(role, 0), floor)
+        reason = "role" if tier == self.role_tiers.get(role, 0) else "long_input"
+        if confidence is not None and confidence < self.escalate_below and tier < top:
+            tier, reason = tier + 1, "low_confidence"
+
+        with self._lock:
+            model = self.tiers[tier].model
+            if self.latency.get(model, 0.0) > self.latency_slo:
+                now = self.clock()
+                if now - self._last_probe.get(model, now) >= self.probe_interval:
+                    self._last_probe[model] = now
+                    return RouteDecision(role, tier, model, "probe")
+                for lower in range(tier - 1, floor - 1, -1):
+                    if self.latency.get(self.tiers[lower].model, 0.0) <= self.latency_slo:
+                        tier, reason = lower, "slow"
+                        break
+        return RouteDecision(role, tier, self.tiers[tier].model, reason)
+
+    def escalate(self, decision: RouteDecision, reason: str) -> Optional[RouteDecision]:
+        """The same call one tier up, or None at the strongest tier."""
+        if decision.tier + 1 >= len(self.tiers):
+            return None
+        ESCALATIONS_TOTAL.inc(role=decision.role, reason=reason)
+        tier = decision.tier + 1
+        return RouteDecision(decision.role, tier, self.tiers[tier].model, reason)
+
+    def record(self, model: str, latency: float):
+        """Feed one call's latency into the model's moving average."""
+        with self._lock:
+            previous = self.latency.get(model)
+            self.latency[model] = (
+                latency if previous is None else previous + self.alpha * (latency - previous)
+            )
+            if self.latency[model] <= self.latency_slo:
+                self._last_probe.pop(model, None)
+            elif previous is None or previous <= self.latency_slo:
+                # Just went over: the first probe is due one interval from now
+                self._last_probe[model] = self.clock()
+
+    def generate(
+        self,
+        llm,
+        role: str,
+        prompt: str,
+        confidence: Optional[float] = None,
+        validate: Optional[Callable[[str], bool]] = None,
+        logger=None,
+        budget=None,
+    ) -> str:
+        """Run llm.generate on the routed model, escalating invalid output.
+
+        validate returns False for output that should be retried one tier
+        up; the last output is returned once no stronger tier is left.
+        budget is the role's OutputBudget, passed through to the llm.
+        """
+        decision = self.choose(role, prompt, confidence)
+        options = budget_options(llm, budget)
+        while True:
+            started = time.perf_counter()
+            try:
+                text = llm.generate(prompt, model=decision.model, **options)
+            finally:
+                elapsed = time.perf_counter() - started
+                self.record(decision.model, elapsed)
+            self._account(decision, prompt, text, elapsed, logger)
+            if validate is None or validate(text):
+                return text
+            escalated = self.escalate(decision, "validation")
+            if escalated is None:
+                return text
+            decision = escalated
+
+    def _account(self, decision: RouteDecision, prompt: str, text: str, elapsed: float, logger):
+        tokens = estimate_tokens(prompt) + estimate_tokens(text)
+        tier = self.tiers[decision.tier]
+        cost = tokens / 1000 * tier.cost_per_1k_tokens
+        ROUTED_CALLS_TOTAL.inc(role=decision.role, model=decision.model)
+        ESTIMATED_COST_TOTAL.inc(cost, model=decision.model)
+        if logger is not None:
+            logger.log_tool_call(
+                "model_router",
+                {
+                    "role": decision.role,
+                    "tier": tier.name,
+                    "reason": decision.reason,
+                    "tokens": tokens,
+                    "latency": round(elapsed, 4),
+                    "cost": round(cost, 6),
+                    "baseline_cost": round(tokens / 1000 * self.baseline.cost_per_1k_tokens, 6),
+                },
+                decision.model,
+            )
@@ -0,0 +1,161 @@
+"""Per-role limits on LLM output size, early stopping and history size."""
+
+import inspect
+import os
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+from ..metrics import REGISTRY
+from .context_builder import estimate_tokens, truncate_head
+
+# max_tokens sent with each LLM role's requests
+DEFAULT_OUTPUT_BUDGETS = {
+    "classifier": 128,
+    "qa": 512,
+    "summarization": 640,
+    "report": 768,
+}
+DEFAULT_OUTPUT_BUDGET = 512
+# Tokens of an answer kept in conversation history and the memory store.
+# The user still gets the whole answer; later prompts only need its gist.
+HISTORY_ANSWER_TOKENS = 256
+
+OUTPUT_LIMIT_TOTAL = REGISTRY.counter(
+    "agent_output_limit_total",
+    "LLM outputs cut short by role and limit "
+    "(max_tokens, stop_condition, truncated, history).",
+    ["role", "limit"],
+)
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_KEYWORDS_LINE = re.compile(r"^\s*Keywords_Found:.*\n", re.MULTILINE)
+
+# A stop condition gets the output streamed so far and returns the text to
+# keep once generation should stop, or None to keep going
+StopCondition = Callable[[str], Optional[str]]
+
+
+def classifier_complete(text: str) -> Optional[str]:
+    """Stop a classifier answer once its last field, Keywords_Found, is complete."""
+    match = _KEYWORDS_LINE.search(text)
+    return text[: match.end()].rstrip() if match else None
+
+
+def repeated_paragraph(text: str) -> Optional[str]:
+    """Stop when a finished paragraph repeats an earlier one, dropping the repeat."""
+    # The last piece is still being written, so only compare finished ones
+    pieces = _PARAGRAPH_BREAK.split(text)[:-1]
+    seen = set()
+    for i, piece in enumerate(pieces):
+        normalized = " ".join(piece.split()).lower()
+        if not normalized:
+            continue
+        if normalized in seen:
+            return "\n\n".join(pieces[:i]).rstrip()
+        seen.add(normalized)
+    return None
+
+
+DEFAULT_STOP_CONDITIONS: Dict[str, StopCondition] = {
+    "classifier": classifier_complete,
+    "qa": repeated_paragraph,
+    "summarization": repeated_paragraph,
+    "report": repeated_paragraph,
+}
+
+
+class OutputBudget:
+    """Output limits for one LLM role, passed to the LLM client per call.
+
+    Clients send max_tokens upstream, check should_stop while streaming and
+    call limited() when a limit cut the output short.
+    """
+
+    def __init__(self, role: str, max_tokens: int, stop_when: Optional[StopCondition] = None):
+        self.role = role
+        self.max_tokens = max_tokens
+        self.stop_when = stop_when
+
+    def should_stop(self, text: str) -> Optional[str]:
+        """Text to keep if generation should stop now, else None."""
+        return self.stop_when(text) if self.stop_when is not None else None
+
+    def limited(self, limit: str):
+        """Count an output that limit cut short."""
+        OUTPUT_LIMIT_TOTAL.inc(role=self.role, limit=limit)
+
+    def bound(self, text: str) -> str:
+        """Cap text at max_tokens, for clients that could not enforce it."""
+        if estimate_tokens(text) <= self.max_tokens:
+            return text
+        self.limited("truncated")
+        return truncate_head(text, self.max_tokens)
+
+
+@lru_cache(maxsize=None)
+def _accepts_budget(llm_type) -> bool:
+    parameters = inspect.signature(llm_type.generate).parameters.values()
+    return any(p.name == "budget" or p.kind is p.VAR_KEYWORD for p in parameters)
+
+
+def budget_options(llm, budget: Optional[OutputBudget]) -> dict:
+    """Keyword arguments passing budget to llm.generate, if it takes one.
+
+    LLM clients written before output budgets only take the prompt; their
+    output is still capped afterwards by OutputBudget.bound.
+    """
+    if budget is None or not _accepts_budget(type(llm)):
+        return {}
+    return {"budget": budget}
+
+
+class OutputBudgets:
+    """Output budgets and stop conditions for every LLM role."""
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, int]] = None,
+        stop_conditions: Optional[Dict[str, StopCondition]] = None,
+        history_tokens: int = HISTORY_ANSWER_TOKENS,
+    ):
+        self.budgets = {**DEFAULT_OUTPUT_BUDGETS, **(budgets or {})}
+        self.stop_conditions = {**DEFAULT_STOP_CONDITIONS, **(stop_conditions or {})}
+        self.history_tokens = history_tokens
+        self._roles: Dict[str, OutputBudget] = {}
+
+    @classmethod
+    def from_env(cls) -> "OutputBudgets":
+        """Budgets overridden by AGENT_OUTPUT_BUDGETS ("qa=300,report=900")
+        and AGENT_HISTORY_ANSWER_TOKENS, if set."""
+        budgets = {}
+        for entry in filter(None, os.getenv("AGENT_OUTPUT_BUDGETS", "").split(",")):
+            role, _, tokens = entry.partition("=")
+            budgets[role.strip()] = int(tokens)
+        history_tokens = int(os.getenv("AGENT_HISTORY_ANSWER_TOKENS", HISTORY_ANSWER_TOKENS))
+        return cls(budgets, history_tokens=history_tokens)
+
+    def for_role(self, role: str) -> OutputBudget:
+        """Get the OutputBudget for an LLM role."""
+        budget = self._roles.get(role)
+        if budget is None:
+            budget = OutputBudget(
+                role,
+                self.budgets.get(role, DEFAULT_OUTPUT_BUDGET),
+                self.stop_conditions.get(role),
+            )
+            self._roles[role] = budget
+        return budget
+
+    def for_history(self, text: str, role: str = "history") -> str:
+        """Shorten an answer before it is kept in history or memory."""
+        tokens = estimate_tokens(text)
+        if tokens <= self.history_tokens:
+            return text
+        OUTPUT_LIMIT_TOTAL.inc(role=role, limit="history")
+        head = truncate_head(text, self.history_tokens)
+        omitted = tokens - estimate_tokens(head)
+        return f"{head} [answer shortened, {omitted} tokens omitted]"
+
+
+default_output_budgets = OutputBudgets.from_env()
@@ -1,3 +1,4 @@
-from .calculator import langchain_calculate
+from .calculator import langchain_calculate, cached_calculate, is_calculable
+from .normalizer import normalize_expression
 
-__all__ = ["langchain_calculate"]
+__all__ = ["langchain_calculate", "cached_calculate", "is_calculable", "normalize_expression"]
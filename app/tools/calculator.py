@@ -1,6 +1,13 @@
+from functools import lru_cache
+from typing import Optional, Tuple
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
 import re
+from ..metrics import REGISTRY
+
+CALCULATOR_ERRORS = REGISTRY.counter(
+    "agent_calculator_errors_total", "Calculator errors by type.", ["type"]
+)
 
 
 class CalculatorInput(BaseModel):
@@ -9,34 +16,70 @@ class CalculatorInput(BaseModel):
     )
 
 
-@tool(
-    "calculator",
-    args_schema=CalculatorInput,
-    return_direct=True,
-    description="Safely evaluate a mathematical expression. Supports numbers, +, -, *, /, and parentheses.",
-)
-def langchain_calculate(expression: str) -> str:
-    """LangChain-compatible calculator tool."""
+_INVALID = "Invalid expression. Only numbers and operators (+, -, *, /, parentheses) are allowed."
+
+
+def _evaluate(expression: str) -> Tuple[str, Optional[str]]:
+    """Result text of an expression and its error type, None on success."""
     expr = expression.strip()
 
     # Check for empty expression
     if not expr:
-        return "Invalid expression. Only numbers and operators (+, -, *, /, parentheses) are allowed."
+        return _INVALID, "empty"
 
     # Check if contains only allowed characters
     if not re.match(r"^[0-9+\-*/().\s]+$", expr):
-        return "Invalid expression. Only numbers and operators (+, -, *, /, parentheses) are allowed."
+        return _INVALID, "invalid_characters"
 
     # Must contain at least one digit
     if not re.search(r"\d", expr):
-        return "Invalid expression. Only numbers and operators (+, -, *, /, parentheses) are allowed."
+        return _INVALID, "no_digits"
 
     try:
-        result = str(eval(expr))
-        return result
+        return str(eval(expr)), None
     except ZeroDivisionError:
-        return "Error: Division by zero."
+        return "Error: Division by zero.", "zero_division"
     except SyntaxError:
-        return "Error: Invalid syntax in expression."
+        return "Error: Invalid syntax in expression.", "syntax"
     except Exception as e:
-        return f"Error: {str(e)}"
+        return f"Error: {str(e)}", type(e).__name__
+
+
+def _counted(outcome: Tuple[str, Optional[str]]) -> str:
+    result, error = outcome
+    if error is not None:
+        CALCULATOR_ERRORS.inc(type=error)
+    return result
+
+
+@tool(
+    "calculator",
+    args_schema=CalculatorInput,
+    return_direct=True,
+    description="Safely evaluate a mathematical expression. Supports numbers, +, -, *, /, and parentheses.",
+)
+def langchain_calculate(expression: str) -> str:
+    """LangChain-compatible calculator tool."""
+    return _counted(_evaluate(expression))
+
+
+@lru_cache(maxsize=1024)
+def _cached_evaluate(expression: str) -> Tuple[str, Optional[str]]:
+    return _evaluate(expression)
+
+
+def cached_calculate(expression: str) -> str:
+    """Evaluate a canonical expression, reusing results for repeated inputs.
+
+    Errors are counted on every call, including ones served from the cache.
+    """
+    return _counted(_cached_evaluate(expression))
+
+
+cached_calculate.cache_info = _cached_evaluate.cache_info
+cached_calculate.cache_clear = _cached_evaluate.cache_clear
+
+
+def is_calculable(expression: str) -> bool:
+    """Whether expression evaluates, for probes that are not calculator errors."""
+    return _cached_evaluate(expression)[1] is None
@@ -0,0 +1,134 @@
+import re
+
+# Phrases stripped from the start and end of a calculation request
+_PREFIXES = (
+    "please",
+    "can you",
+    "could you",
+    "calculate",
+    "compute",
+    "evaluate",
+    "solve",
+    "what is",
+    "what's",
+    "whats",
+    "how much is",
+    "the result of",
+    "the value of",
+)
+_PREFIX_PATTERN = re.compile(
+    r"^(?:" + "|".join(re.escape(p) for p in sorted(_PREFIXES, key=len, reverse=True)) + r")\b"
+)
+_SUFFIX_PATTERN = re.compile(r"(?:\b(?:please|equals?)|=)$")
+
+_UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11,
+    "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60,
+    "seventy": 70, "eighty": 80, "ninety": 90,
+}
+_SCALES = {"thousand": 1000, "million": 1000000, "billion": 1000000000}
+
+_NUM = r"(-?\d+(?:\.\d+)?)"
+
+# Verb phrases with both operands, applied before the binary operator words
+_VERB_PATTERNS = [
+    (re.compile(rf"\b(?:add|sum of)\s+{_NUM}\s+(?:and|to|with)\s+{_NUM}"), r"\1 + \2"),
+    (re.compile(rf"\bsubtract\s+{_NUM}\s+from\s+{_NUM}"), r"\2 - \1"),
+    (re.compile(rf"\b(?:difference between)\s+{_NUM}\s+and\s+{_NUM}"), r"\1 - \2"),
+    (re.compile(rf"\bmultiply\s+{_NUM}\s+(?:by|and|with)\s+{_NUM}"), r"\1 * \2"),
+    (re.compile(rf"\bproduct of\s+{_NUM}\s+and\s+{_NUM}"), r"\1 * \2"),
+    (re.compile(rf"\bdivide\s+{_NUM}\s+by\s+{_NUM}"), r"\1 / \2"),
+    (re.compile(rf"\bquotient of\s+{_NUM}\s+and\s+{_NUM}"), r"\1 / \2"),
+    (re.compile(rf"{_NUM}\s+squared\b"), r"(\1 ** 2)"),
+    (re.compile(rf"{_NUM}\s+cubed\b"), r"(\1 ** 3)"),
+]
+
+_OPERATOR_WORDS = [
+    (re.compile(r"\bmultiplied by\b|\btimes\b|×|(?<=\d)\s*x\s*(?=\d)"), " * "),
+    (re.compile(r"\bdivided by\b|\bover\b|÷"), " / "),
+    (re.compile(r"\bplus\b"), " + "),
+    (re.compile(r"\bminus\b"), " - "),
+]
+
+_PERCENT_OF = re.compile(rf"{_NUM}\s*(?:%|percent)\s+of\s+")
+_PERCENT = re.compile(rf"{_NUM}\s*(?:%|percent)")
+_ALLOWED = re.compile(r"^[0-9+\-*/().\s]+$")
+_EXPR_TOKEN = re.compile(r"\d+(?:\.\d*)?|\.\d+|\*\*|[-+*/()]")
+
+
+def _replace_number_words(text: str) -> str:
+    """Replace spelled-out numbers such as "twenty five" with digits."""
+    words = re.sub(r"(?<=[a-z])-(?=[a-z])", " ", text).split()
+    out = []
+    i = 0
+    while i < len(words):
+        word = words[i]
+        if word not in _UNITS and word not in _SCALES and word != "hundred":
+            out.append(word)
+            i += 1
+            continue
+
+        total = current = 0
+        while i < len(words):
+            word = words[i]
+            if word in _UNITS:
+                current += _UNITS[word]
+            elif word == "hundred":
+                current = (current or 1) * 100
+            elif word in _SCALES:
+                total += (current or 1) * _SCALES[word]
+                current = 0
+            elif (
+                word == "and"
+                and words[i - 1] in ("hundred", *_SCALES)
+                and i + 1 < len(words)
+                and words[i + 1] in _UNITS
+            ):
+                pass
+            else:
+                break
+            i += 1
+        out.append(str(total + current))
+    return " ".join(out)
+
+
+def _strip_phrases(text: str) -> str:
+    """Strip filler phrases and trailing punctuation until nothing changes."""
+    previous = None
+    while text != previous:
+        previous = text
+        text = text.strip().strip("?!.,:").strip()
+        text = _PREFIX_PATTERN.sub("", text)
+        text = _SUFFIX_PATTERN.sub("", text)
+    return text.strip()
+
+
+def normalize_expression(text: str) -> str:
+    """Turn a natural-language calculation request into a canonical expression.
+
+    Handles number words, percentages and operator words, e.g.
+    "what is 15% of 200" -> "15 / 100 * 200" and "add 3 and 4" -> "3 + 4".
+    Input that still is not a plain arithmetic expression is returned
+    cleaned but otherwise unchanged so the calculator can reject it.
+    """
+    expression = _strip_phrases(text.lower())
+    expression = _replace_number_words(expression)
+
+    for pattern, replacement in _VERB_PATTERNS:
+        expression = pattern.sub(replacement, expression)
+
+    expression = _PERCENT_OF.sub(r"\1 / 100 * ", expression)
+    expression = _PERCENT.sub(r"(\1 / 100)", expression)
+
+    for pattern, replacement in _OPERATOR_WORDS:
+        expression = pattern.sub(replacement, expression)
+
+    expression = _strip_phrases(expression)
+    if not _ALLOWED.match(expression):
+        return expression
+
+    # Canonical spacing so equivalent inputs share a cache entry
+    return " ".join(_EXPR_TOKEN.findall(expression))
@@ -1,21 +1,45 @@
-"""Workflow module for the report-building agent."""
+"""Workflow module for the report-building agent.
 
-from .workflow import create_workflow
-from .state import AgentState
-from .nodes import (
-    classify_intent,
-    qa_agent,
-    summarization_agent,
-    calculation_agent,
-    update_memory,
-)
+Names are imported on first use, so langgraph is only loaded once a
+workflow is actually needed.
+"""
 
-__all__ = [
-    "create_workflow",
-    "AgentState",
-    "classify_intent",
-    "qa_agent",
-    "summarization_agent",
-    "calculation_agent",
-    "update_memory",
-]
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    "build_workflow": ".workflow",
+    "create_workflow": ".workflow",
+    "DEFAULT_CONFIDENCE_THRESHOLDS": ".workflow",
+    "AgentState": ".state",
+    "classify_intent": ".nodes",
+    "qa_agent": ".nodes",
+    "summarization_agent": ".nodes",
+    "calculation_agent": ".nodes",
+    "clarify": ".nodes",
+    "run_subtask": ".decompose",
+    "merge_subtasks": ".decompose",
+    "plan_report": ".report",
+    "write_section": ".report",
+    "assemble_report": ".report",
+    "REPORT_MAX_CONCURRENCY": ".report",
+    "update_memory": ".nodes",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .workflow import build_workflow, create_workflow, DEFAULT_CONFIDENCE_THRESHOLDS
+    from .state import AgentState
+    from .nodes import (
+        classify_intent,
+        qa_agent,
+        summarization_agent,
+        calculation_agent,
+        clarify,
+        update_memory,
+    )
+    from .decompose import run_subtask, merge_subtasks
+    from .report import plan_report, write_section, assemble_report, REPORT_MAX_CONCURRENCY
@@ -0,0 +1,129 @@
+"""Compound requests: split into sub-tasks, run them in parallel, merge."""
+
+from datetime import datetime
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.types import Send
+
+from ..metrics import timed_node
+from ..schemas import build_answer
+from ..services import decompose
+from .nodes import (
+    calculation_agent,
+    clarify,
+    get_intent_classifier,
+    log_intent,
+    qa_agent,
+    summarization_agent,
+)
+
+# Specialist node per sub-task intent; anything else is answered as QA
+SUBTASK_NODES = {
+    "qa": qa_agent,
+    "calculation": calculation_agent,
+    "summarization": summarization_agent,
+}
+
+
+def fan_out_subtasks(state, thresholds):
+    """Entry router: one run_subtask per part of a compound request.
+
+    Splitting is rule-based (no LLM call); single requests, and turns with
+    an attached document, continue to classify_intent as usual.
+    """
+    if state.get("document") is not None:
+        return "classify_intent"
+    parts = decompose(state["user_input"])
+    if len(parts) < 2:
+        return "classify_intent"
+    state.get("logger").log_tool_call("decomposer", {"parts": len(parts)}, " | ".join(parts))
+    shared = {
+        key: state.get(key)
+        for key in (
+            "logger",
+            "classifier",
+            "memory_store",
+            "conversation_id",
+            "retriever",
+            "load_shedder",
+            "model_router",
+            "prompts",
+        )
+    }
+    return [
+        Send(
+            "run_subtask",
+            {
+                **shared,
+                "subtask": {"index": index, "text": text, "thresholds": thresholds},
+                "messages": state.get("messages", []),
+                "memory": state.get("memory", []),
+            },
+        )
+        for index, text in enumerate(parts)
+    ]
+
+
+@timed_node
+def run_subtask(state):
+    """Classify one sub-task and answer it with the matching node."""
+    subtask = state["subtask"]
+    text = subtask["text"]
+    intent = get_intent_classifier(state).classify_intent(
+        text, logger=state.get("logger"), prompts=state.get("prompts")
+    )
+    # Logged per part; the session's earlier decomposer entry keeps compound
+    # turns out of local model training data
+    log_intent(state.get("logger"), intent, part=subtask["index"])
+    if intent.confidence < subtask["thresholds"].get(intent.intent_type, 0.0):
+        node = clarify
+    else:
+        node = SUBTASK_NODES.get(intent.intent_type, qa_agent)
+
+    result = node(
+        {
+            **state,
+            "user_input": text,
+            "intent": intent,
+            "response": None,
+            "messages": state["messages"] + [HumanMessage(content=text)],
+        }
+    )
+    response = result["response"]
+    return {
+        "subtask_results": [
+            {
+                "index": subtask["index"],
+                "text": text,
+                "intent": intent.intent_type,
+                "answer": response.answer,
+                "sources": response.sources,
+                "confidence": response.confidence,
+            }
+        ]
+    }
+
+
+@timed_node
+def merge_subtasks(state):
+    """Merge sub-task answers, in request order, into one response."""
+    user_input = state["user_input"]
+    results = state.get("subtask_results", [])
+    answer = "\n\n".join(f"{r['index'] + 1}. {r['text']}\n{r['answer']}" for r in results)
+    # Part number prefixes keep each source attributable to its sub-task
+    sources = [f"{r['index'] + 1}:{source}" for r in results for source in r["sources"]]
+
+    response = build_answer(
+        question=user_input,
+        answer=answer,
+        sources=sources,
+        # The combined answer is only as reliable as its weakest part
+        confidence=min((r["confidence"] for r in results), default=0.0),
+        timestamp=datetime.now(),
+    )
+    return {
+        **state,
+        "response": response,
+        "current_step": "merge_subtasks",
+        "messages": [HumanMessage(content=user_input), AIMessage(content=answer)],
+    }
@@ -1,27 +1,216 @@
+import re
 from datetime import datetime
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from ..schemas import AnswerResponse
-from ..tools import langchain_calculate
-from ..services import IntentClassifier
+from ..schemas import build_answer
+from ..tools import cached_calculate, normalize_expression
+from ..services import IntentClassifier, ContextBuilder, LocalIntentModel
+from ..metrics import timed_node
+from ..prompts.registry import prompts_for
+from ..services.local_intent_model import LOCAL_MODEL_REASONING
+from ..services.intent_classifier import DEGRADED_REASONING
+from ..services.load_shedder import SHED_TOTAL, tracked
+from ..services.context_builder import truncate_head, truncate_to_tokens
+from ..services.output_budget import budget_options
 
-intent_classifier = IntentClassifier()
+context_builder = ContextBuilder()
+_default_classifier = None
 
+# Memory entries kept in state; older turns live only in the memory store
+MEMORY_WINDOW = 10
+# Relevant earlier turns retrieved from the memory store for QA
+RECALL_K = 3
+# Document chunks retrieved from the knowledge base index for QA
+RETRIEVAL_K = 4
 
+# How much each node trusts its own output; the reported confidence also
+# accounts for how sure the classifier was that the node was the right one
+QA_LLM_CONFIDENCE = 0.9
+QA_GROUNDED_CONFIDENCE = 0.95
+QA_FALLBACK_CONFIDENCE = 0.3
+QA_CACHED_CONFIDENCE = 0.6
+QA_EXTRACT_CONFIDENCE = 0.5
+MEMORY_RECALL_CONFIDENCE = 1.0
+CALCULATION_CONFIDENCE = 1.0
+CALCULATION_ERROR_CONFIDENCE = 0.2
+SUMMARIZATION_CONFIDENCE = 0.8
+DOCUMENT_SUMMARY_CONFIDENCE = 0.85
+DOCUMENT_EXTRACT_CONFIDENCE = 0.4
+# Words per document chunk folded into the running summary
+SUMMARY_CHUNK_WORDS = 1500
+# Local token estimate per English word (about 2.2), rounded up, for
+# turning token budgets into the word limits prompts ask for
+TOKENS_PER_WORD = 2.5
+
+INTENT_DESCRIPTIONS = {
+    "qa": "answer a question",
+    "summarization": "summarize something",
+    "calculation": "calculate a value",
+    "report": "write a multi-section report",
+}
+
+
+def get_intent_classifier(state):
+    """Get the classifier bound to this run, or a shared default one."""
+    classifier = state.get("classifier")
+    if classifier is not None:
+        return classifier
+
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = IntentClassifier(
+            local_model=LocalIntentModel.from_env()
+        )
+    return _default_classifier
+
+
+def llm_generate(state, role: str, prompt: str, validate=None) -> str:
+    """Generate with the run's LLM, on a per-call model if a router is set.
+
+    Output is limited by the role's output budget: max_tokens upstream and
+    stop conditions while streaming, or a cap on whatever comes back for
+    clients that do not take a budget.
+    """
+    classifier = get_intent_classifier(state)
+    llm = classifier.llm
+    budget = classifier.output_budgets.for_role(role)
+    options = budget_options(llm, budget)
+    router = state.get("model_router")
+    if router is None:
+        text = llm.generate(prompt, **options)
+    else:
+        intent = state.get("intent")
+        text = router.generate(
+            llm,
+            role,
+            prompt,
+            confidence=intent.confidence if intent is not None else None,
+            validate=validate,
+            logger=state.get("logger"),
+            budget=budget,
+        )
+    # Clients that took the budget already enforced it
+    return text if options else budget.bound(text)
+
+
+def _log_context(state, role, context):
+    """Record how much conversation history was kept for an LLM call."""
+    logger = state.get("logger")
+    if logger is None:
+        return
+    logger.log_tool_call(
+        "context_builder",
+        {
+            "role": role,
+            "budget": context_builder.budget_for(role),
+            "tokens_used": context.tokens_used,
+            "tokens_dropped": context.tokens_dropped,
+            "messages_included": context.messages_included,
+            "messages_truncated": context.messages_truncated,
+        },
+    )
+
+
+def answer_confidence(state, node_confidence: float) -> float:
+    """Combine the classifier's confidence with the node's own confidence."""
+    intent = state.get("intent")
+    classifier_confidence = intent.confidence if intent is not None else 1.0
+    return round(classifier_confidence * node_confidence, 4)
+
+
+def _is_calculator_error(result: str) -> bool:
+    return result.startswith(("Invalid expression", "Error:"))
+
+
+def recall_context(state, query: str, context) -> str:
+    """Retrieve earlier turns relevant to query that context left out.
+
+    context is the conversation history built for the same prompt, so turns
+    dropped by its token budget can be recalled as well as turns that have
+    left the message window.
+    """
+    store = state.get("memory_store")
+    if store is None:
+        return ""
+    # Skip the turns whose question made it into the prompt. The current
+    # question is among them but is not in the store until the turn ends.
+    messages = state.get("messages", [])
+    kept = messages[context.oldest_included:] if context.oldest_included is not None else []
+    recent_turns = max(0, sum(1 for msg in kept if isinstance(msg, HumanMessage)) - 1)
+    entries = store.search(
+        state.get("conversation_id", ""), query, k=RECALL_K, skip_recent=recent_turns
+    )
+
+    per_entry = context_builder.budget_for("recall") // RECALL_K
+    lines = [
+        truncate_to_tokens(f"User: {e['user_input']}\nAssistant: {e['response']}", per_entry)
+        + "\n"
+        for e in entries
+    ]
+
+    logger = state.get("logger")
+    if logger is not None:
+        logger.log_tool_call(
+            "memory_recall",
+            {"k": RECALL_K, "skip_recent": recent_turns},
+            f"{len(entries)} turns",
+        )
+    return "".join(lines)
+
+
+def retrieve_documents(state, query: str):
+    """Retrieve knowledge base chunks for query as (prompt text, hits)."""
+    retriever = state.get("retriever")
+    if retriever is None:
+        return "", []
+    hits = retriever.search(query, k=RETRIEVAL_K)
+
+    per_hit = context_builder.budget_for("documents") // RETRIEVAL_K
+    lines = [
+        f"[{n}] ({hit.source})\n{truncate_to_tokens(hit.text, per_hit)}\n"
+        for n, hit in enumerate(hits, 1)
+    ]
+    sources = [hit.source for hit in hits]
+
+    logger = state.get("logger")
+    if logger is not None:
+        logger.log_tool_call(
+            "retriever", {"query": query, "k": RETRIEVAL_K}, ", ".join(sources)
+        )
+    return "".join(lines), hits
+
+
+def log_intent(logger, intent, **parameters):
+    """Log a classified intent, with the source that produced it."""
+    if logger is None:
+        return
+    source = {
+        LOCAL_MODEL_REASONING: "local",
+        DEGRADED_REASONING: "heuristic",
+    }.get(intent.reasoning, "llm")
+    logger.log_tool_call(
+        "intent_classifier",
+        {"confidence": intent.confidence, "source": source, **parameters},
+        intent.intent_type,
+    )
+
+
+@timed_node
 def classify_intent(state):
     """Classify user intent using enhanced LLM-based classification."""
     user_input = state["user_input"]
     messages = state.get("messages", [])
 
-    # Build conversation history for context
-    conversation_history = ""
-    for msg in messages[-10:]:  # Last 10 messages for context
-        if isinstance(msg, HumanMessage):
-            conversation_history += f"User: {msg.content}\n"
-        elif isinstance(msg, AIMessage):
-            conversation_history += f"Assistant: {msg.content}\n"
+    # Build conversation history within the classifier's token budget
+    context = context_builder.build(messages, "classifier")
+    _log_context(state, "classifier", context)
 
     # Classify intent
-    intent = intent_classifier.classify_intent(user_input, conversation_history)
+    intent = get_intent_classifier(state).classify_intent(
+        user_input, context.text, logger=state.get("logger"), prompts=prompts_for(state)
+    )
+
+    # Record the label so sessions can be used as local model training data
+    log_intent(state.get("logger"), intent)
 
     return {
         **state,
@@ -36,6 +225,55 @@ def classify_intent(state):
     }
 
 
+def _fallback_answer(user_input: str, conversation_context: str) -> str:
+    if conversation_context:
+        return f"Based on our conversation, here's my response to: {user_input}"
+    return f"I understand you're asking about: {user_input}. How can I help you with that?"
+
+
+def _llm_answer(state, user_input, conversation_context, recalled, documents, hits):
+    """Answer with the LLM; returns (answer, sources, node confidence)."""
+    sources = [hit.source for hit in hits]
+    shedder = state.get("load_shedder")
+    prompts = prompts_for(state)
+    try:
+        # The question, then whichever context blocks this turn has
+        blocks = [prompts.format("qa", user_input=user_input)]
+        if documents:
+            blocks.append(prompts.format("qa_documents", documents=documents))
+        if recalled:
+            blocks.append(prompts.format("qa_recalled", recalled=recalled))
+        if conversation_context:
+            blocks.append(
+                prompts.format("qa_context", conversation_context=conversation_context)
+            )
+        prompt = "\n\n".join(blocks)
+
+        with tracked(shedder):
+            answer = llm_generate(state, "qa", prompt, validate=str.strip)
+    except Exception:
+        # Fallback if OpenAI fails
+        return _fallback_answer(user_input, conversation_context), [], QA_FALLBACK_CONFIDENCE
+
+    if shedder is not None:
+        shedder.remember_answer(user_input, answer, version=prompts.get("qa").tag)
+    return answer, sources, QA_GROUNDED_CONFIDENCE if sources else QA_LLM_CONFIDENCE
+
+
+def _degraded_answer(shedder, user_input, conversation_context, hits, version=""):
+    """Answer from the answer cache, the best document chunk or a canned reply."""
+    cached = shedder.cached_answer(user_input, version=version)
+    if cached is not None:
+        return cached, ["answer_cache"], QA_CACHED_CONFIDENCE
+    if hits:
+        per_hit = context_builder.budget_for("documents") // RETRIEVAL_K
+        excerpt = truncate_to_tokens(hits[0].text, per_hit)
+        return f"From {hits[0].source}: {excerpt}", [hits[0].source], QA_EXTRACT_CONFIDENCE
+    answer = _fallback_answer(user_input, conversation_context)
+    return answer, ["degraded_mode"], QA_FALLBACK_CONFIDENCE
+
+
+@timed_node
 def qa_agent(state):
     """Handle Q&A requests using messages context."""
     user_input = state["user_input"]
@@ -57,41 +295,38 @@ def qa_agent(state):
             if last_user_msg
             else "I don't see any previous questions in our conversation."
         )
+        node_confidence = MEMORY_RECALL_CONFIDENCE
+        sources = []
     else:
         # For all other questions, use OpenAI via the intent classifier's LLM
-        # Build conversation context
-        conversation_context = ""
-        for msg in messages[-10:]:
-            if isinstance(msg, HumanMessage):
-                conversation_context += f"User: {msg.content}\n"
-            elif isinstance(msg, AIMessage):
-                conversation_context += f"Assistant: {msg.content}\n"
-
-        # Use the LLM to generate the answer
-        try:
-            # Create a simple prompt for Q&A
-            prompt = f"Please answer this question: {user_input}"
-            if conversation_context:
-                prompt += f"\n\nConversation context:\n{conversation_context}"
-
-            answer = intent_classifier.llm.generate(prompt)
-        except Exception:
-            # Fallback if OpenAI fails
-            if conversation_context:
-                answer = (
-                    f"Based on our conversation, here's my response to: {user_input}"
-                )
-            else:
-                answer = f"I understand you're asking about: {user_input}. How can I help you with that?"
+        # Build conversation context within the QA token budget
+        context = context_builder.build(messages, "qa")
+        _log_context(state, "qa", context)
+        conversation_context = context.text
+        recalled = recall_context(state, user_input, context)
+        documents, hits = retrieve_documents(state, user_input)
+
+        shedder = state.get("load_shedder")
+        if shedder is not None and not shedder.allow_llm():
+            # Degraded mode: answer without the LLM
+            SHED_TOTAL.inc(path="qa")
+            answer, sources, node_confidence = _degraded_answer(
+                shedder, user_input, conversation_context, hits,
+                version=prompts_for(state).get("qa").tag,
+            )
+        else:
+            answer, sources, node_confidence = _llm_answer(
+                state, user_input, conversation_context, recalled, documents, hits
+            )
 
     logger = state.get("logger")
     logger.log_tool_call("qa", {"question": user_input}, answer)
 
-    response = AnswerResponse(
+    response = build_answer(
         question=user_input,
         answer=answer,
-        sources=["knowledge_base"],
-        confidence=0.95,
+        sources=sources or ["knowledge_base"],
+        confidence=answer_confidence(state, node_confidence),
         timestamp=datetime.now(),
     )
     return {
@@ -102,32 +337,29 @@ def qa_agent(state):
     }
 
 
+@timed_node
 def calculation_agent(state):
     """Handle calculations using messages for context."""
     user_input = state["user_input"]
 
-    # Extract mathematical expression from input
-    # Remove common prefixes like "calculate", "compute", etc.
-    expression = user_input.lower()
-    for prefix in ["calculate", "compute", "solve", "what is", "what's"]:
-        if expression.startswith(prefix):
-            expression = expression[len(prefix) :].strip()
-            break
-
-    # Remove question marks and other non-mathematical characters at the end
-    expression = expression.rstrip("?!.")
-
-    # Use calculator tool
-    result = langchain_calculate.invoke({"expression": expression})
+    # Normalize natural language ("15% of 200", "add 3 and 4") into a
+    # canonical expression, then evaluate it through the result cache
+    expression = normalize_expression(user_input)
+    result = cached_calculate(expression)
 
     logger = state.get("logger")
     logger.log_tool_call("calculator", {"expression": expression}, result)
 
-    response = AnswerResponse(
+    node_confidence = (
+        CALCULATION_ERROR_CONFIDENCE
+        if _is_calculator_error(result)
+        else CALCULATION_CONFIDENCE
+    )
+    response = build_answer(
         question=user_input,
         answer=result,
         sources=["calculator_tool"],
-        confidence=1.0,
+        confidence=answer_confidence(state, node_confidence),
         timestamp=datetime.now(),
     )
     return {
@@ -138,11 +370,91 @@ def calculation_agent(state):
     }
 
 
+_FIRST_SENTENCE = re.compile(r"^.*?[.!?](?=\s|$)", re.DOTALL)
+
+
+def summarize_document(state, document):
+    """Fold a DocumentStream into a bounded running summary, chunk by chunk.
+
+    Only the current chunk and the summary are held in memory. Each chunk
+    goes to the LLM with the summary so far; while the load shedder is
+    degraded (or a call fails) the chunk's first sentence is kept instead.
+    Returns (summary, chunks read, chunks summarized by the LLM).
+    """
+    budget = context_builder.budget_for("summary")
+    max_words = int(budget / TOKENS_PER_WORD)
+    shedder = state.get("load_shedder")
+    prompts = prompts_for(state)
+    summary = ""
+    chunks = summarized = 0
+    for chunk in document.chunks(SUMMARY_CHUNK_WORDS):
+        chunks += 1
+        if shedder is None or shedder.allow_llm():
+            prompt = prompts.format(
+                "summary_chunk",
+                instruction=state["user_input"],
+                summary=summary or "(start of document)",
+                chunk=chunk,
+                # The template asks for "at most {budget} words"
+                budget=max_words,
+            )
+            try:
+                with tracked(shedder):
+                    summary = llm_generate(state, "summarization", prompt, validate=str.strip)
+                summarized += 1
+            except Exception:
+                pass
+            else:
+                summary = truncate_head(summary, budget)
+                continue
+        else:
+            SHED_TOTAL.inc(path="summarization")
+        match = _FIRST_SENTENCE.match(chunk)
+        sentence = match.group() if match else chunk[:200]
+        summary = truncate_head(f"{summary} {sentence}".strip(), budget)
+    return summary, chunks, summarized
+
+
+def _summarize_document_turn(state):
+    document = state["document"]
+    summary, chunks, summarized = summarize_document(state, document)
+    # Log only the content's identity, never the document text itself
+    state.get("logger").log_tool_call(
+        "summarization",
+        {"sha256": document.sha256, "bytes": document.nbytes, "chunks": chunks},
+        summary,
+    )
+    share = summarized / chunks if chunks else 0.0
+    node_confidence = (
+        DOCUMENT_EXTRACT_CONFIDENCE
+        + (DOCUMENT_SUMMARY_CONFIDENCE - DOCUMENT_EXTRACT_CONFIDENCE) * share
+    )
+    sources = [f"document:{document.sha256[:12]}"]
+    return summary or "The document is empty.", sources, node_confidence
+
+
+@timed_node
 def summarization_agent(state):
     """Handle summarization requests."""
     user_input = state["user_input"]
     messages = state.get("messages", [])
 
+    if state.get("document") is not None:
+        summary, sources, node_confidence = _summarize_document_turn(state)
+        response = build_answer(
+            question=user_input,
+            answer=summary,
+            sources=sources,
+            confidence=answer_confidence(state, node_confidence),
+            timestamp=datetime.now(),
+        )
+        return {
+            **state,
+            "response": response,
+            "current_step": "summarization_agent",
+            "messages": [AIMessage(content=summary)],
+        }
+
     # Generate summary
     if len(messages) > 2:
         summary = (
@@ -154,11 +466,11 @@ def summarization_agent(state):
     logger = state.get("logger")
     logger.log_tool_call("summarization", {"input": user_input}, summary)
 
-    response = AnswerResponse(
+    response = build_answer(
         question=user_input,
         answer=summary,
         sources=["document_processor"],
-        confidence=0.8,
+        confidence=answer_confidence(state, SUMMARIZATION_CONFIDENCE),
         timestamp=datetime.now(),
     )
     return {
@@ -169,21 +481,93 @@ def summarization_agent(state):
     }
 
 
+@timed_node
+def clarify(state):
+    """Handle low-confidence intents without an LLM call.
+
+    Inputs that evaluate as a calculation are answered locally; anything
+    else gets a clarifying question naming the classifier's best guess.
+    """
+    user_input = state["user_input"]
+    intent = state.get("intent")
+    logger = state.get("logger")
+
+    result = cached_calculate(normalize_expression(user_input))
+    if not _is_calculator_error(result):
+        # A valid calculation confirms the intent regardless of the classifier
+        answer, sources, confidence = result, ["calculator_tool"], CALCULATION_CONFIDENCE
+    else:
+        guess = INTENT_DESCRIPTIONS.get(intent.intent_type if intent else "qa")
+        answer = (
+            f"I'm not sure what you'd like me to do with: {user_input}. "
+            f"Did you want me to {guess}? Please rephrase or add more detail."
+        )
+        sources = ["clarification"]
+        confidence = answer_confidence(state, 1.0)
+
+    logger.log_tool_call(
+        "clarify",
+        {
+            "intent": intent.intent_type if intent else None,
+            "confidence": intent.confidence if intent else None,
+        },
+        answer,
+    )
+
+    response = build_answer(
+        question=user_input,
+        answer=answer,
+        sources=sources,
+        confidence=confidence,
+        timestamp=datetime.now(),
+    )
+    return {
+        **state,
+        "response": response,
+        "current_step": "clarify",
+        "messages": [AIMessage(content=answer)]
+    }
+
+
+@timed_node
 def update_memory(state):
     """Update memory with conversation from messages."""
     messages = state.get("messages", [])
     current_memory = state.get("memory", [])
+    answer = state["response"].answer if state["response"] else ""
+
+    # Long answers go back to the user in full, but history and memory keep
+    # a shortened copy so later prompts and recalls stay small
+    budgets = get_intent_classifier(state).output_budgets
+    intent = state.get("intent")
+    role = intent.intent_type if intent is not None else "history"
+    history = []
+    last = messages[-1] if messages else None
+    if isinstance(last, AIMessage) and isinstance(last.content, str):
+        shortened = budgets.for_history(last.content, role)
+        if shortened != last.content:
+            # Same id, so add_messages replaces the message in place
+            history = [AIMessage(content=shortened, id=last.id)]
+        answer = shortened if last.content == answer else budgets.for_history(answer, role)
+    else:
+        answer = budgets.for_history(answer, role)
 
     # Add memory entry
     memory_entry = {
         "user_input": state["user_input"],
-        "response": state["response"].answer if state["response"] else "",
+        "response": answer,
         "timestamp": datetime.now().isoformat(),
         "messages_count": len(messages),
     }
 
+    # Persist the turn and keep only a bounded window in state
+    store = state.get("memory_store")
+    if store is not None:
+        store.add(state.get("conversation_id", ""), memory_entry)
+
     return {
         **state,
-        "memory": current_memory + [memory_entry],
+        "messages": history,
+        "memory": (current_memory + [memory_entry])[-MEMORY_WINDOW:],
         "current_step": "update_memory"
     }
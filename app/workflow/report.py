@@ -0,0 +1,166 @@
+"""Report subgraph: plan sections, write them in parallel, then assemble."""
+
+import re
+from datetime import datetime
+from typing import List
+
+from langchain_core.messages import AIMessage
+from langgraph.types import Send
+
+from ..metrics import timed_node
+from ..prompts.registry import prompts_for
+from ..schemas import build_answer
+from ..services.load_shedder import SHED_TOTAL, tracked
+from ..tools import cached_calculate, normalize_expression
+from .nodes import answer_confidence, llm_generate, _is_calculator_error
+
+MAX_REPORT_SECTIONS = 10
+DEFAULT_REPORT_SECTIONS = 4
+DEFAULT_SECTION_TITLES = ["Overview", "Key Figures", "Analysis", "Conclusion"]
+# Sections written at once when the caller does not set max_concurrency
+REPORT_MAX_CONCURRENCY = 4
+REPORT_CONFIDENCE = 0.85
+
+_SECTION_COUNT = re.compile(r"(\d+)[\s-]*sections?\b", re.IGNORECASE)
+_PLAN_LINE = re.compile(r"^\s*(?:[-*•]|\d+[.)])?\s*(?:section\s*\d+\s*[:.-]\s*)?", re.IGNORECASE)
+_CALC_MARKER = re.compile(r"\[\[calc:\s*(.+?)\]\]")
+
+
+def requested_sections(user_input: str) -> int:
+    """Number of sections asked for ("a 10-section report"), within limits."""
+    match = _SECTION_COUNT.search(user_input)
+    count = int(match.group(1)) if match else DEFAULT_REPORT_SECTIONS
+    return max(1, min(count, MAX_REPORT_SECTIONS))
+
+
+def parse_plan(text: str, count: int) -> List[str]:
+    """Extract up to count section titles from a numbered or bulleted list."""
+    titles = []
+    for line in text.splitlines():
+        title = _PLAN_LINE.sub("", line, count=1).strip().strip("*#").strip()
+        if title and title not in titles:
+            titles.append(title)
+    return titles[:count]
+
+
+def fill_figures(text: str) -> str:
+    """Replace [[calc: expression]] markers with locally computed values."""
+
+    def compute(match):
+        result = cached_calculate(normalize_expression(match.group(1)))
+        return match.group(0) if _is_calculator_error(result) else result
+
+    return _CALC_MARKER.sub(compute, text)
+
+
+@timed_node
+def plan_report(state):
+    """Plan the report's section titles."""
+    user_input = state["user_input"]
+    count = requested_sections(user_input)
+    shedder = state.get("load_shedder")
+
+    titles = []
+    if shedder is None or shedder.allow_llm():
+        prompt = prompts_for(state).format("report_plan", count=count, topic=user_input)
+        try:
+            with tracked(shedder):
+                text = llm_generate(
+                    state, "report", prompt, validate=lambda text: parse_plan(text, count)
+                )
+                titles = parse_plan(text, count)
+        except Exception:
+            titles = []
+    else:
+        SHED_TOTAL.inc(path="report")
+
+    if not titles:
+        titles = DEFAULT_SECTION_TITLES[:count]
+
+    logger = state.get("logger")
+    logger.log_tool_call(
+        "report_planner", {"topic": user_input, "sections": count}, "; ".join(titles)
+    )
+
+    return {
+        **state,
+        "report_plan": titles,
+        "current_step": "plan_report",
+    }
+
+
+def fan_out_sections(state):
+    """Send one write_section task per planned section."""
+    return [
+        Send(
+            "write_section",
+            {
+                "user_input": state["user_input"],
+                "report_section": {"index": index, "title": title, "plan": state["report_plan"]},
+                "classifier": state.get("classifier"),
+                "logger": state.get("logger"),
+                "load_shedder": state.get("load_shedder"),
+                "model_router": state.get("model_router"),
+                "prompts": state.get("prompts"),
+            },
+        )
+        for index, title in enumerate(state["report_plan"])
+    ]
+
+
+@timed_node
+def write_section(state):
+    """Write one report section; runs in parallel with its siblings."""
+    section = state["report_section"]
+    shedder = state.get("load_shedder")
+    ok = False
+
+    if shedder is None or shedder.allow_llm():
+        outline = "\n".join(f"- {title}" for title in section["plan"])
+        prompt = prompts_for(state).format(
+            "report_section", title=section["title"], topic=state["user_input"], outline=outline
+        )
+        try:
+            with tracked(shedder):
+                text = llm_generate(state, "report", prompt, validate=str.strip)
+            text = fill_figures(text)
+            ok = True
+        except Exception:
+            text = "This section could not be generated."
+    else:
+        SHED_TOTAL.inc(path="report")
+        text = "This section is unavailable while the service is under heavy load."
+
+    logger = state.get("logger")
+    logger.log_tool_call(
+        "report_section", {"index": section["index"], "title": section["title"]}, text
+    )
+
+    return {"report_sections": [{**section, "text": text, "ok": ok}]}
+
+
+@timed_node
+def assemble_report(state):
+    """Assemble the written sections in plan order."""
+    user_input = state["user_input"]
+    sections = state.get("report_sections", [])
+    document = f"# Report: {user_input}\n\n" + "\n\n".join(
+        f"## {s['title']}\n\n{s['text']}" for s in sections
+    )
+
+    written = sum(1 for s in sections if s["ok"])
+    completeness = written / len(sections) if sections else 0.0
+
+    response = build_answer(
+        question=user_input,
+        answer=document,
+        sources=["report_builder"],
+        confidence=answer_confidence(state, REPORT_CONFIDENCE * completeness),
+        timestamp=datetime.now(),
+    )
+    return {
+        **state,
+        "response": response,
+        "current_step": "assemble_report",
+        "messages": [AIMessage(content=document)],
+    }
@@ -3,8 +3,17 @@ from langgraph.graph import add_messages
 from langchain_core.messages import BaseMessage
 from ..schemas import UserIntent, AnswerResponse
 from app.logging import SimpleLogger
+from ..services import IntentClassifier, LoadShedder, ModelRouter
+from ..prompts import PromptSet
+from ..memory import MemoryStore
+from ..retrieval import DocumentIndex, DocumentStream
 
 
+def merge_by_index(left: List[Dict[str, Any]], right: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Reducer for results written by parallel tasks; the latest write per index wins."""
+    merged = {section["index"]: section for section in (left or []) + (right or [])}
+    return [merged[index] for index in sorted(merged)]
+
 
 class AgentState(TypedDict):
     """State schema for the agent workflow compatible with LangGraph."""
@@ -15,3 +24,16 @@ class AgentState(TypedDict):
     current_step: str
     messages: Annotated[List[BaseMessage], add_messages]
     logger: SimpleLogger
+    classifier: Optional[IntentClassifier]
+    memory_store: Optional[MemoryStore]
+    retriever: Optional[DocumentIndex]
+    load_shedder: Optional[LoadShedder]
+    model_router: Optional[ModelRouter]
+    prompts: Optional[PromptSet]
+    conversation_id: str
+    document: Optional[DocumentStream]
+    report_plan: List[str]
+    report_section: Dict[str, Any]
+    report_sections: Annotated[List[Dict[str, Any]], merge_by_index]
+    subtask: Dict[str, Any]
+    subtask_results: Annotated[List[Dict[str, Any]], merge_by_index]
@@ -1,4 +1,6 @@
-from typing import Literal
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Literal, Optional, Tuple
 from langgraph.graph import StateGraph, END
 from .state import AgentState
 from .nodes import (
@@ -6,20 +8,46 @@ from .nodes import (
     qa_agent,
     summarization_agent,
     calculation_agent,
+    clarify,
     update_memory,
 )
+from .decompose import fan_out_subtasks, run_subtask, merge_subtasks
+from .report import plan_report, fan_out_sections, write_section, assemble_report
+
+# Minimum classifier confidence per intent; below it the turn goes to the
+# cheap clarify node instead of the (possibly expensive) specialist agent
+DEFAULT_CONFIDENCE_THRESHOLDS = {
+    "qa": 0.5,
+    "summarization": 0.5,
+    "calculation": 0.4,
+    "report": 0.5,
+}
 
 
 def should_continue(
     state: AgentState,
-) -> Literal["qa_agent", "summarization_agent", "calculation_agent", "__end__"]:
+    thresholds: Optional[Dict[str, float]] = None,
+) -> Literal[
+    "qa_agent", "summarization_agent", "calculation_agent", "plan_report", "clarify", "__end__"
+]:
     """Built-in LangGraph routing function to determine next step."""
+    if thresholds is None:
+        thresholds = DEFAULT_CONFIDENCE_THRESHOLDS
+    # An attached document is always summarized, whatever the instruction says
+    if state.get("document") is not None:
+        return "summarization_agent"
+    intent = state["intent"]
+    if intent and intent.confidence < thresholds.get(intent.intent_type, 0.0):
+        return "clarify"
+
     if state["intent"] and state["intent"].intent_type == "qa":
         return "qa_agent"
     elif state["intent"] and state["intent"].intent_type == "summarization":
         return "summarization_agent"
     elif state["intent"] and state["intent"].intent_type == "calculation":
         return "calculation_agent"
+    elif state["intent"] and state["intent"].intent_type == "report":
+        return "plan_report"
     else:
         return "qa_agent"  # Default to Q&A agent
 
@@ -29,29 +57,52 @@ def should_end(state: AgentState) -> Literal["__end__"]:
     return "__end__"
 
 
-def create_workflow():
-    """Create and configure the agent workflow using LangGraph StateGraph with built-in routing."""
+def build_workflow(thresholds: Optional[Dict[str, float]] = None) -> StateGraph:
+    """Build the uncompiled StateGraph with built-in routing.
+
+    Nodes take their dependencies (logger, classifier, stores) from the run
+    state, so the graph itself holds no per-agent objects.
+    """
+    thresholds = MappingProxyType({**DEFAULT_CONFIDENCE_THRESHOLDS, **(thresholds or {})})
+
+    def route(state: AgentState):
+        return should_continue(state, thresholds)
+
+    def split(state: AgentState):
+        return fan_out_subtasks(state, thresholds)
+
     # Create StateGraph with AgentState
     workflow = StateGraph(AgentState)
 
     # Add nodes
+    workflow.add_node("run_subtask", run_subtask)
+    workflow.add_node("merge_subtasks", merge_subtasks)
     workflow.add_node("classify_intent", classify_intent)
     workflow.add_node("qa_agent", qa_agent)
     workflow.add_node("summarization_agent", summarization_agent)
     workflow.add_node("calculation_agent", calculation_agent)
+    workflow.add_node("plan_report", plan_report)
+    workflow.add_node("write_section", write_section)
+    workflow.add_node("assemble_report", assemble_report)
+    workflow.add_node("clarify", clarify)
     workflow.add_node("update_memory", update_memory)
 
-    # Set entry point
-    workflow.set_entry_point("classify_intent")
+    # Set entry point: compound requests run one sub-task per part in
+    # parallel, then merge; single requests go through intent classification
+    workflow.set_conditional_entry_point(split, ["classify_intent", "run_subtask"])
+    workflow.add_edge("run_subtask", "merge_subtasks")
+    workflow.add_edge("merge_subtasks", "update_memory")
 
     # Use LangGraph's built-in routing with should_continue
     workflow.add_conditional_edges(
         "classify_intent",
-        should_continue,
+        route,
         {
             "qa_agent": "qa_agent",
             "summarization_agent": "summarization_agent",
             "calculation_agent": "calculation_agent",
+            "plan_report": "plan_report",
+            "clarify": "clarify",
             "__end__": END,
         },
     )
@@ -60,9 +111,31 @@ def create_workflow():
     workflow.add_edge("qa_agent", "update_memory")
     workflow.add_edge("summarization_agent", "update_memory")
     workflow.add_edge("calculation_agent", "update_memory")
+    workflow.add_edge("clarify", "update_memory")
+
+    # Report: one write_section task per planned section, run in parallel
+    # (bounded by the run's max_concurrency), then joined by assemble_report
+    workflow.add_conditional_edges("plan_report", fan_out_sections, ["write_section"])
+    workflow.add_edge("write_section", "assemble_report")
+    workflow.add_edge("assemble_report", "update_memory")
 
     # Use built-in routing to end workflow
     workflow.add_conditional_edges("update_memory", should_end, {"__end__": END})
 
-    # Compile and return the workflow
-    return workflow.compile()
+    return workflow
+
+
+@lru_cache(maxsize=32)
+def _compiled_workflow(thresholds: Tuple[Tuple[str, float], ...]):
+    return build_workflow(dict(thresholds)).compile()
+
+
+def create_workflow(thresholds: Optional[Dict[str, float]] = None):
+    """Return the compiled agent workflow for this configuration.
+
+    thresholds overrides DEFAULT_CONFIDENCE_THRESHOLDS per intent. Compiled
+    graphs are immutable and cached per configuration, so every agent with
+    the same thresholds shares one instance.
+    """
+    merged = {**DEFAULT_CONFIDENCE_THRESHOLDS, **(thresholds or {})}
+    return _compiled_workflow(tuple(sorted(merged.items())))
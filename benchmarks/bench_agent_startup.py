@@ -0,0 +1,55 @@
+"""Benchmark: agent construction with a per-agent vs shared compiled graph.
+
+Usage: python benchmarks/bench_agent_startup.py [--agents N]
+
+"per-agent" rebuilds what IntegratedAgent used to build for every
+instance (a freshly compiled StateGraph and its own memory store
+connection); "shared" is the current IntegratedAgent constructor.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.memory import MemoryStore
+from app.prompts import FakeChatLLM
+from app.workflow import build_workflow
+
+
+def per_agent(llm, log_dir):
+    agent = IntegratedAgent(llm=llm, log_dir=log_dir)
+    agent.workflow = build_workflow().compile()
+    agent.memory_store = MemoryStore(os.path.join(log_dir, "memory.db"))
+    return agent
+
+
+def shared(llm, log_dir):
+    return IntegratedAgent(llm=llm, log_dir=log_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=200)
+    args = parser.parse_args()
+
+    llm = FakeChatLLM()
+    with tempfile.TemporaryDirectory() as log_dir:
+        # Warm up imports and the compiled-graph cache
+        shared(llm, log_dir)
+        for name, factory in (("per-agent", per_agent), ("shared", shared)):
+            started = time.perf_counter()
+            for _ in range(args.agents):
+                factory(llm, log_dir)
+            elapsed = time.perf_counter() - started
+            print(f"{name:<10} {elapsed / args.agents * 1e6:10.1f} us/agent")
+
+
+if __name__ == "__main__":
+    main()
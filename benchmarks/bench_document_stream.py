@@ -0,0 +1,74 @@
+"""Benchmark: peak memory of summarizing documents of growing size.
+
+Usage: python benchmarks/bench_document_stream.py [--sizes-mb 1 8 32]
+
+"string" passes the whole document as user_input, the only option before
+streaming ingestion; "stream" uses agent.summarize on the file path. Peak
+is the traced Python allocation high-water mark of the turn; each turn
+runs in a fresh conversation.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.prompts import FakeChatLLM
+
+_PARAGRAPH = (
+    "Quarterly revenue rose while operating costs stayed flat. The team shipped "
+    "three releases and closed most open incidents within a day.\n\n"
+)
+
+
+def write_document(path, size_mb):
+    block = _PARAGRAPH * (64 * 1024 // len(_PARAGRAPH))
+    with open(path, "w") as f:
+        for _ in range(size_mb * 16):
+            f.write(block)
+
+
+def run(label, turn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    turn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return f"{label:<7} {elapsed:8.2f} s {peak / 2**20:10.1f} MiB peak"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        llm = FakeChatLLM()
+        path = os.path.join(tmp, "document.txt")
+        for size_mb in args.sizes_mb:
+            write_document(path, size_mb)
+            print(f"{size_mb} MiB document")
+
+            def as_string():
+                with open(path) as f:
+                    IntegratedAgent(llm=llm, log_dir=tmp).process_input(
+                        "Summarize this: " + f.read()
+                    )
+
+            def streamed():
+                IntegratedAgent(llm=llm, log_dir=tmp).summarize(path)
+
+            print("  " + run("string", as_string))
+            print("  " + run("stream", streamed))
+
+
+if __name__ == "__main__":
+    main()
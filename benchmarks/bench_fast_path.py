@@ -0,0 +1,88 @@
+"""Micro-benchmark: validated Pydantic models vs fast-path records per turn.
+
+Usage: python benchmarks/bench_fast_path.py [--turns N]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.logging import SimpleLogger
+from app.schemas import build_answer, build_intent, validate_response
+
+
+def run_turn(logger: SimpleLogger, fast: bool, i: int):
+    """Build and log the same objects a calculation turn does."""
+    logger.start_session(f"calculate {i} * 8")
+    logger.log_tool_call(
+        "context_builder",
+        {"role": "classifier", "budget": 256, "tokens_used": 40, "tokens_dropped": 0},
+    )
+    intent = build_intent(
+        fast=fast,
+        intent_type="calculation",
+        confidence=0.95,
+        reasoning="Mathematical operation requested",
+        keywords_found=["calculate"],
+    )
+    logger.log_tool_call(
+        "intent_classifier", {"confidence": intent.confidence, "source": "llm"}, "calculation"
+    )
+    logger.log_tool_call("calculator", {"expression": f"{i} * 8"}, str(i * 8))
+    response = build_answer(
+        fast=fast,
+        question=f"calculate {i} * 8",
+        answer=str(i * 8),
+        sources=["calculator_tool"],
+        confidence=1.0,
+    )
+    logger.end_session(response.answer)
+    return validate_response(response, fast=fast)
+
+
+def measure(fast: bool, turns: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        logger = SimpleLogger(log_dir=tmp, fast_path=fast)
+        for i in range(100):  # warm up
+            run_turn(logger, fast, i)
+
+        start = time.perf_counter()
+        for i in range(turns):
+            run_turn(logger, fast, i)
+        elapsed = time.perf_counter() - start
+
+        # Median per-turn peak, so rare interning-table resizes in pathlib
+        # do not dominate the measurement
+        peaks = []
+        tracemalloc.start()
+        for i in range(200):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            run_turn(logger, fast, i)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        tracemalloc.stop()
+
+    return elapsed / turns * 1e6, statistics.median(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'us/turn':>10} {'peak bytes/turn':>16}")
+    for name, fast in (("validated", False), ("fast", True)):
+        per_turn, peak = measure(fast, args.turns)
+        print(f"{name:<10} {per_turn:>10.1f} {peak:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
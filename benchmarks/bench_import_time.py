@@ -0,0 +1,82 @@
+"""Benchmark: import time of the app's entry points, with regression budgets.
+
+Usage: python benchmarks/bench_import_time.py [--runs N] [--check]
+
+Each entry point is imported in a fresh interpreter with -X importtime; the
+best cumulative time over --runs is compared with its budget, and the heavy
+dependencies it pulled in are listed. --check exits with status 1 when any
+entry point is over budget, so it can gate CI.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Budgets in milliseconds, a few times the measured cost so that only
+# structural regressions (a new eager heavy import) trip them
+BUDGETS_MS = {
+    "app.prompts": 25,
+    "app.services": 25,
+    "app.workflow": 25,
+    "app.server": 25,
+    "app.retrieval.stream": 50,
+    "app.logging.profiler": 100,
+    "app.services.local_intent_model": 600,
+    "app.agent": 2000,
+}
+
+HEAVY_MODULES = ("openai", "langgraph", "langchain_core", "pydantic", "numpy")
+
+_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def measure(module):
+    """Cumulative import time of module in us and the heavy modules it loaded."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = match.groups()
+        if name.split(".")[0] in HEAVY_MODULES:
+            loaded.add(name.split(".")[0])
+        if not indent and (name == module or module.startswith(name + ".")):
+            total += int(cumulative)
+    return total, sorted(loaded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="Exit 1 if over budget")
+    args = parser.parse_args()
+
+    over = []
+    for module, budget in BUDGETS_MS.items():
+        runs = [measure(module) for _ in range(args.runs)]
+        best = min(total for total, _ in runs) / 1000
+        heavy = ", ".join(runs[0][1]) or "-"
+        status = "ok" if best <= budget else "OVER"
+        if best > budget:
+            over.append(module)
+        print(f"{module:<34} {best:8.1f} ms  budget {budget:5d} ms  {status:<4}  {heavy}")
+
+    if args.check and over:
+        print(f"Over budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark: legacy four-regex classifier parsing vs the single-pass parser.
+
+Usage: python benchmarks/bench_intent_parser.py [--responses FILE] [--count N]
+
+FILE holds recorded classifier responses, one JSON string per line. Without
+it, a synthetic corpus with common format drift is used.
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services import parse_classifier_output
+
+INTENT_MAPPING = {"CALCULATION": "calculation", "SUMMARIZATION": "summarization", "QA": "qa"}
+
+
+def legacy_parse(response: str):
+    """The previous IntentClassifier._parse_response, minus model construction."""
+    intent_match = re.search(r"Intent:\s*([A-Z]+)", response, re.IGNORECASE)
+    intent = INTENT_MAPPING.get(intent_match.group(1).upper() if intent_match else "QA", "qa")
+    confidence_match = re.search(r"Confidence:\s*([0-9.]+)", response)
+    try:
+        confidence = float(confidence_match.group(1)) if confidence_match else 0.6
+    except ValueError:
+        confidence = 0.6
+    confidence = max(0.0, min(1.0, confidence))
+    reasoning_match = re.search(r"Reasoning:\s*(.+?)(?=\n[A-Z]|$)", response, re.DOTALL)
+    reasoning = reasoning_match.group(1).strip() if reasoning_match else "OpenAI classification"
+    keywords_match = re.search(r"Keywords_Found:\s*\[([^\]]*)\]", response)
+    keywords_text = keywords_match.group(1) if keywords_match else ""
+    keywords = [k.strip().strip("\"'") for k in keywords_text.split(",") if k.strip()]
+    return intent, confidence, reasoning, keywords, bool(intent_match and confidence_match)
+
+
+def synthetic_responses(count: int):
+    rng = random.Random(0)
+    templates = [
+        "Intent: {i}\nConfidence: {c}\nReasoning: {r}\nKeywords_Found: [{k}]",
+        "**Intent:** {i}\n**Confidence:** {c}\n**Reasoning:** {r}\n**Keywords_Found:** [{k}]",
+        "Here is my answer.\n\nintent: {i}\nconfidence: {p}%\nreasoning: {r}\nkeywords: {k}",
+        '{{"intent": "{i}", "confidence": {c}, "reasoning": "{r}", "keywords_found": ["{k}"]}}',
+    ]
+    for _ in range(count):
+        confidence = round(rng.random(), 2)
+        yield rng.choice(templates).format(
+            i=rng.choice(list(INTENT_MAPPING)),
+            c=confidence,
+            p=int(confidence * 100),
+            r="The user asks for " + rng.choice(["a sum", "an overview", "facts"]),
+            k=rng.choice(["calculate", "summary", "what"]),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--responses", help="JSONL file of recorded responses")
+    parser.add_argument("--count", type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.responses:
+        with open(args.responses) as f:
+            responses = [json.loads(line) for line in f if line.strip()]
+    else:
+        responses = list(synthetic_responses(args.count))
+
+    for name, parse in (("legacy", legacy_parse), ("single-pass", parse_classifier_output)):
+        started = time.perf_counter()
+        results = [parse(r) for r in responses]
+        elapsed = time.perf_counter() - started
+        if name == "legacy":
+            complete = sum(1 for r in results if r[-1])
+        else:
+            complete = sum(1 for r in results if r.quality == "full")
+        print(
+            f"{name:<12} {elapsed / len(responses) * 1e6:8.2f} us/response  "
+            f"fully parsed: {complete}/{len(responses)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark: prompt formatting and chat prompt construction per call.
+
+Usage: python benchmarks/bench_prompt_format.py [--calls N]
+
+Compares str.format on the intent classification template with its
+precompiled form, and building a ChatPromptTemplate per call with the
+registry's per-snapshot cache.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+from app.prompts import PromptRegistry
+
+
+def per_call_us(fn, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    prompts = PromptRegistry(check_interval=None).snapshot()
+    compiled = prompts.get("intent_classification")
+    values = {
+        "user_input": "write a 5-section report on Q3 sales",
+        "conversation_history": "No previous conversation.",
+    }
+    assert compiled.format(**values) == compiled.template.format(**values)
+
+    def rebuild_chat():
+        return ChatPromptTemplate.from_messages(
+            [
+                ("system", prompts.get("system_qa").template),
+                MessagesPlaceholder(variable_name="conversation_history", optional=True),
+                ("human", "{user_input}"),
+            ]
+        )
+
+    rows = [
+        ("str.format", per_call_us(lambda: compiled.template.format(**values), args.calls)),
+        ("precompiled", per_call_us(lambda: compiled.format(**values), args.calls)),
+        ("chat prompt rebuilt", per_call_us(rebuild_chat, args.calls // 10)),
+        ("chat prompt cached", per_call_us(lambda: prompts.chat_prompt("qa"), args.calls)),
+    ]
+    for name, us in rows:
+        print(f"{name:<22} {us:10.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
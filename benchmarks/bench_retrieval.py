@@ -0,0 +1,74 @@
+"""Benchmark: build, open and query a DocumentIndex over synthetic documents.
+
+Usage: python benchmarks/bench_retrieval.py [--chunks N] [--queries N]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.retrieval import DocumentIndex
+
+CHUNK_WORDS = 200
+
+
+def write_corpus(docs_dir: Path, n_chunks: int, vocabulary: int, seed: int = 0):
+    """Write documents that chunk into about n_chunks chunks."""
+    rng = random.Random(seed)
+    words = [f"term{i}" for i in range(vocabulary)]
+    # Zipf-like term distribution, as in natural text
+    weights = [1.0 / (i + 1) for i in range(vocabulary)]
+    per_file = 50
+    for f in range(max(1, n_chunks // per_file)):
+        paragraphs = [
+            " ".join(rng.choices(words, weights, k=CHUNK_WORDS)) for _ in range(per_file)
+        ]
+        (docs_dir / f"doc{f:06d}.txt").write_text("\n\n".join(paragraphs))
+    return words, weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs_dir = Path(tmp, "docs")
+        docs_dir.mkdir()
+        words, weights = write_corpus(docs_dir, args.chunks, args.vocabulary)
+        index_dir = str(Path(tmp, "index"))
+
+        started = time.perf_counter()
+        # No overlap so the chunk count matches --chunks
+        stats = DocumentIndex(index_dir, chunk_overlap=0).update(str(docs_dir))
+        print(f"build:   {time.perf_counter() - started:8.2f} s for {stats['chunks']} chunks")
+
+        started = time.perf_counter()
+        index = DocumentIndex(index_dir)
+        print(f"open:    {(time.perf_counter() - started) * 1000:8.2f} ms")
+
+        rng = random.Random(1)
+        latencies = []
+        for _ in range(args.queries):
+            query = " ".join(rng.choices(words, weights, k=rng.randint(2, 6)))
+            started = time.perf_counter()
+            index.search(query, k=5)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        print(
+            f"search:  p50 {statistics.median(latencies):.2f} ms  "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Test recording and replaying LLM responses through the agent workflow."""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.prompts import CassetteLLM, CassetteMiss, FakeChatLLM
+
+
+class TestCassetteLLM(unittest.TestCase):
+    """Tests for CassetteLLM record and replay modes."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "llm.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_record_then_replay_workflow(self):
+        """Test that a recorded session replays offline with identical answers."""
+        inputs = ["What is the capital of France?", "Summarize our chat", "5 + 7"]
+        recorder = CassetteLLM(self.path, mode="record", llm=FakeChatLLM(latency=0.01))
+        agent = IntegratedAgent(llm=recorder, log_dir=self.tmp.name)
+        recorded = [agent.process_input(text).answer for text in inputs]
+
+        with open(self.path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertTrue(all(set(r) == {"k", "r", "l"} for r in records))
+        self.assertGreaterEqual(min(r["l"] for r in records), 0.01)
+
+        player = CassetteLLM(
+            self.path, mode="replay", latency_scale=0, model="fake-model"
+        )
+        agent = IntegratedAgent(llm=player, log_dir=self.tmp.name)
+        replayed = [agent.process_input(text).answer for text in inputs]
+        self.assertEqual(replayed, recorded)
+        self.assertEqual(player.misses, 0)
+        self.assertEqual(player.hits, len(records))
+
+    def test_replay_latency_is_scaled(self):
+        """Test that replay sleeps for the recorded latency times the scale."""
+        with open(self.path, "w") as f:
+            f.write("")
+        recorder = CassetteLLM(self.path, mode="record", llm=FakeChatLLM(latency=0.1))
+        recorder.generate("hello")
+
+        player = CassetteLLM(self.path, latency_scale=0.5, model="fake-model")
+        started = time.perf_counter()
+        self.assertEqual(player.generate("hello"), "Fake answer: hello")
+        self.assertGreaterEqual(time.perf_counter() - started, 0.05)
+        self.assertEqual(asyncio.run(player.agenerate("hello")), "Fake answer: hello")
+
+    def test_replay_miss_and_modes(self):
+        """Test unknown requests and invalid configurations."""
+        open(self.path, "w").close()
+        player = CassetteLLM(self.path, mode="replay")
+        with self.assertRaises(CassetteMiss):
+            player.chat([{"role": "user", "content": "never recorded"}])
+        with self.assertRaises(ValueError):
+            CassetteLLM(self.path, mode="record")
+        with self.assertRaises(ValueError):
+            CassetteLLM(self.path, mode="rewind")
+
+
+if __name__ == "__main__":
+    unittest.main()
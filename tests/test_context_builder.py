@@ -0,0 +1,76 @@
+"""Test the token-aware conversation context builder."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.services import ContextBuilder, count_tokens
+from app.services.context_builder import TOKEN_CACHE_SIZE, _token_counts
+from app.services.context_builder import truncate_to_tokens
+
+
+class TestContextBuilder(unittest.TestCase):
+    """Unit tests for ContextBuilder budgeting."""
+
+    def test_count_tokens(self):
+        """Test that words and punctuation are counted as tokens."""
+        self.assertEqual(count_tokens("What is 2 + 2?"), 6)
+        self.assertEqual(count_tokens(""), 0)
+
+    def test_token_cache_is_bounded_and_keeps_no_text(self):
+        """Test that the token count cache holds hashes, not message text."""
+        long_text = "word " * 10000
+        self.assertEqual(count_tokens(long_text), 10000)
+        self.assertEqual(count_tokens(long_text), 10000)
+        for i in range(TOKEN_CACHE_SIZE + 10):
+            count_tokens(f"message {i}")
+        self.assertEqual(len(_token_counts), TOKEN_CACHE_SIZE)
+        self.assertFalse(any(isinstance(part, str) for key in _token_counts for part in key))
+
+    def test_short_history_fits(self):
+        """Test that a short chat is kept in full and in order."""
+        builder = ContextBuilder()
+        messages = [
+            HumanMessage(content="Hello"),
+            AIMessage(content="Hi there!"),
+            SystemMessage(content="Intent classified as: qa"),
+        ]
+        context = builder.build(messages, "qa")
+        self.assertEqual(context.text, "User: Hello\nAssistant: Hi there!\n")
+        self.assertEqual(context.tokens_dropped, 0)
+        self.assertEqual(context.messages_included, 2)
+
+    def test_budget_is_respected(self):
+        """Test that older messages are dropped once the budget is spent."""
+        builder = ContextBuilder(budgets={"classifier": 20})
+        messages = [HumanMessage(content="one two three four five")] * 10
+        context = builder.build(messages, "classifier")
+        self.assertLessEqual(context.tokens_used, 20)
+        self.assertEqual(context.tokens_used + context.tokens_dropped, 50)
+
+    def test_long_message_is_truncated(self):
+        """Test that a pasted document is truncated instead of filling the window."""
+        builder = ContextBuilder(budgets={"qa": 100})
+        document = " ".join(["word"] * 1000)
+        messages = [HumanMessage(content=document), AIMessage(content="Got it.")]
+        context = builder.build(messages, "qa")
+        self.assertEqual(context.messages_truncated, 1)
+        self.assertIn("tokens omitted", context.text)
+        self.assertIn("Assistant: Got it.", context.text)
+        self.assertLessEqual(context.tokens_used, 100)
+
+    def test_truncate_keeps_head_and_tail(self):
+        """Test that truncation keeps the beginning and end of the text."""
+        text = " ".join(str(i) for i in range(100))
+        truncated = truncate_to_tokens(text, 9)
+        self.assertTrue(truncated.startswith("0 1 2 3 4 5"))
+        self.assertTrue(truncated.endswith("97 98 99"))
+
+
+if __name__ == "__main__":
+    unittest.main()
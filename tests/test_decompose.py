@@ -0,0 +1,109 @@
+"""Test multi-intent decomposition of compound requests."""
+
+import json
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.prompts import FakeChatLLM
+from app.services import LoadShedder, decompose, load_session_examples
+
+
+class TestDecompose(unittest.TestCase):
+    """Tests for splitting, concurrent sub-tasks and the merged answer."""
+
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.log_dir.cleanup()
+
+    def make_agent(self, llm):
+        return IntegratedAgent(llm=llm, log_dir=self.log_dir.name, load_shedder=LoadShedder())
+
+    def test_split_rules(self):
+        """Test which inputs are split and which stay whole."""
+        self.assertEqual(
+            decompose("summarize this and then compute 15*8 and explain X"),
+            ["summarize this", "compute 15*8", "explain X"],
+        )
+        self.assertEqual(
+            decompose("calculate 15% of 200; what is inflation?"),
+            ["calculate 15% of 200", "what is inflation?"],
+        )
+        self.assertEqual(
+            decompose("1. compute 2+2 2. explain rain"), ["compute 2+2", "explain rain"]
+        )
+        for text in (
+            "What is the difference between A and B?",
+            "add 3 and 4",
+            "how to add and subtract",
+            "What is AI? How does it work?",
+            "How do I add and subtract fractions",
+            "If the price is 20, what is the tax at 15%?",
+            "What is machine learning and how does it work?",
+            "Tell me about Paris and what it is famous for",
+            "Step 2. explain rain 3. explain snow",
+        ):
+            self.assertEqual(decompose(text), [text])
+        self.assertEqual(len(decompose("; ".join(f"compute {i}+1" for i in range(6)))), 4)
+
+    def test_compound_request_merged(self):
+        """Test that each part is answered by its node and merged in order."""
+        agent = self.make_agent(FakeChatLLM())
+        response = agent.process_input("compute 15*8 and then explain photosynthesis")
+
+        self.assertTrue(
+            response.answer.startswith("1. compute 15*8\n120\n\n2. explain photosynthesis\n")
+        )
+        self.assertEqual(response.sources, ["1:calculator_tool", "2:knowledge_base"])
+        self.assertEqual(response.question, "compute 15*8 and then explain photosynthesis")
+        self.assertEqual(len(agent.get_memory()), 1)
+
+    def test_subtasks_run_concurrently(self):
+        """Test that sub-tasks overlap instead of running one after another."""
+        latency = 0.2
+        agent = self.make_agent(FakeChatLLM(latency=latency))
+
+        started = time.perf_counter()
+        agent.process_input("explain gravity and then explain magnetism and then explain light")
+        elapsed = time.perf_counter() - started
+
+        # Three parts of classify + answer each: 6 calls in sequence, 2 rounds in parallel
+        self.assertLess(elapsed, 4 * latency)
+
+    def test_single_request_unchanged(self):
+        """Test that simple requests keep the single-intent path."""
+        agent = self.make_agent(FakeChatLLM())
+        steps = []
+        response = agent.process_input("10 * 5", on_step=steps.append)
+
+        self.assertEqual(response.answer, "50")
+        self.assertEqual(steps, ["classify_intent", "calculation_agent", "update_memory"])
+
+    def test_compound_sessions_not_training_data(self):
+        """Test that compound sessions are skipped as local model examples."""
+        agent = self.make_agent(FakeChatLLM())
+        agent.process_input("compute 2+2 and then explain rain")
+        agent.process_input("What is rain?")
+
+        session_files = Path(self.log_dir.name).glob("session_*.json")
+        sessions = [json.loads(f.read_text()) for f in session_files]
+        compound = next(s for s in sessions if s["user_query"].startswith("compute"))
+        parts = {
+            call["parameters"]["part"]: call["result"]
+            for call in compound["tool_calls"]
+            if call["tool_name"] == "intent_classifier"
+        }
+        self.assertEqual(parts, {0: "calculation", 1: "qa"})
+        self.assertEqual(load_session_examples(self.log_dir.name), [("What is rain?", "qa")])
+
+
+if __name__ == "__main__":
+    unittest.main()
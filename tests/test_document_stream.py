@@ -0,0 +1,120 @@
+"""Test streaming document ingestion for summarization."""
+
+import hashlib
+import json
+import mmap
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.prompts import FakeChatLLM
+from app.retrieval import DocumentStream
+from app.services import LoadShedder, count_tokens
+
+
+class RecordingLLM(FakeChatLLM):
+    """Fake LLM that keeps the size of the largest prompt it was sent."""
+
+    def __init__(self):
+        super().__init__()
+        self.largest_prompt = 0
+
+    def generate(self, prompt_text):
+        self.largest_prompt = max(self.largest_prompt, len(prompt_text))
+        if "Summary of the document so far" in prompt_text:
+            return "Running summary."
+        return super().generate(prompt_text)
+
+
+class VerboseSummaryLLM(FakeChatLLM):
+    """Fake LLM that writes more summary than the token budget allows."""
+
+    def generate(self, prompt_text):
+        self.prompt = prompt_text
+        return " ".join(["The design covers the storage layer."] * 60)
+
+
+class TestDocumentStream(unittest.TestCase):
+    """Tests for DocumentStream and agent.summarize."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.text = " ".join(f"wörd{i}." for i in range(5000))
+        self.path = Path(self.tmp.name) / "doc.txt"
+        self.path.write_text(self.text, encoding="utf-8")
+        self.digest = hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_chunks_span_block_boundaries(self):
+        """Test that small blocks yield the same words as the whole text."""
+        stream = DocumentStream(self.path, block_size=37)
+        chunks = list(stream.chunks(max_words=700))
+
+        self.assertEqual(" ".join(chunks).split(), self.text.split())
+        self.assertEqual([len(c.split()) for c in chunks], [700] * 7 + [100])
+        self.assertEqual(stream.sha256, self.digest)
+        self.assertEqual(stream.nbytes, len(self.text.encode("utf-8")))
+        with self.assertRaises(RuntimeError):
+            next(stream.blocks())
+
+    def test_mmap_and_iterator_sources(self):
+        """Test that mmaps and text iterators hash the same content."""
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            stream = DocumentStream(mm, block_size=1000)
+            self.assertEqual(" ".join(stream.chunks()).split(), self.text.split())
+            self.assertEqual(stream.sha256, self.digest)
+
+        pieces = (self.text[i:i + 333] for i in range(0, len(self.text), 333))
+        stream = DocumentStream(pieces)
+        self.assertEqual(" ".join(stream.chunks()).split(), self.text.split())
+        self.assertEqual(stream.sha256, self.digest)
+
+    def test_summarize_logs_hash_not_text(self):
+        """Test that the session log keeps only the document's hash and size."""
+        llm = RecordingLLM()
+        agent = IntegratedAgent(llm=llm, log_dir=self.tmp.name, load_shedder=LoadShedder())
+        response = agent.summarize(self.path, "Summarize the design doc.")
+
+        self.assertEqual(response.answer, "Running summary.")
+        self.assertEqual(response.question, "Summarize the design doc.")
+        self.assertEqual(response.sources, [f"document:{self.digest[:12]}"])
+        self.assertLess(llm.largest_prompt, len(self.text))
+
+        session = json.loads(next(Path(self.tmp.name).glob("session_*.json")).read_text())
+        self.assertNotIn("wörd4999", json.dumps(session))
+        call = next(c for c in session["tool_calls"] if c["tool_name"] == "summarization")
+        self.assertEqual(call["parameters"]["sha256"], self.digest)
+        self.assertEqual(call["parameters"]["chunks"], 4)
+
+    def test_summary_limit_is_in_words(self):
+        """Test that the prompt asks for words and long summaries lose no text mid-way."""
+        llm = VerboseSummaryLLM()
+        agent = IntegratedAgent(llm=llm, log_dir=self.tmp.name, load_shedder=LoadShedder())
+        response = agent.summarize([self.text])
+
+        self.assertIn("at most 204 words", llm.prompt)
+        self.assertNotIn("omitted", response.answer)
+        self.assertTrue(response.answer.endswith("storage layer."))
+        self.assertLessEqual(count_tokens(response.answer), 512)
+
+    def test_degraded_summary_is_extractive(self):
+        """Test that a degraded shedder keeps each chunk's first sentence."""
+        shedder = LoadShedder(probe_interval=3600)
+        shedder.record(60.0, ok=False)
+        llm = FakeChatLLM()
+        agent = IntegratedAgent(llm=llm, log_dir=self.tmp.name, load_shedder=shedder)
+        response = agent.summarize([self.text])
+
+        self.assertEqual(response.answer, "wörd0. wörd1500. wörd3000. wörd4500.")
+        self.assertEqual(llm.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""Fuzz and regression tests for the single-pass classifier output parser."""
+
+import json
+import random
+import sys
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services import IntentClassifier, parse_classifier_output
+
+INTENT_NAMES = {"calculation": "CALCULATION", "summarization": "SUMMARIZATION", "qa": "QA"}
+
+
+def generate_response(rng):
+    """Build a classifier response with format drift and its expected fields."""
+    intent = rng.choice(list(INTENT_NAMES))
+    confidence = round(rng.uniform(0.0, 1.0), 2)
+    reasoning = rng.choice(
+        ["Math operation requested", "User wants a summary", "General question"]
+    )
+    keywords = rng.sample(["calculate", "what", "summary", "explain", "sum"], 2)
+
+    if rng.random() < 0.15:
+        payload = {
+            "intent": INTENT_NAMES[intent],
+            "confidence": confidence,
+            "reasoning": reasoning,
+            "keywords_found": keywords,
+        }
+        text = json.dumps(payload)
+        if rng.random() < 0.5:
+            text = f"```json\n{text}\n```"
+        return text, (intent, confidence, reasoning, keywords)
+
+    name = INTENT_NAMES[intent]
+    name = rng.choice([name, name.lower(), name.title(), f"[{name}]"])
+    conf_text = rng.choice([f"{confidence}", f"{confidence:.2f}", f"{confidence * 100:.0f}%"])
+    if conf_text.endswith("%"):
+        confidence = int(conf_text[:-1]) / 100
+    key_style = rng.choice(["{}", "**{}:**", "- {}", "{} "])
+    sep = "" if key_style.endswith(":**") else ":"
+
+    def field(label, value):
+        return key_style.format(label) + sep + rng.choice([" ", "  ", ""]) + value
+
+    lines = [
+        rng.choice(["", "Here is my classification:"]),
+        field(rng.choice(["Intent", "intent", "INTENT"]), name),
+        field("Confidence", conf_text),
+        field("Reasoning", reasoning),
+        field("Keywords_Found", "[" + ", ".join(keywords) + "]"),
+    ]
+    return "\n".join(lines), (intent, confidence, reasoning, keywords)
+
+
+class TestIntentParser(unittest.TestCase):
+    """Tests for parse_classifier_output."""
+
+    def test_fuzzed_responses(self):
+        """Test thousands of drifted responses parse fully and correctly."""
+        rng = random.Random(1234)
+        for _ in range(5000):
+            text, (intent, confidence, reasoning, keywords) = generate_response(rng)
+            with self.subTest(text=text):
+                parsed = parse_classifier_output(text)
+                self.assertEqual(parsed.quality, "full")
+                self.assertEqual(parsed.intent_type, intent)
+                self.assertAlmostEqual(parsed.confidence, confidence)
+                self.assertEqual(parsed.reasoning, reasoning)
+                self.assertEqual(parsed.keywords_found, keywords)
+
+    def test_random_garbage_never_raises(self):
+        """Test that arbitrary text falls back instead of raising."""
+        rng = random.Random(99)
+        alphabet = "Intent:Confidence:Reasoning{}[]0.9%\n *QA"
+        for _ in range(2000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+            parsed = parse_classifier_output(text)
+            self.assertIn(parsed.quality, ("full", "partial", "fallback"))
+            self.assertGreaterEqual(parsed.confidence, 0.0)
+            self.assertLessEqual(parsed.confidence, 1.0)
+
+    def test_quality_levels(self):
+        """Test partial and fallback parse quality."""
+        partial = parse_classifier_output("Intent: CALCULATION\nReasoning: math")
+        self.assertEqual(partial.quality, "partial")
+        self.assertEqual(partial.missing, ["confidence"])
+        self.assertEqual(partial.confidence, 0.6)
+
+        fallback = parse_classifier_output("I think this is a math question.")
+        self.assertEqual(fallback.quality, "fallback")
+        self.assertEqual(fallback.intent_type, "qa")
+
+    def test_multiline_reasoning(self):
+        """Test that reasoning continues until the next field."""
+        parsed = parse_classifier_output(
+            "Intent: QA\nConfidence: 0.8\nReasoning: first line\nsecond line\n"
+            "Keywords_Found: [what]"
+        )
+        self.assertEqual(parsed.reasoning, "first line second line")
+        self.assertEqual(parsed.keywords_found, ["what"])
+
+    def test_classifier_reports_parse_quality(self):
+        """Test that UserIntent carries the parse quality."""
+        intent = IntentClassifier(llm=object())._parse_response("Intent: QA")
+        self.assertEqual(intent.parse_quality, "partial")
+
+
+if __name__ == "__main__":
+    unittest.main()
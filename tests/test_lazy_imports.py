@@ -0,0 +1,70 @@
+"""Test lazy package re-exports and deferred heavy imports."""
+
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+import app.prompts
+import app.workflow
+
+ROOT = Path(__file__).parent.parent
+
+
+def loaded_after(code):
+    """Top-level heavy modules imported by code in a fresh interpreter."""
+    script = (
+        f"{code}\nimport sys\n"
+        "print(' '.join(sorted({'openai', 'langgraph', 'langchain_core', 'pydantic', 'numpy'}"
+        " & {name.split('.')[0] for name in sys.modules})))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "OPENAI_API_KEY": "fake"},
+    )
+    return result.stdout.split()
+
+
+class TestLazyImports(unittest.TestCase):
+    """Tests that packages load their dependencies only when used."""
+
+    def test_packages_import_nothing_heavy(self):
+        """Test that importing the packages themselves loads no heavy dependency."""
+        self.assertEqual(
+            loaded_after("import app.prompts, app.services, app.workflow, app.server, app.logging"),
+            [],
+        )
+
+    def test_cli_modules_skip_llm_stack(self):
+        """Test that the profiler and model CLIs do not load the LLM stack."""
+        self.assertEqual(loaded_after("import app.logging.profiler"), [])
+        self.assertNotIn("openai", loaded_after("import app.services.local_intent_model"))
+        self.assertNotIn("langgraph", loaded_after("import app.services.local_intent_model"))
+
+    def test_openai_client_is_deferred(self):
+        """Test that the openai SDK loads on first client use, not construction."""
+        code = "from app.prompts import OpenAIChatLLM\nllm = OpenAIChatLLM()"
+        self.assertNotIn("openai", loaded_after(code))
+        self.assertIn("openai", loaded_after(code + "\nllm.client"))
+
+    def test_lazy_attributes(self):
+        """Test that lazy names resolve, are listed, and unknown names still fail."""
+        from app.prompts.fake_llm import FakeChatLLM
+
+        self.assertIs(app.prompts.FakeChatLLM, FakeChatLLM)
+        self.assertIn("create_workflow", dir(app.workflow))
+        self.assertTrue(callable(app.workflow.create_workflow))
+        with self.assertRaises(AttributeError):
+            app.prompts.NoSuchName
+
+
+if __name__ == "__main__":
+    unittest.main()
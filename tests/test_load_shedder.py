@@ -0,0 +1,111 @@
+"""Test adaptive load shedding and degraded-mode answers."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.prompts import FakeChatLLM
+from app.services import LoadShedder
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLoadShedder(unittest.TestCase):
+    """Tests for LoadShedder state changes and workflow fallbacks."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_shedder(self, **kwargs):
+        options = dict(
+            latency_high=2.0, latency_low=0.5, min_degraded_seconds=10.0,
+            probe_interval=5.0, alpha=0.5, clock=self.clock,
+        )
+        options.update(kwargs)
+        return LoadShedder(**options)
+
+    def test_hysteresis(self):
+        """Test entering on high latency and leaving only after recovery and dwell time."""
+        shedder = self.make_shedder()
+        shedder.record(0.1)
+        self.assertTrue(shedder.allow_llm())
+
+        shedder.record(5.0)
+        self.assertTrue(shedder.degraded)
+        self.assertEqual(shedder.reason, "latency")
+
+        # Latency recovers, but the minimum degraded time has not passed
+        for _ in range(5):
+            shedder.record(0.1)
+        self.assertTrue(shedder.degraded)
+
+        self.clock.now += 10
+        self.assertTrue(shedder.allow_llm())
+        self.assertFalse(shedder.degraded)
+
+    def test_probes_and_queue_depth(self):
+        """Test one probe per interval while degraded and queue-triggered shedding."""
+        depth = [30]
+        shedder = self.make_shedder(queue_high=10, queue_depth=lambda: depth[0])
+        self.assertFalse(shedder.allow_llm())
+        self.assertEqual(shedder.reason, "queue")
+
+        self.clock.now += 5
+        self.assertTrue(shedder.allow_llm())
+        self.assertFalse(shedder.allow_llm())
+
+        depth[0] = 0
+        self.clock.now += 10
+        self.assertTrue(shedder.allow_llm())
+
+    def test_error_rate(self):
+        """Test that failing calls trip the shedder."""
+        shedder = self.make_shedder(error_high=0.3)
+        with self.assertRaises(RuntimeError):
+            with shedder.track():
+                raise RuntimeError("upstream down")
+        self.assertTrue(shedder.degraded)
+        self.assertEqual(shedder.reason, "errors")
+
+    def test_degraded_turns_skip_the_llm(self):
+        """Test local classification, cached answers and canned fallbacks."""
+        shedder = self.make_shedder()
+        llm = FakeChatLLM()
+        agent = IntegratedAgent(llm=llm, log_dir=self.tmp.name, load_shedder=shedder)
+
+        healthy = agent.process_input("What is the capital of France?")
+        self.assertEqual(llm.calls, 2)
+
+        shedder.record(50.0)
+        calls = llm.calls
+        self.assertEqual(agent.process_input("add 3 and 4").answer, "7")
+
+        cached = agent.process_input("what is the capital of france")
+        self.assertEqual(cached.answer, healthy.answer)
+        self.assertEqual(cached.sources, ["answer_cache"])
+        self.assertLess(cached.confidence, healthy.confidence)
+
+        unknown = agent.process_input("Who wrote Hamlet?")
+        self.assertEqual(unknown.sources, ["degraded_mode"])
+        self.assertEqual(llm.calls, calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Test the load generation harness against the fake LLM."""
+
+import csv
+import json
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.prompts import FakeChatLLM
+from app.server.loadgen import (
+    Sample,
+    build_timeline,
+    main,
+    parse_latency,
+    parse_mix,
+    rss_kind,
+    rss_mb,
+)
+
+
+class TestLoadgen(unittest.TestCase):
+    """Tests for workload parsing, reporting and short end-to-end runs."""
+
+    def test_parse_mix_and_latency(self):
+        """Test intent mix normalization and latency distributions."""
+        self.assertEqual(parse_mix("qa=3,calculation=1"), {"qa": 0.75, "calculation": 0.25})
+        with self.assertRaises(ValueError):
+            parse_mix("poetry=1")
+
+        rng = random.Random(1)
+        self.assertEqual(parse_latency("fixed:0.2", rng)(), 0.2)
+        draws = [parse_latency("uniform:0.1,0.3", rng)() for _ in range(100)]
+        self.assertTrue(all(0.1 <= d <= 0.3 for d in draws))
+        mean = sum(parse_latency("exp:0.2", rng)() for _ in range(5000)) / 5000
+        self.assertAlmostEqual(mean, 0.2, delta=0.02)
+        with self.assertRaises(ValueError):
+            parse_latency("gamma:1", rng)
+
+        llm = FakeChatLLM(latency=parse_latency("fixed:0", rng))
+        self.assertTrue(llm.generate("hello").startswith("Fake answer"))
+
+    def test_timeline(self):
+        """Test per-second completions, errors and in-flight counts."""
+        samples = [
+            Sample(0, "qa", 0.1, 0.5, 0.0, "ok"),
+            Sample(0, "qa", 0.2, 1.5, 0.3, "ok"),
+            Sample(1, "qa", 1.1, 1.2, 0.0, "http_429"),
+        ]
+        rows = build_timeline(samples, [(0.0, 80.0), (1.0, 82.5)])
+        self.assertEqual([r["completed"] for r in rows], [1, 2])
+        self.assertEqual([r["errors"] for r in rows], [0, 1])
+        self.assertEqual([r["in_flight"] for r in rows], [1, 0])
+        self.assertEqual([r["rss_mb"] for r in rows], [80.0, 82.5])
+
+    def test_rss_fallback_units(self):
+        """Test that the peak RSS fallback is scaled per platform and labelled."""
+        usage = SimpleNamespace(ru_maxrss=2**30)
+        with patch("builtins.open", side_effect=OSError), \
+                patch("resource.getrusage", return_value=usage), \
+                patch("os.path.exists", return_value=False):
+            with patch.object(sys, "platform", "darwin"):
+                self.assertEqual(rss_mb(), 1024.0)
+            with patch.object(sys, "platform", "linux"):
+                self.assertEqual(rss_mb(), 2**20)
+            self.assertEqual(rss_kind(), "peak")
+
+    def test_open_loop_agent_run(self):
+        """Test a short open-loop sweep and its CSV/JSON output."""
+        with tempfile.TemporaryDirectory() as tmp:
+            prefix = str(Path(tmp) / "run")
+            result = main([
+                "--mode", "open", "--rates", "20,40", "--duration", "0.5",
+                "--latency", "fixed:0.001", "--mix", "qa=1,calculation=1", "--out", prefix,
+            ])
+            self.assertEqual([row["offered"] for row in result["summary"]], [20.0, 40.0])
+            for row in result["summary"]:
+                self.assertGreater(row["requests"], 0)
+                self.assertEqual(row["error_rate"], 0.0)
+                self.assertIsNotNone(row["latency_p99_ms"])
+            with open(f"{prefix}_summary.csv") as f:
+                self.assertEqual(len(list(csv.DictReader(f))), 2)
+            with open(f"{prefix}_timeline.csv") as f:
+                self.assertIn("rss_mb", next(csv.reader(f)))
+            with open(f"{prefix}.json") as f:
+                output = json.load(f)
+            self.assertEqual(output["config"]["mode"], "open")
+            self.assertEqual(output["rss_kind"], "current")
+
+    def test_closed_loop_service_run(self):
+        """Test that the service target reports queueing when clients exceed workers."""
+        result = main([
+            "--target", "service", "--mode", "closed", "--concurrency", "6",
+            "--duration", "0.5", "--latency", "fixed:0.01", "--workers", "2",
+            "--mix", "calculation=1,qa=1",
+        ])
+        (row,) = result["summary"]
+        self.assertEqual(row["error_rate"], 0.0)
+        self.assertGreater(row["queue_mean_ms"], 0.0)
+        self.assertGreater(row["throughput_rps"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Test the local intent model and its IntentClassifier integration."""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services import IntentClassifier, LocalIntentModel, load_session_examples
+
+TRAINING_EXAMPLES = [
+    ("calculate 2 + 3", "calculation"),
+    ("compute 15 * 8", "calculation"),
+    ("solve 100 / 4", "calculation"),
+    ("what is 7 times 6", "calculation"),
+    ("add 3 and 4", "calculation"),
+    ("summarize this document", "summarization"),
+    ("give me a summary", "summarization"),
+    ("summarize our conversation", "summarization"),
+    ("provide an overview of the key points", "summarization"),
+    ("condense this text", "summarization"),
+    ("what is the capital of France", "qa"),
+    ("how does machine learning work", "qa"),
+    ("explain neural networks", "qa"),
+    ("tell me about Python programming", "qa"),
+    ("why is the sky blue", "qa"),
+]
+
+
+class StubLLM:
+    """LLM stub that always classifies as QA."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt_text):
+        self.calls += 1
+        return "Intent: QA\nConfidence: 0.9\nReasoning: stub\nKeywords_Found: []"
+
+
+class TestLocalIntentModel(unittest.TestCase):
+    """Unit tests for LocalIntentModel."""
+
+    def setUp(self):
+        self.model = LocalIntentModel.train(
+            TRAINING_EXAMPLES * 5, n_features=2**12, epochs=10
+        )
+
+    def test_predicts_training_intents(self):
+        """Test that the model fits its training data."""
+        self.assertEqual(self.model.evaluate(TRAINING_EXAMPLES), 1.0)
+
+    def test_save_and_load_memory_mapped(self):
+        """Test that a saved model loads memory-mapped with identical output."""
+        with tempfile.TemporaryDirectory() as tmp:
+            self.model.save(tmp)
+            loaded = LocalIntentModel.load(tmp)
+            self.assertEqual(loaded.weights.__class__.__name__, "memmap")
+            self.assertEqual(
+                loaded.predict("compute 9 * 9"), self.model.predict("compute 9 * 9")
+            )
+
+    def test_classifier_uses_local_model(self):
+        """Test that confident local predictions skip the LLM."""
+        llm = StubLLM()
+        classifier = IntentClassifier(
+            llm=llm, local_model=self.model, local_threshold=0.0
+        )
+        intent = classifier.classify_intent("calculate 4 + 4")
+        self.assertEqual(intent.intent_type, "calculation")
+        self.assertEqual(llm.calls, 0)
+
+    def test_classifier_falls_back_to_llm(self):
+        """Test that low-confidence predictions fall back to the LLM."""
+        llm = StubLLM()
+        classifier = IntentClassifier(
+            llm=llm, local_model=self.model, local_threshold=1.01
+        )
+        intent = classifier.classify_intent("calculate 4 + 4")
+        self.assertEqual(intent.intent_type, "qa")
+        self.assertEqual(llm.calls, 1)
+
+    def test_load_session_examples(self):
+        """Test that labels come from LLM classifier entries in session logs."""
+        sessions = [
+            {
+                "user_query": "2 + 2",
+                "tool_calls": [
+                    {"tool_name": "intent_classifier", "parameters": {"source": "llm"}, "result": "calculation"}
+                ],
+            },
+            {
+                "user_query": "explain AI",
+                "tool_calls": [
+                    {"tool_name": "intent_classifier", "parameters": {"source": "local"}, "result": "qa"}
+                ],
+            },
+            {
+                "user_query": "summarize this",
+                "tool_calls": [{"tool_name": "summarization", "parameters": {}}],
+            },
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            for i, session in enumerate(sessions):
+                with open(Path(tmp) / f"session_{i}.json", "w") as f:
+                    json.dump(session, f)
+            examples = load_session_examples(tmp)
+
+        self.assertEqual(
+            examples, [("2 + 2", "calculation"), ("summarize this", "summarization")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+"""Test compaction, lookup and retention of session logs."""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.logging import LogCompactor, SimpleLogger
+from app.services.local_intent_model import load_session_examples
+
+TODAY = date(2026, 3, 10)
+
+
+def write_session(log_dir, session_id, day, latency_ms=100, tools=("qa",), response="ok"):
+    """Write a session file as SimpleLogger would, started on day and written at its end."""
+    started = datetime.combine(day, datetime.min.time()) + timedelta(hours=9)
+    session = {
+        "session_id": session_id,
+        "user_query": f"question {session_id} ✓",
+        "response": response,
+        "tool_calls": [
+            {"tool_name": name, "parameters": {"n": 1}, "result": "r", "timestamp": None}
+            for name in tools
+        ],
+        "started_at": started.isoformat(),
+        "ended_at": (started + timedelta(milliseconds=latency_ms)).isoformat(),
+    }
+    path = Path(log_dir) / f"session_{session_id}.json"
+    path.write_text(json.dumps(session))
+    ended = (started + timedelta(milliseconds=latency_ms)).timestamp()
+    os.utime(path, (ended, ended))
+    return session
+
+
+class TestLogCompactor(unittest.TestCase):
+    """Tests for LogCompactor."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compact_and_lookup(self):
+        """Test that old days are archived, today is kept, and lookups still work."""
+        yesterday = TODAY - timedelta(days=1)
+        originals = [
+            write_session(self.log_dir, f"a{i}", yesterday, latency_ms=100 * (i + 1))
+            for i in range(5)
+        ]
+        write_session(self.log_dir, "today1", TODAY)
+        # Ends after midnight, so its file is too recent to be read yet
+        write_session(self.log_dir, "late", yesterday, latency_ms=16 * 3600 * 1000)
+
+        result = LogCompactor(self.log_dir).compact(today=TODAY)
+
+        self.assertEqual((result["sessions"], result["days"]), (5, [yesterday.isoformat()]))
+        remaining = sorted(p.name for p in self.log_dir.glob("session_*"))
+        self.assertEqual(remaining, ["session_late.json", "session_today1.json"])
+
+        compactor = LogCompactor(self.log_dir)
+        found = compactor.lookup("a3")
+        self.assertEqual(found["user_query"], originals[3]["user_query"])
+        self.assertEqual(found["tool_calls"][0]["tool_name"], "qa")
+        self.assertTrue(found["ended_at"].startswith(yesterday.isoformat()))
+        self.assertEqual(compactor.lookup("today1")["session_id"], "today1")
+        self.assertIsNone(compactor.lookup("missing"))
+
+    def test_rollups_and_merge(self):
+        """Test per-day rollups, including files compacted into an existing day."""
+        day = TODAY - timedelta(days=2)
+        for i in range(4):
+            write_session(self.log_dir, f"b{i}", day, latency_ms=100 * (i + 1))
+        compactor = LogCompactor(self.log_dir)
+        compactor.compact(today=TODAY)
+        write_session(self.log_dir, "b4", day, latency_ms=500, tools=("calculator", "qa"),
+                      response="Error processing request: boom")
+        compactor.compact(today=TODAY)
+
+        (rollup,) = compactor.rollups()
+        self.assertEqual((rollup["day"], rollup["sessions"], rollup["errors"]),
+                         (day.isoformat(), 5, 1))
+        self.assertAlmostEqual(rollup["latency_p50_ms"], 300, places=3)
+        self.assertAlmostEqual(rollup["latency_max_ms"], 500, places=3)
+        self.assertEqual(rollup["tools"], {"qa": 5, "calculator": 1})
+        self.assertEqual(len(list(compactor.archived_sessions())), 5)
+
+    def test_retention_keeps_rollups(self):
+        """Test that expired archives are deleted but their rollups remain."""
+        old, recent = TODAY - timedelta(days=40), TODAY - timedelta(days=3)
+        write_session(self.log_dir, "old", old)
+        write_session(self.log_dir, "new", recent)
+        profiles = self.log_dir / "profiles"
+        profiles.mkdir()
+        for name, day in (("old.prof", old), ("new.prof", recent)):
+            (profiles / name).write_bytes(b"")
+            stamp = datetime.combine(day, datetime.min.time()).timestamp()
+            os.utime(profiles / name, (stamp, stamp))
+
+        compactor = LogCompactor(self.log_dir, retention_days=30)
+        result = compactor.compact(today=TODAY)
+
+        self.assertEqual(result["expired_days"], [old.isoformat()])
+        self.assertEqual(result["expired_profiles"], 1)
+        self.assertEqual([p.name for p in profiles.iterdir()], ["new.prof"])
+        self.assertIsNone(compactor.lookup("old"))
+        self.assertIsNotNone(compactor.lookup("new"))
+        self.assertEqual(
+            [(r["day"], r["archived"]) for r in compactor.rollups()],
+            [(old.isoformat(), 0), (recent.isoformat(), 1)],
+        )
+
+    def test_training_examples_include_archives(self):
+        """Test that the local intent model still learns from compacted sessions."""
+        logger = SimpleLogger(log_dir=str(self.log_dir))
+        logger.start_session("what is 2 + 2")
+        logger.log_tool_call("calculator", {"expression": "2 + 2"}, "4")
+        logger.end_session("4")
+        session_file = next(self.log_dir.glob("session_*.json"))
+        session = json.loads(session_file.read_text())
+        started = datetime.now() - timedelta(days=2)
+        session["started_at"] = started.isoformat()
+        session_file.write_text(json.dumps(session))
+        os.utime(session_file, (started.timestamp(), started.timestamp()))
+
+        LogCompactor(self.log_dir).compact()
+
+        self.assertEqual(list(self.log_dir.glob("session_*.json")), [])
+        self.assertEqual(load_session_examples(str(self.log_dir)), [("what is 2 + 2", "calculation")])
+
+    def test_cli(self):
+        """Test the command line entry point."""
+        write_session(self.log_dir, "c1", date.today() - timedelta(days=1))
+        result = subprocess.run(
+            [sys.executable, "-m", "app.logging.compaction", "--logs", str(self.log_dir)],
+            cwd=Path(__file__).parent.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertIn("Compacted 1 sessions into 1 days", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
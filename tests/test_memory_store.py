@@ -0,0 +1,113 @@
+"""Test the long-term memory store and its use by the agent."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import MESSAGE_WINDOW, IntegratedAgent
+from app.memory import MemoryStore
+from app.prompts import FakeChatLLM
+from app.workflow.nodes import MEMORY_WINDOW
+
+
+def entry(user_input, response):
+    return {
+        "user_input": user_input,
+        "response": response,
+        "timestamp": "2024-01-01T00:00:00",
+        "messages_count": 3,
+    }
+
+
+class RecordingLLM(FakeChatLLM):
+    """Fake LLM that keeps the prompts it was asked to answer."""
+
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    def generate(self, prompt_text):
+        if "USER INPUT:" not in prompt_text:
+            self.prompts.append(prompt_text)
+        return super().generate(prompt_text)
+
+
+class TestMemoryStore(unittest.TestCase):
+    """Tests for MemoryStore and memory recall in the workflow."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_search_ranks_by_relevance(self):
+        """Test BM25 retrieval, conversation isolation and recent-turn skipping."""
+        store = MemoryStore()
+        store.add("a", entry("What is the revenue for Q3?", "Q3 revenue was 4.2M"))
+        store.add("a", entry("Who is the CEO?", "Jane Doe"))
+        store.add("a", entry("Tell me about the weather", "Sunny"))
+        store.add("b", entry("Revenue in Q3 for the other company?", "1M"))
+
+        results = store.search("a", "remind me of the Q3 revenue", k=2)
+        self.assertEqual(results[0]["response"], "Q3 revenue was 4.2M")
+        self.assertTrue(all(r["response"] != "1M" for r in results))
+
+        self.assertEqual(store.search("a", "weather", skip_recent=1), [])
+        self.assertEqual(store.search("a", "?!", k=3), [])
+        self.assertEqual([e["response"] for e in store.recent("a", 2)], ["Jane Doe", "Sunny"])
+        self.assertEqual(store.count("a"), 3)
+
+    def test_agent_memory_is_bounded_and_recalled(self):
+        """Test that RAM stays bounded while old turns are recalled for QA."""
+        llm = RecordingLLM()
+        agent = IntegratedAgent(llm=llm, log_dir=self.tmp.name)
+        agent.process_input("What is the project codename zephyr about?")
+        for i in range(MESSAGE_WINDOW):
+            agent.process_input(f"What is fact number {i}?")
+
+        self.assertLessEqual(len(agent.memory), MEMORY_WINDOW)
+        self.assertLessEqual(len(agent.conversation_messages), MESSAGE_WINDOW)
+        self.assertEqual(len(agent.get_memory()), MESSAGE_WINDOW + 1)
+
+        agent.process_input("Tell me more about zephyr")
+        recalled = llm.prompts[-1].split("Relevant earlier conversation")[1]
+        self.assertIn("codename zephyr", recalled)
+        self.assertIn("codename zephyr", llm.prompts[-1])
+
+    def test_recall_at_the_window_edge(self):
+        """Test that the turn that just left the message window is recalled."""
+        llm = RecordingLLM()
+        agent = IntegratedAgent(llm=llm, log_dir=self.tmp.name)
+        agent.process_input("What is the project codename zephyr about?")
+        # Three messages per turn, so the first turn has just been dropped
+        for i in range(MESSAGE_WINDOW // 3):
+            agent.process_input(f"What is fact number {i}?")
+        self.assertNotIn(
+            "zephyr", " ".join(m.content for m in agent.conversation_messages)
+        )
+
+        agent.process_input("Tell me more about zephyr")
+        self.assertIn("codename zephyr", llm.prompts[-1])
+
+    def test_recall_of_turns_cut_by_the_token_budget(self):
+        """Test that turns still in the window but over the QA budget are recalled."""
+        llm = RecordingLLM()
+        agent = IntegratedAgent(llm=llm, log_dir=self.tmp.name)
+        padding = " ".join(["background"] * 600)
+        agent.process_input(f"What is the project codename zephyr about? {padding}")
+        for i in range(3):
+            agent.process_input(f"What is fact number {i}? {padding}")
+        self.assertIn("zephyr", " ".join(m.content for m in agent.conversation_messages))
+
+        agent.process_input("Tell me more about zephyr")
+        recalled = llm.prompts[-1].split("Relevant earlier conversation")[1]
+        self.assertIn("codename zephyr", recalled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+"""Test the in-process metrics registry and its instrumentation."""
+
+import os
+import sys
+import threading
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import openai
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.metrics import REGISTRY, MetricsRegistry
+from app.prompts import OpenAIChatLLM, SingleFlight
+from app.services import IntentClassifier
+from app.tools import cached_calculate, is_calculable, langchain_calculate
+
+
+class StubLLM:
+    """LLM stub returning a fixed classifier response."""
+
+    def __init__(self, response):
+        self.response = response
+
+    def generate(self, prompt_text):
+        return self.response
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Unit tests for counters, histograms and exposition output."""
+
+    def test_counter_sums_thread_shards(self):
+        """Test that increments from many threads are all counted."""
+        registry = MetricsRegistry()
+        counter = registry.counter("test_events_total", "Events.", ["kind"])
+
+        def work():
+            for _ in range(1000):
+                counter.inc(kind="a")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(counter.value(kind="a"), 8000)
+
+    def test_finished_threads_fold_into_base_shard(self):
+        """Test that shards of exited threads are merged, not kept per thread."""
+        registry = MetricsRegistry()
+        counter = registry.counter("test_short_total", "Events.")
+        histogram = registry.histogram("test_short_seconds", "Durations.", buckets=(1.0,))
+
+        for _ in range(50):
+            thread = threading.Thread(target=lambda: (counter.inc(), histogram.observe(0.5)))
+            thread.start()
+            thread.join()
+
+        self.assertEqual(counter.value(), 50)
+        self.assertEqual(histogram.count(), 50)
+        self.assertLessEqual(len(counter._shards.snapshots()), 2)
+        self.assertLessEqual(len(histogram._shards.snapshots()), 2)
+
+    def test_histogram_exposition(self):
+        """Test cumulative buckets, sum and count in text format."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("test_seconds", "Durations.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+        text = registry.render()
+        self.assertIn("# TYPE test_seconds histogram", text)
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{le="1"} 2', text)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("test_seconds_sum 5.55", text)
+        self.assertIn("test_seconds_count 3", text)
+
+    def test_label_escaping_and_type_conflicts(self):
+        """Test label value escaping and re-registration checks."""
+        registry = MetricsRegistry()
+        registry.counter("test_total", "Test.", ["path"]).inc(path='a"b')
+        self.assertIn('test_total{path="a\\"b"} 1', registry.render())
+        with self.assertRaises(ValueError):
+            registry.histogram("test_total", "Test.")
+
+    def test_classifier_parse_fallbacks_are_counted(self):
+        """Test that classifier fallbacks to defaults are counted per field."""
+        fallbacks = REGISTRY.counter(
+            "agent_intent_parse_fallback_total", "", ["field"]
+        )
+        before = fallbacks.value(field="confidence")
+        classifier = IntentClassifier(llm=StubLLM("Intent: QA\nReasoning: no score"))
+        intent = classifier.classify_intent("hello")
+        self.assertEqual(intent.confidence, 0.6)
+        self.assertEqual(fallbacks.value(field="confidence"), before + 1)
+
+    def test_calculator_errors_by_type(self):
+        """Test that calculator errors are counted by type."""
+        errors = REGISTRY.counter("agent_calculator_errors_total", "", ["type"])
+        before = errors.value(type="zero_division")
+        langchain_calculate.invoke({"expression": "1 / 0"})
+        self.assertEqual(errors.value(type="zero_division"), before + 1)
+
+        # Cached failures still count; intent probes are not calculator errors
+        cached_calculate("2 / 0")
+        cached_calculate("2 / 0")
+        self.assertEqual(errors.value(type="zero_division"), before + 3)
+        self.assertFalse(is_calculable("3 / 0"))
+        self.assertEqual(errors.value(type="zero_division"), before + 3)
+
+    def test_llm_retries_and_tokens(self):
+        """Test that LLM retries, latency and token usage are recorded."""
+        attempts = []
+
+        def create(model, temperature, messages):
+            attempts.append(model)
+            if len(attempts) == 1:
+                raise openai.APIConnectionError(request=httpx.Request("POST", "http://test"))
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))],
+                usage=SimpleNamespace(prompt_tokens=7, completion_tokens=3),
+            )
+
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+            llm = OpenAIChatLLM(
+                model="metrics-test", single_flight=SingleFlight(), retry_backoff=0
+            )
+        llm.client = SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        )
+
+        self.assertEqual(llm.generate("hi"), "ok")
+        retries = REGISTRY.counter("agent_llm_retries_total", "", ["model", "error"])
+        tokens = REGISTRY.counter("agent_llm_tokens_total", "", ["model", "kind"])
+        latency = REGISTRY.histogram("agent_llm_request_seconds", "", ["model"])
+        self.assertEqual(retries.value(model="metrics-test", error="APIConnectionError"), 1)
+        self.assertEqual(tokens.value(model="metrics-test", kind="completion"), 3)
+        self.assertEqual(latency.count(model="metrics-test"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
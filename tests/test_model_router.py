@@ -0,0 +1,129 @@
+"""Test per-call model routing and escalation."""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.prompts import FakeChatLLM
+from app.services import IntentClassifier, LoadShedder, ModelRouter, ModelTier
+
+TIERS = [
+    ModelTier("large", "big-model", 0.005, 100000),
+    ModelTier("small", "small-model", 0.0003, 1000),
+]
+
+
+class TierLLM(FakeChatLLM):
+    """Fake LLM whose small model returns unparseable classifications."""
+
+    def generate(self, prompt_text, model=None):
+        if model == "small-model" and "USER INPUT:" in prompt_text:
+            super().generate(prompt_text, model)
+            return "no idea"
+        return super().generate(prompt_text, model)
+
+
+class TestModelRouter(unittest.TestCase):
+    """Tests for tier choice, escalation and decision logging."""
+
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.log_dir.cleanup()
+
+    def test_choose(self):
+        """Test role, input length, confidence and latency based choices."""
+        router = ModelRouter(TIERS, latency_slo=5.0)
+        self.assertEqual([t.name for t in router.tiers], ["small", "large"])
+
+        self.assertEqual(router.choose("qa", "short question").model, "small-model")
+        self.assertEqual(router.choose("report", "short").reason, "role")
+        self.assertEqual(router.choose("report", "short").model, "big-model")
+
+        long_input = router.choose("qa", "word " * 1200)
+        self.assertEqual((long_input.model, long_input.reason), ("big-model", "long_input"))
+
+        unsure = router.choose("qa", "short question", confidence=0.3)
+        self.assertEqual((unsure.model, unsure.reason), ("big-model", "low_confidence"))
+
+        router.record("big-model", 30.0)
+        slow = router.choose("qa", "short question", confidence=0.3)
+        self.assertEqual((slow.model, slow.reason), ("small-model", "slow"))
+        # Never below the tier the input needs
+        self.assertEqual(router.choose("qa", "word " * 1200).model, "big-model")
+
+    def test_slow_tier_recovers(self):
+        """Test that a slow tier is probed and chosen again once it is fast."""
+        now = [0.0]
+        router = ModelRouter(TIERS, latency_slo=5.0, probe_interval=5.0, clock=lambda: now[0])
+        router.record("big-model", 20.0)
+        reasons = [router.choose("report", "short").reason for _ in range(100)]
+        self.assertEqual(set(reasons), {"slow"})
+
+        probes = 0
+        while router.choose("report", "short").reason != "role":
+            now[0] += 5.0
+            decision = router.choose("report", "short")
+            if decision.reason == "probe":
+                probes += 1
+                router.record(decision.model, 1.0)
+            self.assertLess(probes, 20)
+        self.assertGreater(probes, 1)
+        self.assertLessEqual(router.latency["big-model"], 5.0)
+
+    def test_escalates_invalid_output(self):
+        """Test that failed validation retries one tier up."""
+        llm = TierLLM()
+        classifier = IntentClassifier(llm=llm, model_router=ModelRouter(TIERS))
+        intent = classifier.classify_intent("calculate 2 + 2")
+
+        self.assertEqual(intent.intent_type, "calculation")
+        self.assertEqual(llm.model_calls, {"small-model": 1, "big-model": 1})
+
+    def test_decisions_logged_per_turn(self):
+        """Test that each routed call is logged with its cost and baseline cost."""
+        llm = FakeChatLLM()
+        agent = IntegratedAgent(
+            llm=llm,
+            log_dir=self.log_dir.name,
+            load_shedder=LoadShedder(),
+            model_router=ModelRouter(TIERS),
+        )
+        agent.process_input("What is the capital of France?")
+
+        session = json.loads(next(Path(self.log_dir.name).glob("session_*.json")).read_text())
+        decisions = [c for c in session["tool_calls"] if c["tool_name"] == "model_router"]
+        self.assertEqual([d["parameters"]["role"] for d in decisions], ["classifier", "qa"])
+        self.assertEqual([d["result"] for d in decisions], ["small-model", "small-model"])
+        for decision in decisions:
+            params = decision["parameters"]
+            self.assertLess(params["cost"], params["baseline_cost"])
+        self.assertEqual(llm.model_calls, {"small-model": 2})
+
+    def test_from_config(self):
+        """Test loading tiers and role overrides from JSON."""
+        path = Path(self.log_dir.name) / "tiers.json"
+        path.write_text(json.dumps({
+            "tiers": [
+                {"name": "mini", "model": "m1", "cost_per_1k_tokens": 0.1, "max_input_tokens": 10},
+                {"name": "maxi", "model": "m2", "cost_per_1k_tokens": 1.0, "max_input_tokens": 99},
+            ],
+            "roles": {"qa": "maxi"},
+            "escalate_below": 0.8,
+        }))
+        router = ModelRouter.from_config(str(path))
+
+        self.assertEqual(router.choose("qa", "hi").model, "m2")
+        self.assertEqual(router.choose("classifier", "hi", confidence=0.7).model, "m2")
+        self.assertEqual(router.baseline.name, "maxi")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Test the natural-language expression normalizer and result cache."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.tools import cached_calculate, normalize_expression
+
+
+class TestNormalizer(unittest.TestCase):
+    """Unit tests for normalize_expression."""
+
+    def test_prefixes_and_punctuation(self):
+        """Test that request phrasing and trailing punctuation are removed."""
+        self.assertEqual(normalize_expression("Calculate 15 + 25"), "15 + 25")
+        self.assertEqual(normalize_expression("what's 2+3?"), "2 + 3")
+        self.assertEqual(normalize_expression("solve 100 / 4"), "100 / 4")
+
+    def test_percentages(self):
+        """Test percentage expressions."""
+        expression = normalize_expression("what is 15% of 200")
+        self.assertEqual(cached_calculate(expression), "30.0")
+        self.assertEqual(normalize_expression("50 percent"), "( 50 / 100 )")
+
+    def test_operator_words(self):
+        """Test verb phrases and operator words."""
+        self.assertEqual(normalize_expression("add 3 and 4"), "3 + 4")
+        self.assertEqual(normalize_expression("subtract 3 from 10"), "10 - 3")
+        self.assertEqual(normalize_expression("what's 5 times 8"), "5 * 8")
+        self.assertEqual(normalize_expression("multiply 2.5 by 4"), "2.5 * 4")
+        self.assertEqual(normalize_expression("9 divided by 3"), "9 / 3")
+
+    def test_number_words(self):
+        """Test spelled-out numbers."""
+        self.assertEqual(
+            normalize_expression("twenty-five plus two hundred and five"), "25 + 205"
+        )
+        self.assertEqual(normalize_expression("one thousand minus one"), "1000 - 1")
+
+    def test_canonical_form_shares_cache_entry(self):
+        """Test that equivalent inputs normalize to the same cache key."""
+        cached_calculate.cache_clear()
+        cached_calculate(normalize_expression("2+3"))
+        cached_calculate(normalize_expression("calculate 2 + 3"))
+        self.assertEqual(cached_calculate.cache_info().hits, 1)
+
+    def test_non_arithmetic_is_left_for_calculator(self):
+        """Test that text that is not arithmetic is still rejected."""
+        expression = normalize_expression("what is the capital of France?")
+        self.assertTrue(cached_calculate(expression).startswith("Invalid expression"))
+        self.assertEqual(normalize_expression("!!!"), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
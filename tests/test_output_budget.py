@@ -0,0 +1,184 @@
+"""Test per-role output budgets, early stopping and bounded history."""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.memory import MemoryStore
+from app.metrics import REGISTRY
+from app.prompts import FakeChatLLM
+from app.prompts.llm_gpt import OpenAIChatLLM
+from app.prompts.single_flight import SingleFlight
+from app.services import OutputBudgets
+from app.services.context_builder import estimate_tokens, truncate_head
+from app.services.output_budget import classifier_complete, repeated_paragraph
+
+LIMITS = REGISTRY.counter("agent_output_limit_total", "", ["role", "limit"])
+
+LONG_ANSWER = " ".join(f"Point {i} explains one more detail of the topic." for i in range(300))
+
+
+class RamblingLLM(FakeChatLLM):
+    """Fake LLM whose answers loop over the same paragraphs."""
+
+    def _respond(self, prompt_text, model=None):
+        text = super()._respond(prompt_text, model)
+        if text.startswith("Fake answer"):
+            return "Paris is the capital.\n\nIt is on the Seine.\n\nParis is the capital.\n\nMore."
+        return text
+
+
+class VerboseLLM(FakeChatLLM):
+    """Fake LLM that answers questions at great length."""
+
+    def _respond(self, prompt_text, model=None):
+        text = super()._respond(prompt_text, model)
+        return LONG_ANSWER if text.startswith("Fake answer") else text
+
+
+class TokenizerLLM(FakeChatLLM):
+    """Fake LLM enforcing max_tokens with a tokenizer coarser than ours."""
+
+    def generate(self, prompt_text, model=None, budget=None):
+        text = self._respond(prompt_text, model)
+        return LONG_ANSWER if text.startswith("Fake answer") else text
+
+
+class LegacyLLM:
+    """LLM client that predates output budgets and only takes a prompt."""
+
+    def generate(self, prompt_text):
+        if "USER INPUT:" in prompt_text:
+            return "Intent: QA\nConfidence: 0.9\nReasoning: test\nKeywords_Found: []"
+        return LONG_ANSWER
+
+
+def stream_chunks(text):
+    for line in text.splitlines(keepends=True):
+        delta = SimpleNamespace(content=line)
+        yield SimpleNamespace(
+            choices=[SimpleNamespace(delta=delta, finish_reason=None)], usage=None
+        )
+    yield SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=5, completion_tokens=9))
+
+
+class FakeStream:
+    def __init__(self, text):
+        self.chunks = stream_chunks(text)
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+class TestOutputBudget(unittest.TestCase):
+    """Tests for OutputBudgets and their use by LLM clients and the workflow."""
+
+    def test_stop_conditions_and_truncation(self):
+        """Test the classifier and repetition stop conditions and head truncation."""
+        answer = "Intent: QA\nConfidence: 0.9\nReasoning: r\nKeywords_Found: []\nExtra: x"
+        self.assertIsNone(classifier_complete("Intent: QA\nKeywords_Found: []"))
+        self.assertEqual(classifier_complete(answer), answer[: answer.index("\nExtra")])
+
+        self.assertIsNone(repeated_paragraph("One.\n\nTwo.\n\nOne."))
+        self.assertEqual(repeated_paragraph("One.\n\nTwo.\n\n one.\n\n"), "One.\n\nTwo.")
+
+        text = "The first sentence is right here. Then a second one."
+        self.assertEqual(truncate_head(text, 10), "The first sentence is right here.")
+        self.assertEqual(truncate_head(text, 100), text)
+
+    def test_budgets_and_history(self):
+        """Test role budgets, environment overrides and history shortening."""
+        with patch.dict(
+            os.environ, {"AGENT_OUTPUT_BUDGETS": "qa=50", "AGENT_HISTORY_ANSWER_TOKENS": "20"}
+        ):
+            budgets = OutputBudgets.from_env()
+        self.assertEqual(budgets.for_role("qa").max_tokens, 50)
+        self.assertEqual(budgets.for_role("classifier").max_tokens, 128)
+        self.assertIs(budgets.for_role("qa"), budgets.for_role("qa"))
+
+        self.assertLessEqual(estimate_tokens(budgets.for_role("qa").bound(LONG_ANSWER)), 50)
+        before = LIMITS.value(role="qa", limit="history")
+        shortened = budgets.for_history(LONG_ANSWER, "qa")
+        self.assertIn("[answer shortened,", shortened)
+        self.assertLess(estimate_tokens(shortened), 40)
+        self.assertEqual(LIMITS.value(role="qa", limit="history"), before + 1)
+
+    def test_openai_client_streams_and_stops(self):
+        """Test that max_tokens is sent and a stop condition closes the stream early."""
+        requests = []
+        stream = FakeStream("Intent: QA\nConfidence: 0.9\nKeywords_Found: []\nNoise\n" * 3)
+
+        def create(**request):
+            requests.append(request)
+            if request.get("stream"):
+                return stream
+            choice = SimpleNamespace(message=SimpleNamespace(content="cut"), finish_reason="length")
+            return SimpleNamespace(choices=[choice], usage=None)
+
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+            llm = OpenAIChatLLM(model="budget-test", single_flight=SingleFlight())
+        llm.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        budgets = OutputBudgets()
+
+        before = LIMITS.value(role="classifier", limit="stop_condition")
+        text = llm.generate("classify", budget=budgets.for_role("classifier"))
+        self.assertEqual(text, "Intent: QA\nConfidence: 0.9\nKeywords_Found: []")
+        self.assertEqual(requests[0]["max_tokens"], 128)
+        self.assertTrue(stream.closed)
+        self.assertEqual(stream.read, 3)
+        self.assertEqual(LIMITS.value(role="classifier", limit="stop_condition"), before + 1)
+
+        no_stop = OutputBudgets(stop_conditions={"qa": None}).for_role("qa")
+        before = LIMITS.value(role="qa", limit="max_tokens")
+        self.assertEqual(llm.generate("question", budget=no_stop), "cut")
+        self.assertNotIn("stream", requests[1])
+        self.assertEqual(LIMITS.value(role="qa", limit="max_tokens"), before + 1)
+
+    def test_rambling_and_long_answers_in_a_turn(self):
+        """Test repeat cutting, history shortening and capping only unbudgeted clients."""
+        with tempfile.TemporaryDirectory() as tmp:
+            store = MemoryStore(os.path.join(tmp, "memory.db"))
+            agent = IntegratedAgent(llm=RamblingLLM(), log_dir=tmp, memory_store=store)
+            response = agent.process_input("What is the capital of France?")
+            self.assertEqual(response.answer, "Paris is the capital.\n\nIt is on the Seine.")
+
+            budgets = OutputBudgets(budgets={"qa": 4000})
+            agent = IntegratedAgent(
+                llm=VerboseLLM(), log_dir=tmp, memory_store=store, output_budgets=budgets
+            )
+            response = agent.process_input("Tell me everything about Paris?")
+            self.assertEqual(response.answer, LONG_ANSWER)
+            history = agent.conversation_messages[-1].content
+            self.assertIn("[answer shortened,", history)
+            self.assertLess(estimate_tokens(history), 300)
+            self.assertEqual(agent.memory[-1]["response"], history)
+
+            before = LIMITS.value(role="qa", limit="truncated")
+            agent = IntegratedAgent(llm=TokenizerLLM(), log_dir=tmp, memory_store=store)
+            response = agent.process_input("Tell me everything about Lyon?")
+            self.assertEqual(response.answer, LONG_ANSWER)
+            self.assertEqual(LIMITS.value(role="qa", limit="truncated"), before)
+
+            agent = IntegratedAgent(llm=LegacyLLM(), log_dir=tmp, memory_store=store)
+            response = agent.process_input("Tell me everything about Rome?")
+            self.assertLessEqual(estimate_tokens(response.answer), 512)
+            self.assertTrue(LONG_ANSWER.startswith(response.answer))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""Test opt-in per-turn profiling."""
+
+import io
+import json
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.logging import TurnProfiler
+from app.logging.profiler import main as profiler_main
+from app.prompts import FakeChatLLM
+
+
+class TestTurnProfiler(unittest.TestCase):
+    """Tests for TurnProfiler and its aggregation CLI."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_agent(self, **kwargs):
+        profiler = TurnProfiler(str(self.log_dir), **kwargs)
+        return IntegratedAgent(llm=FakeChatLLM(), log_dir=self.tmp.name, profiler=profiler)
+
+    def test_forced_profile_is_saved_with_session_id(self):
+        """Test that a forced turn writes artifacts named after its session."""
+        agent = self.make_agent(sample_rate=0, mode="both")
+        agent.process_input("5 + 7", profile=True)
+
+        (session_file,) = self.log_dir.glob("session_*.json")
+        session_id = session_file.stem.split("_", 1)[1]
+        self.assertTrue((self.log_dir / "profiles" / f"{session_id}.prof").exists())
+        memory = json.loads((self.log_dir / "profiles" / f"{session_id}.mem.json").read_text())
+        self.assertGreater(memory["peak_bytes"], 0)
+
+        session = json.loads(session_file.read_text())
+        self.assertIn("profiler", [c["tool_name"] for c in session["tool_calls"]])
+
+    def test_sampling(self):
+        """Test that sample rates of 0 and 1 never and always profile."""
+        agent = self.make_agent(sample_rate=0)
+        agent.process_input("5 + 7")
+        self.assertEqual(list(self.log_dir.glob("**/*.prof")), [])
+
+        agent = self.make_agent(sample_rate=1)
+        agent.process_input("5 + 7")
+        agent.process_input("5 + 8", profile=False)
+        self.assertEqual(len(list(self.log_dir.glob("profiles/*.prof"))), 1)
+
+    def test_overlapping_turns_profile_one_at_a_time(self):
+        """Test that a turn overlapping a CPU-profiled one is not CPU-profiled."""
+        profiler = TurnProfiler(str(self.log_dir), mode="cpu")
+        with profiler.profile("outer", force=True) as outer:
+            with profiler.profile("inner", force=True) as inner:
+                pass
+        self.assertEqual(inner, [])
+        self.assertEqual(len(outer), 1)
+        with profiler.profile("after", force=True) as after:
+            pass
+        self.assertEqual(len(after), 1)
+
+    def test_aggregate_cli(self):
+        """Test that the CLI merges profiles into one hot-function report."""
+        agent = self.make_agent(sample_rate=1, mode="both")
+        agent.process_input("5 + 7")
+        agent.process_input("What is the capital of France?")
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            profiler_main(["--logs", str(self.log_dir), "--top", "5"])
+        report = out.getvalue()
+        self.assertIn("invoke", report)
+        self.assertIn("2 sessions", report)
+        self.assertIn("worker threads", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""Test the versioned, hot-reloaded prompt registry."""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.prompts import FakeChatLLM, PromptRegistry, PromptTemplate
+from app.prompts.registry import LIBRARY_DIR, _scan
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPromptRegistry(unittest.TestCase):
+    """Tests for PromptRegistry and compiled templates."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, filename, text):
+        (self.dir / filename).write_text(text + "\n")
+
+    def test_compiled_format_matches_str_format(self):
+        """Test that precompiled templates format exactly like str.format."""
+        template = "{{literal}} {name!r} {count:>4} {ratio:.2f} {name}"
+        values = {"name": "x", "count": 7, "ratio": 1 / 3}
+        self.assertEqual(
+            PromptTemplate(["name", "count", "ratio"], template).format(**values),
+            template.format(**values),
+        )
+        with self.assertRaises(ValueError):
+            PromptTemplate([], "{0} {a.b}")
+
+    def test_versions_pins_and_overrides(self):
+        """Test that the highest version wins unless pinned, and overrides apply."""
+        self.write("qa.v2.txt", "Answer briefly: {user_input}")
+        self.write("qa.v3.txt", "Answer in detail: {user_input}")
+        self.write("system_qa.v1.txt", "Overridden system prompt.")
+
+        prompts = PromptRegistry(str(self.dir)).snapshot()
+        self.assertEqual(prompts.get("qa").version, 3)
+        self.assertEqual(prompts.get("qa").input_variables, ["user_input"])
+        self.assertEqual(prompts.get("system_qa").template, "Overridden system prompt.")
+        self.assertIn("intent_classification", prompts.versions)
+
+        pinned = PromptRegistry(str(self.dir), pins={"qa": 2}).snapshot()
+        self.assertEqual(pinned.format("qa", user_input="hi"), "Answer briefly: hi")
+        self.assertTrue(pinned.versions["qa"].startswith("v2."))
+        with self.assertRaises(ValueError):
+            PromptRegistry(str(self.dir), pins={"qa": 9})
+
+    def test_hot_reload(self):
+        """Test reloading on change, chat prompt caching and bad templates."""
+        clock = FakeClock()
+        registry = PromptRegistry(str(self.dir), check_interval=2.0, clock=clock)
+        first = registry.snapshot()
+        self.assertIs(first.chat_prompt("qa"), first.chat_prompt("qa"))
+        self.assertIs(first.chat_prompt("unknown"), first.chat_prompt("unknown"))
+
+        self.write("system_qa.v2.txt", "You answer in one sentence.")
+        self.assertIs(registry.snapshot(), first)  # not checked before the interval
+        clock.now = 2.5
+        second = registry.snapshot()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.get("system_qa").version, 2)
+        chat = second.chat_prompt("qa").format_messages(user_input="hi")
+        self.assertEqual(chat[0].content, "You answer in one sentence.")
+        # A turn holding the old snapshot still sees the old template
+        self.assertEqual(first.get("system_qa").version, 1)
+
+        self.write("qa.v2.txt", "Broken {0}")
+        clock.now = 5.0
+        self.assertIs(registry.snapshot(), second)
+        self.assertIn("Unsupported template field", registry.last_error)
+
+    def test_file_removed_during_reload(self):
+        """Test that a template vanishing mid-reload keeps the current snapshot."""
+        clock = FakeClock()
+        registry = PromptRegistry(str(self.dir), check_interval=2.0, clock=clock)
+        first = registry.snapshot()
+        listed = _scan([LIBRARY_DIR, self.dir])
+        listed[("qa", 7)] = self.dir / "qa.v7.txt"  # listed, then deleted
+
+        clock.now = 2.5
+        with patch("app.prompts.registry._scan", return_value=listed):
+            self.assertIs(registry.snapshot(), first)
+        self.assertIn("qa.v7.txt", registry.last_error)
+
+        self.write("qa.v2.txt", "Answer briefly: {user_input}")
+        clock.now = 5.0
+        self.assertEqual(registry.snapshot().get("qa").version, 2)
+
+    def test_library_is_complete(self):
+        """Test that every packaged template parses and the file names are valid."""
+        prompts = PromptRegistry(check_interval=None).snapshot()
+        self.assertEqual(len(prompts.prompts), len(list(LIBRARY_DIR.glob("*.txt"))))
+        self.assertIn("USER INPUT: {user_input}", prompts.get("intent_classification").template)
+
+    def test_turn_uses_and_logs_prompt_versions(self):
+        """Test that turns use the registry's templates and log their versions."""
+        self.write("qa.v2.txt", "Answer briefly: {user_input}")
+        log_dir = self.dir / "logs"
+        agent = IntegratedAgent(
+            llm=FakeChatLLM(),
+            log_dir=str(log_dir),
+            prompt_registry=PromptRegistry(str(self.dir)),
+        )
+        response = agent.process_input("What is the capital of France?")
+
+        self.assertIn("Answer briefly: What is the capital of France?", response.answer)
+        session = json.loads(next(log_dir.glob("session_*.json")).read_text())
+        self.assertTrue(session["prompt_versions"]["qa"].startswith("v2."))
+        self.assertTrue(session["prompt_versions"]["intent_classification"].startswith("v1."))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Test the fast-path records and session logging."""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from pydantic import ValidationError
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.logging import SimpleLogger
+from app.schemas import AnswerResponse, build_answer, build_intent, validate_response
+
+
+def write_session(fast_path):
+    with tempfile.TemporaryDirectory() as tmp:
+        logger = SimpleLogger(log_dir=tmp, fast_path=fast_path)
+        session_id = logger.start_session("calculate 2 + 3")
+        logger.log_tool_call("calculator", {"expression": "2 + 3"}, "5")
+        logger.end_session("5")
+        text = (Path(tmp) / f"session_{session_id}.json").read_text()
+    return text
+
+
+class TestRecords(unittest.TestCase):
+    """Unit tests for fast-path records."""
+
+    def test_session_files_have_same_shape(self):
+        """Test that fast-path session logs match the validated layout."""
+        validated = json.loads(write_session(False))
+        fast_text = write_session(True)
+        fast = json.loads(fast_text)
+
+        self.assertNotIn("\n", fast_text)
+        self.assertEqual(set(fast), set(validated))
+        self.assertEqual(set(fast["tool_calls"][0]), set(validated["tool_calls"][0]))
+        self.assertEqual(fast["tool_calls"][0]["result"], "5")
+        self.assertEqual(fast["response"], "5")
+
+    def test_build_models_on_fast_path(self):
+        """Test that fast-path constructors fill defaults without validating."""
+        answer = build_answer(
+            fast=True, question="q", answer="a", sources=["s"], confidence=1.0
+        )
+        intent = build_intent(
+            fast=True, intent_type="qa", confidence=0.9, reasoning="r"
+        )
+        self.assertIsInstance(answer, AnswerResponse)
+        self.assertIsNotNone(answer.timestamp)
+        self.assertEqual(intent.keywords_found, [])
+
+    def test_validate_response_at_boundary(self):
+        """Test that invalid fast-path data is caught at the boundary."""
+        answer = build_answer(
+            fast=True, question="q", answer="a", sources=["s"], confidence=2.0
+        )
+        with self.assertRaises(ValidationError):
+            validate_response(answer, fast=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
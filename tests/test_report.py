@@ -0,0 +1,100 @@
+"""Test the report intent and its parallel section generation."""
+
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.prompts import FakeChatLLM
+from app.services import LoadShedder
+from app.workflow.report import fill_figures, parse_plan, requested_sections
+
+
+class FigureLLM(FakeChatLLM):
+    """Fake LLM whose sections ask for a figure via a calc marker."""
+
+    def generate(self, prompt_text):
+        if prompt_text.startswith("Write the section"):
+            return "Revenue grew by [[calc: 1200 * 0.15]] dollars."
+        return super().generate(prompt_text)
+
+
+class TestReport(unittest.TestCase):
+    """Tests for planning, parallel writing and assembly of reports."""
+
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.log_dir.cleanup()
+
+    def make_agent(self, llm, **kwargs):
+        return IntegratedAgent(
+            llm=llm, log_dir=self.log_dir.name, load_shedder=LoadShedder(), **kwargs
+        )
+
+    def test_plan_helpers(self):
+        """Test section counting and outline parsing."""
+        self.assertEqual(requested_sections("write a 10-section report"), 10)
+        self.assertEqual(requested_sections("a report with 3 sections"), 3)
+        self.assertEqual(requested_sections("a 50-section report"), 10)
+        self.assertEqual(requested_sections("write a report"), 4)
+        self.assertEqual(
+            parse_plan("1. Intro\n2) Market\n- Risks\n\n4. Intro", 5), ["Intro", "Market", "Risks"]
+        )
+
+    def test_sections_run_in_parallel(self):
+        """Test that a 10-section report takes about as long as its slowest section."""
+        latency = 0.2
+        agent = self.make_agent(FakeChatLLM(latency=latency), max_concurrency=10)
+
+        started = time.perf_counter()
+        response = agent.process_input("Write a 10-section report on cloud costs")
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(response.sources, ["report_builder"])
+        self.assertEqual(response.answer.count("\n## "), 10)
+        # classify + plan + one parallel round of sections, versus 12 calls in sequence
+        self.assertLess(elapsed, 6 * latency)
+        self.assertGreater(response.confidence, 0.5)
+
+    def test_sections_are_ordered_and_streamed(self):
+        """Test that sections stream as written and assemble in plan order."""
+        agent = self.make_agent(FakeChatLLM(), max_concurrency=2)
+        sections = []
+        response = agent.process_input("Write a 5-section report on churn", on_section=sections.append)
+
+        self.assertEqual(sorted(s["index"] for s in sections), [0, 1, 2, 3, 4])
+        positions = [response.answer.index(f"## Section {i}\n") for i in range(1, 6)]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_figures_computed_locally(self):
+        """Test that calc markers are replaced by calculator results."""
+        self.assertEqual(fill_figures("x [[calc: 2 + 3]] y"), "x 5 y")
+        self.assertEqual(fill_figures("[[calc: oops]]"), "[[calc: oops]]")
+
+        agent = self.make_agent(FigureLLM())
+        response = agent.process_input("Write a 2-section report on revenue")
+        self.assertIn("Revenue grew by 180", response.answer)
+        self.assertNotIn("[[calc", response.answer)
+
+    def test_shedding_degrades_sections(self):
+        """Test that a degraded shedder yields a complete but low-confidence report."""
+        shedder = LoadShedder(probe_interval=3600)
+        shedder.record(60.0, ok=False)
+        llm = FakeChatLLM()
+        agent = IntegratedAgent(llm=llm, log_dir=self.log_dir.name, load_shedder=shedder)
+
+        response = agent.process_input("Write a report on latency")
+        self.assertIn("## Overview", response.answer)
+        self.assertEqual(response.confidence, 0.0)
+        self.assertEqual(llm.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
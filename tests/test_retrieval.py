@@ -0,0 +1,97 @@
+"""Test document chunking, the memory-mapped BM25 index and grounded QA."""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.prompts import FakeChatLLM
+from app.retrieval import DocumentIndex, chunk_text
+
+
+def keyword_embedder(texts):
+    """Toy embedder: one dimension per topic keyword."""
+    topics = ["money", "people", "place"]
+    return np.array([[t.lower().count(topic) for topic in topics] for t in texts], dtype=float)
+
+
+class TestRetrieval(unittest.TestCase):
+    """Tests for chunk_text and DocumentIndex."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.docs = Path(self.tmp.name, "docs")
+        self.docs.mkdir()
+        self.index_dir = os.path.join(self.tmp.name, "index")
+        self.write("q3.md", "The Q3 revenue was 4.2 million, driven by enterprise sales.")
+        self.write("company.txt", "Our head office is in Lisbon. The CEO is Jane Doe.")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        (self.docs / name).write_text(text)
+        # Make sure mtime changes even on coarse-grained filesystems
+        os.utime(self.docs / name, (time.time() + len(text), time.time() + len(text)))
+
+    def test_chunk_text_overlaps(self):
+        """Test that chunks respect the size and overlap."""
+        text = " ".join(f"w{i}" for i in range(25))
+        chunks = chunk_text(text, max_words=10, overlap=2)
+        self.assertEqual([len(c.split()) for c in chunks], [10, 10, 9])
+        self.assertEqual(chunks[1].split()[0], "w8")
+
+    def test_search_and_incremental_update(self):
+        """Test ranking, unchanged files being skipped and changed files replaced."""
+        index = DocumentIndex(self.index_dir)
+        stats = index.update(str(self.docs))
+        self.assertEqual((stats["added"], stats["chunks"]), (2, 2))
+        self.assertEqual(index.search("What was Q3 revenue?")[0].source, "q3.md#0")
+
+        stats = index.update(str(self.docs))
+        self.assertEqual((stats["unchanged"], stats["chunks"]), (2, 0))
+
+        self.write("company.txt", "The head office moved to Porto.")
+        (self.docs / "q3.md").unlink()
+        stats = index.update(str(self.docs))
+        self.assertEqual((stats["updated"], stats["removed"]), (1, 1))
+
+        reopened = DocumentIndex(self.index_dir)
+        self.assertEqual(reopened.n_chunks, 1)
+        self.assertIn("Porto", reopened.search("where is the head office")[0].text)
+        self.assertEqual(reopened.search("revenue"), [])
+
+    def test_compact_and_dense_fusion(self):
+        """Test that compaction keeps results and dense vectors are fused in."""
+        index = DocumentIndex(self.index_dir, embed=keyword_embedder)
+        index.update(str(self.docs))
+        self.write("money.txt", "Money money money: budgets and money.")
+        index.update(str(self.docs))
+        self.assertEqual(len(index.segments), 2)
+
+        index.compact()
+        self.assertEqual(len(index.segments), 1)
+        self.assertEqual(index.n_chunks, 3)
+        hits = index.search("money", k=2)
+        self.assertEqual(hits[0].source, "money.txt#0")
+        self.assertIsNotNone(index.segments[0].vectors)
+
+    def test_qa_agent_uses_documents(self):
+        """Test that grounded QA answers cite the retrieved chunks."""
+        index = DocumentIndex(self.index_dir)
+        index.update(str(self.docs))
+        agent = IntegratedAgent(llm=FakeChatLLM(), log_dir=self.tmp.name, retriever=index)
+        response = agent.process_input("Who is the CEO?")
+        self.assertEqual(response.sources, ["company.txt#0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
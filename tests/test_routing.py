@@ -0,0 +1,95 @@
+"""Test confidence-aware routing and combined answer confidence."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.workflow import create_workflow
+
+
+class ScriptedLLM:
+    """LLM stub that classifies with a fixed intent and confidence."""
+
+    def __init__(self, intent, confidence):
+        self.classification = (
+            f"Intent: {intent}\nConfidence: {confidence}\nReasoning: scripted"
+        )
+        self.answers = 0
+
+    def generate(self, prompt_text):
+        if "USER INPUT:" in prompt_text:
+            return self.classification
+        self.answers += 1
+        return "Paris"
+
+
+class TestConfidenceRouting(unittest.TestCase):
+    """Tests for low-confidence early exit and confidence combination."""
+
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.log_dir.cleanup()
+
+    def make_agent(self, intent, confidence, **kwargs):
+        llm = ScriptedLLM(intent, confidence)
+        return IntegratedAgent(llm=llm, log_dir=self.log_dir.name, **kwargs), llm
+
+    def test_confident_qa_combines_confidence(self):
+        """Test that QA confidence is classifier confidence times node confidence."""
+        agent, llm = self.make_agent("QA", 0.8)
+        response = agent.process_input("What is the capital of France?")
+        self.assertEqual(response.answer, "Paris")
+        self.assertAlmostEqual(response.confidence, 0.8 * 0.9)
+        self.assertEqual(llm.answers, 1)
+
+    def test_low_confidence_asks_for_clarification(self):
+        """Test that a low-confidence intent skips the QA generation call."""
+        agent, llm = self.make_agent("QA", 0.2)
+        response = agent.process_input("hmm, the thing from before")
+        self.assertEqual(response.sources, ["clarification"])
+        self.assertIn("answer a question", response.answer)
+        self.assertAlmostEqual(response.confidence, 0.2)
+        self.assertEqual(llm.answers, 0)
+
+    def test_low_confidence_calculation_answered_locally(self):
+        """Test that the clarify node answers valid calculations locally."""
+        agent, llm = self.make_agent("QA", 0.2)
+        response = agent.process_input("add 3 and 4")
+        self.assertEqual(response.answer, "7")
+        self.assertEqual(response.sources, ["calculator_tool"])
+        self.assertEqual(llm.answers, 0)
+
+    def test_thresholds_are_configurable(self):
+        """Test that per-intent thresholds override the defaults."""
+        agent, llm = self.make_agent("QA", 0.8, confidence_thresholds={"qa": 0.9})
+        response = agent.process_input("What is the capital of France?")
+        self.assertEqual(response.sources, ["clarification"])
+        self.assertEqual(llm.answers, 0)
+
+    def test_calculator_errors_lower_confidence(self):
+        """Test that a failed calculation reports low confidence."""
+        agent, _ = self.make_agent("CALCULATION", 1.0)
+        response = agent.process_input("divide 5 by 0")
+        self.assertTrue(response.answer.startswith("Error"))
+        self.assertAlmostEqual(response.confidence, 0.2)
+
+    def test_compiled_workflow_is_shared(self):
+        """Test that agents with the same configuration share one compiled graph."""
+        first, _ = self.make_agent("QA", 0.8)
+        second, _ = self.make_agent("QA", 0.8, confidence_thresholds={})
+        custom, _ = self.make_agent("QA", 0.8, confidence_thresholds={"qa": 0.9})
+        self.assertIs(first.workflow, second.workflow)
+        self.assertIs(first.workflow, create_workflow({"qa": 0.5}))
+        self.assertIsNot(first.workflow, custom.workflow)
+        self.assertIs(first.memory_store, second.memory_store)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,249 @@
+"""Test per-conversation turn ordering and idempotent retries."""
+
+import asyncio
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.metrics import MetricsRegistry
+from app.prompts import FakeChatLLM
+from app.server import AgentService, ConversationScheduler, Rejected
+from test_server import request
+
+
+class TestConversationScheduler(unittest.TestCase):
+    """Tests for the scheduler on its own."""
+
+    def test_serializes_within_conversation(self):
+        """Test that turns of one conversation never overlap but others do."""
+        scheduler = ConversationScheduler()
+        running = {"a": 0, "b": 0}
+        peak = {"a": 0, "b": 0, "total": 0}
+
+        async def turn(cid):
+            async with scheduler.turn(cid):
+                running[cid] += 1
+                peak[cid] = max(peak[cid], running[cid])
+                peak["total"] = max(peak["total"], sum(running.values()))
+                await asyncio.sleep(0.01)
+                running[cid] -= 1
+
+        async def run():
+            await asyncio.gather(*[turn(cid) for cid in "abab"])
+
+        asyncio.run(run())
+        self.assertEqual((peak["a"], peak["b"], peak["total"]), (1, 1, 2))
+        self.assertEqual(scheduler.active, 0)
+
+    def test_rejects_beyond_max_pending(self):
+        """Test that a conversation's waiting turns are bounded."""
+        scheduler = ConversationScheduler(max_pending=2)
+
+        async def turn():
+            async with scheduler.turn("c"):
+                await asyncio.sleep(0.01)
+
+        async def run():
+            return await asyncio.gather(*[turn() for _ in range(3)], return_exceptions=True)
+
+        outcomes = asyncio.run(run())
+        self.assertIsInstance(outcomes[2], Rejected)
+        self.assertEqual(outcomes[2].status, 429)
+
+    def test_run_once(self):
+        """Test that a key runs once, duplicates share it, and failures are retried."""
+        scheduler = ConversationScheduler()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return {"n": len(runs)}
+
+        async def fail():
+            raise ValueError("upstream")
+
+        async def run():
+            concurrent = await asyncio.gather(
+                scheduler.run_once("c", "k", work), scheduler.run_once("c", "k", work)
+            )
+            later = await scheduler.run_once("c", "k", work)
+            other = await scheduler.run_once("d", "k", work)
+            with self.assertRaises(ValueError):
+                await scheduler.run_once("c", "f", fail)
+            retried = await scheduler.run_once("c", "f", work)
+            return concurrent, later, other, retried
+
+        concurrent, later, other, retried = asyncio.run(run())
+        self.assertEqual(concurrent, [({"n": 1}, False), ({"n": 1}, True)])
+        self.assertEqual(later, ({"n": 1}, True))
+        self.assertEqual(other, ({"n": 2}, False))
+        self.assertEqual(retried, ({"n": 3}, False))
+        self.assertEqual(scheduler.replayed, 2)
+
+
+class TestServiceOrdering(unittest.TestCase):
+    """Tests for turn ordering and idempotency through the service."""
+
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.llm = FakeChatLLM()
+        self.agents = []
+
+    def tearDown(self):
+        self.log_dir.cleanup()
+
+    def make_agent(self, conversation_id, load_shedder):
+        agent = IntegratedAgent(
+            llm=self.llm,
+            log_dir=self.log_dir.name,
+            conversation_id=conversation_id,
+            load_shedder=load_shedder,
+        )
+        self.agents.append(agent)
+        return agent
+
+    def make_service(self, **kwargs):
+        return AgentService(agent_factory=self.make_agent, registry=MetricsRegistry(), **kwargs)
+
+    def test_concurrent_turns_keep_history(self):
+        """Test that simultaneous turns in one conversation are all remembered."""
+        self.llm.latency = 0.05
+        service = self.make_service(max_concurrency=4)
+        inputs = ["5 + 7", "10 * 5", "What is the capital of France?"]
+
+        async def run():
+            return await asyncio.gather(*[
+                request(service, "POST", "/v1/turns", {"conversation_id": "c", "input": text})
+                for text in inputs
+            ])
+
+        statuses = [status for status, _ in asyncio.run(run())]
+        self.assertEqual(statuses, [200, 200, 200])
+        (agent,) = self.agents
+        asked = [m.content for m in agent.conversation_messages if m.type == "human"]
+        self.assertEqual(asked, inputs)
+
+    def test_idempotent_retry(self):
+        """Test that a retried key replays the response without another LLM call."""
+        service = self.make_service()
+        body = {"conversation_id": "c", "input": "What is the capital of France?"}
+
+        async def run():
+            first = await request(service, "POST", "/v1/turns", {**body, "idempotency_key": "k1"})
+            calls = self.llm.calls
+            retry = await request(service, "POST", "/v1/turns", {**body, "idempotency_key": "k1"})
+            return first, retry, calls
+
+        (_, first), (status, retry), calls = asyncio.run(run())
+        first, retry = json.loads(first), json.loads(retry)
+        self.assertEqual(status, 200)
+        self.assertTrue(retry["replayed"])
+        self.assertNotIn("replayed", first)
+        self.assertEqual(retry["response"], first["response"])
+        self.assertEqual(self.llm.calls, calls)
+        self.assertEqual(service.scheduler.replayed, 1)
+
+    def test_failed_turn_is_not_replayed(self):
+        """Test that a retry after a failed turn runs again instead of replaying."""
+        service = self.make_service()
+        body = {"conversation_id": "c", "input": "5 + 7", "idempotency_key": "k1"}
+
+        async def run():
+            first = await request(service, "POST", "/v1/turns", body)
+            (agent,) = self.agents
+            # The next turn fails inside the workflow; the agent answers from error_handler
+            workflow = agent.workflow
+            agent.workflow = None
+            failed = await request(service, "POST", "/v1/turns", {**body, "idempotency_key": "k2"})
+            agent.workflow = workflow
+            retry = await request(service, "POST", "/v1/turns", {**body, "idempotency_key": "k2"})
+            return first, failed, retry
+
+        first, failed, retry = (json.loads(payload) for _, payload in asyncio.run(run()))
+        self.assertEqual(failed["response"]["sources"], ["error_handler"])
+        self.assertNotIn("replayed", retry)
+        self.assertEqual(retry["response"]["answer"], first["response"]["answer"])
+        self.assertEqual(service.scheduler.replayed, 0)
+
+    def test_idempotency_header(self):
+        """Test that the Idempotency-Key header works like the body field."""
+        service = self.make_service()
+        body = {"conversation_id": "c", "input": "5 + 7"}
+        headers = [(b"idempotency-key", b"retry-1")]
+
+        async def run():
+            first = await request(service, "POST", "/v1/turns", body, headers)
+            retry = await request(service, "POST", "/v1/turns", body, headers)
+            return json.loads(first[1]), json.loads(retry[1])
+
+        first, retry = asyncio.run(run())
+        self.assertEqual(retry["response"]["answer"], first["response"]["answer"])
+        self.assertTrue(retry.get("replayed"))
+
+    def test_busy_agents_are_not_evicted(self):
+        """Test that eviction skips a conversation whose turn is still running."""
+        self.llm.latency = 0.1
+        service = self.make_service(max_concurrency=4, max_conversations=1)
+
+        def turn(conversation_id, text):
+            body = {"conversation_id": conversation_id, "input": text}
+            return request(service, "POST", "/v1/turns", body)
+
+        async def run():
+            await asyncio.gather(turn("a", "What is AI?"), turn("b", "5 + 7"))
+            await turn("a", "What is ML?")
+
+        asyncio.run(run())
+        self.assertEqual([agent.conversation_id for agent in self.agents], ["a", "b"])
+        asked = [m.content for m in self.agents[0].conversation_messages if m.type == "human"]
+        self.assertEqual(asked, ["What is AI?", "What is ML?"])
+        self.assertEqual(list(service.conversations), ["a"])
+
+    def test_services_have_own_load_shedders(self):
+        """Test that each service feeds only its own load shedder its queue depth."""
+        one, two = self.make_service(), self.make_service()
+        self.assertIsNot(one.load_shedder, two.load_shedder)
+        one.admission.queued = 5
+        self.assertEqual(one.load_shedder.queue_depth(), 5)
+        self.assertEqual(two.load_shedder.queue_depth(), 0)
+        one.admission.queued = 0
+
+        asyncio.run(request(one, "POST", "/v1/turns", {"conversation_id": "a", "input": "5 + 7"}))
+        self.assertIs(self.agents[0].load_shedder, one.load_shedder)
+
+
+class TestAgentTurnLock(unittest.TestCase):
+    """Tests for turn serialization on the agent itself."""
+
+    def test_threads_and_idempotency(self):
+        """Test that threaded turns are all kept and keyed turns run once."""
+        with tempfile.TemporaryDirectory() as log_dir:
+            llm = FakeChatLLM(latency=0.02)
+            agent = IntegratedAgent(llm=llm, log_dir=log_dir)
+            threads = [
+                threading.Thread(target=agent.process_input, args=(f"{i} + 1",))
+                for i in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(len([m for m in agent.conversation_messages if m.type == "human"]), 4)
+
+            first = agent.process_input("What is the capital of France?", idempotency_key="k")
+            calls = llm.calls
+            again = agent.process_input("What is the capital of France?", idempotency_key="k")
+            self.assertIs(again, first)
+            self.assertEqual(llm.calls, calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Test the ASGI service against the fake LLM."""
+
+import asyncio
+import json
+import sys
+import tempfile
+import unittest
+from functools import partial
+from pathlib import Path
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agent import IntegratedAgent
+from app.metrics import MetricsRegistry
+from app.prompts import FakeChatLLM
+from app.server import AgentService
+
+
+async def request(app, method, path, body=None, headers=()):
+    """Drive one HTTP request through the ASGI app and collect the response."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    messages = [{"type": "http.request", "body": payload, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": list(headers)}
+    await app(scope, receive, send)
+    status = sent[0]["status"]
+    raw = b"".join(m.get("body", b"") for m in sent[1:])
+    return status, raw
+
+
+class TestAgentService(unittest.TestCase):
+    """Tests for AgentService endpoints and backpressure."""
+
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.llm = FakeChatLLM()
+
+    def tearDown(self):
+        self.log_dir.cleanup()
+
+    def make_service(self, **kwargs):
+        return AgentService(
+            agent_factory=partial(IntegratedAgent, llm=self.llm, log_dir=self.log_dir.name),
+            registry=MetricsRegistry(),
+            **kwargs,
+        )
+
+    def test_turn_with_conversation_id(self):
+        """Test that turns in one conversation share memory."""
+        service = self.make_service()
+
+        async def run():
+            await request(
+                service, "POST", "/v1/turns",
+                {"conversation_id": "c1", "input": "What is the capital of France?"},
+            )
+            return await request(
+                service, "POST", "/v1/turns",
+                {"conversation_id": "c1", "input": "What did I just ask?"},
+            )
+
+        status, raw = asyncio.run(run())
+        result = json.loads(raw)
+        self.assertEqual(status, 200)
+        self.assertEqual(result["conversation_id"], "c1")
+        self.assertIn("capital of france", result["response"]["answer"].lower())
+
+    def test_memory_survives_eviction(self):
+        """Test that an evicted conversation's rebuilt agent finds its memory."""
+        service = self.make_service(max_conversations=1)
+
+        async def run():
+            for conversation_id, text in (("a", "5 + 7"), ("b", "10 * 5"), ("a", "2 + 2")):
+                await request(
+                    service, "POST", "/v1/turns",
+                    {"conversation_id": conversation_id, "input": text},
+                )
+
+        asyncio.run(run())
+        self.assertEqual(list(service.conversations), ["a"])
+        agent = service.conversations["a"]
+        self.assertEqual(agent.conversation_id, "a")
+        self.assertEqual([m["user_input"] for m in agent.get_memory()], ["5 + 7", "2 + 2"])
+
+    def test_batch(self):
+        """Test that a batch returns one result per turn."""
+        service = self.make_service()
+        body = {"turns": [{"input": "5 + 7"}, {"input": "add 3 and 4"}]}
+        status, raw = asyncio.run(request(service, "POST", "/v1/batches", body))
+        answers = [r["response"]["answer"] for r in json.loads(raw)["results"]]
+        self.assertEqual(status, 200)
+        self.assertEqual(answers, ["12", "7"])
+
+    def test_stream(self):
+        """Test that streamed turns emit node steps then the response."""
+        service = self.make_service()
+        status, raw = asyncio.run(
+            request(service, "POST", "/v1/turns/stream", {"input": "10 * 5"})
+        )
+        events = [json.loads(line) for line in raw.decode().splitlines()]
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [e.get("node") for e in events[:-1]],
+            ["classify_intent", "calculation_agent", "update_memory"],
+        )
+        self.assertEqual(events[-1]["response"]["answer"], "50")
+
+    def test_backpressure(self):
+        """Test that requests beyond the queue are rejected with 429."""
+        self.llm.latency = 0.2
+        service = self.make_service(max_concurrency=1, max_queue=1)
+
+        async def run():
+            return await asyncio.gather(
+                *[request(service, "POST", "/v1/turns", {"input": "hello"}) for _ in range(4)]
+            )
+
+        statuses = sorted(status for status, _ in asyncio.run(run()))
+        self.assertEqual(statuses, [200, 200, 429, 429])
+
+    def test_drain_and_health(self):
+        """Test that draining turns health to 503 and rejects new turns."""
+        service = self.make_service()
+
+        async def run():
+            await service.drain()
+            health = await request(service, "GET", "/healthz")
+            turn = await request(service, "POST", "/v1/turns", {"input": "hi"})
+            return health, turn
+
+        (health_status, _), (turn_status, _) = asyncio.run(run())
+        self.assertEqual(health_status, 503)
+        self.assertEqual(turn_status, 503)
+
+    def test_metrics_and_errors(self):
+        """Test the metrics endpoint and request validation."""
+        service = self.make_service()
+
+        async def run():
+            bad = await request(service, "POST", "/v1/turns", {"input": 3})
+            missing = await request(service, "GET", "/nope")
+            metrics = await request(service, "GET", "/metrics")
+            return bad, missing, metrics
+
+        (bad, _), (missing, _), (_, metrics) = asyncio.run(run())
+        self.assertEqual(bad, 400)
+        self.assertEqual(missing, 404)
+        self.assertIn('agent_http_requests_total{path="/v1/turns",status="400"} 1', metrics.decode())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Test single-flight coalescing of identical LLM requests."""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add parent directory to path so we can import app module
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.prompts import OpenAIChatLLM, SingleFlight
+
+
+class FakeCompletions:
+    """Fake chat.completions endpoint that counts upstream calls."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def create(self, model, temperature, messages):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        content = f"echo: {messages[-1]['content']}"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+
+
+def make_llm(completions):
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+        llm = OpenAIChatLLM(model="test-model", single_flight=SingleFlight())
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return llm
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Unit tests for SingleFlight and its use in OpenAIChatLLM."""
+
+    def test_threads_share_one_call(self):
+        """Test that concurrent identical threaded requests make one upstream call."""
+        completions = FakeCompletions()
+        llm = make_llm(completions)
+        results = []
+
+        threads = [
+            threading.Thread(target=lambda: results.append(llm.generate("same prompt")))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(completions.calls, 1)
+        self.assertEqual(results, ["echo: same prompt"] * 8)
+        stats = llm.single_flight.stats()
+        self.assertEqual(stats["coalesced"], 7)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_different_requests_are_not_coalesced(self):
+        """Test that different prompts each go upstream."""
+        completions = FakeCompletions(delay=0)
+        llm = make_llm(completions)
+        llm.generate("one")
+        llm.generate("two")
+        llm.chat([{"role": "user", "content": "one"}])
+        self.assertEqual(completions.calls, 3)
+
+    def test_async_tasks_share_one_call(self):
+        """Test that concurrent identical asyncio requests make one upstream call."""
+        completions = FakeCompletions()
+        llm = make_llm(completions)
+
+        async def run():
+            return await asyncio.gather(*[llm.agenerate("same prompt") for _ in range(5)])
+
+        results = asyncio.run(run())
+        self.assertEqual(completions.calls, 1)
+        self.assertEqual(results, ["echo: same prompt"] * 5)
+        self.assertEqual(llm.single_flight.stats()["coalesced"], 4)
+
+    def test_errors_are_shared_and_not_cached(self):
+        """Test that waiters see the leader's error and later calls retry."""
+        group = SingleFlight()
+        started = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            time.sleep(0.05)
+            raise ValueError("upstream failed")
+
+        def call():
+            try:
+                group.do("key", failing)
+            except ValueError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        waiter = threading.Thread(target=call)
+        waiter.start()
+        leader.join()
+        waiter.join()
+
+        self.assertEqual(errors, ["upstream failed"] * 2)
+        self.assertEqual(group.do("key", lambda: "ok"), "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()